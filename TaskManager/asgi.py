@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TaskManager.settings')
+# Под ASGI list/retrieve/create задач и token views работают асинхронно
+os.environ.setdefault('ASYNC_API_VIEWS', 'true')
+# Постоянные соединения под ASGI не переиспользуются (см. settings.DATABASES)
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
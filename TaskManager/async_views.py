@@ -0,0 +1,199 @@
+"""
+Асинхронный dispatch для представлений DRF (сам DRF его не умеет).<br>
+Асинхронные варианты обработчиков называются с префиксом `a`, как в Django:
+`apost()` у APIView, `alist()`/`aretrieve()`/`acreate()` у ViewSet.
+Обработчики без такого варианта выполняются в потоке через `sync_to_async`
+"""
+from inspect import iscoroutinefunction
+
+from django.utils.decorators   import classonlymethod
+from django.core.exceptions    import ValidationError
+from django.http               import Http404
+from django.conf               import settings
+from rest_framework.exceptions import APIException
+from rest_framework.response   import Response
+from rest_framework.request    import Request
+from rest_framework            import status
+from asgiref.sync              import markcoroutinefunction, sync_to_async
+
+
+def is_async_api_enabled() -> bool:
+	return getattr(settings, 'ASYNC_API_VIEWS', False)
+
+
+class AsyncAPIViewMixin:
+	"""
+	Асинхронный dispatch для APIView. Включается настройкой `ASYNC_API_VIEWS`
+	(по умолчанию - только под ASGI, см. TaskManager.asgi) или атрибутом/initkwarg
+	`async_dispatch`. Под WSGI Django выполнял бы такое представление через
+	async_to_sync, что только медленнее синхронного.<br>
+	Аутентификаторы вызываются через `aauthenticate()`, если он у них есть
+	"""
+	# None - по настройке ASYNC_API_VIEWS
+	async_dispatch: bool | None = None
+
+	@classonlymethod
+	def as_view(cls, **initkwargs):
+		initkwargs['async_dispatch'] = cls._is_async_view(initkwargs, cls.http_method_names)
+		return _mark_async(super().as_view(**initkwargs), initkwargs['async_dispatch'])
+
+	@classmethod
+	def _is_async_view(cls, initkwargs: dict, handlers) -> bool:
+		enabled = initkwargs.get('async_dispatch', cls.async_dispatch)
+		if enabled is None:
+			enabled = is_async_api_enabled()
+		return bool(enabled) and any(iscoroutinefunction(getattr(cls, f'a{name}', None)) for name in handlers)
+
+
+	def dispatch(self, request, *args, **kwargs):
+		if self.async_dispatch:
+			return self.adispatch(request, *args, **kwargs)
+		return super().dispatch(request, *args, **kwargs)
+
+	async def adispatch(self, request, *args, **kwargs):
+		# < Как APIView.dispatch(), но с await >
+		self.args = args
+		self.kwargs = kwargs
+		request = self.initialize_request(request, *args, **kwargs)
+		self.request = request
+		self.headers = self.default_response_headers
+
+		try:
+			await self.ainitial(request, *args, **kwargs)
+			response = await self.get_async_handler(request.method.lower())(request, *args, **kwargs)
+		except Exception as exc:
+			response = self.handle_exception(exc)
+
+		self.response = self.finalize_response(request, response, *args, **kwargs)
+		return self.response
+		# </>
+
+	async def ainitial(self, request: Request, *args, **kwargs) -> None:
+		self.format_kwarg = self.get_format_suffix(**kwargs)
+
+		neg = self.perform_content_negotiation(request)
+		request.accepted_renderer, request.accepted_media_type = neg
+
+		version, scheme = self.determine_version(request, *args, **kwargs)
+		request.version, request.versioning_scheme = version, scheme
+
+		await self.aperform_authentication(request)
+		# Проверки прав проекта не ходят в БД: пользователь уже загружен
+		self.check_permissions(request)
+		await self.acheck_throttles(request)
+
+	async def aperform_authentication(self, request: Request) -> None:
+		# < Как Request._authenticate() >
+		for authenticator in request.authenticators:
+			try:
+				if hasattr(authenticator, 'aauthenticate'):
+					user_auth_tuple = await authenticator.aauthenticate(request)
+				else:
+					user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+			except APIException:
+				request._not_authenticated()
+				raise
+
+			if user_auth_tuple is not None:
+				request._authenticator = authenticator
+				request.user, request.auth = user_auth_tuple
+				return
+
+		request._not_authenticated()
+		# </>
+
+	async def acheck_throttles(self, request: Request) -> None:
+		durations = []
+		for throttle in self.get_throttles():
+			if hasattr(throttle, 'aallow_request'):
+				allowed = await throttle.aallow_request(request, self)
+			else:
+				allowed = await sync_to_async(throttle.allow_request)(request, self)
+			if not allowed:
+				durations.append(throttle.wait())
+
+		if durations:
+			self.throttled(request, max((duration for duration in durations if duration is not None), default = None))
+
+	def get_async_handler(self, method: str):
+		if method not in self.http_method_names:
+			return sync_to_async(self.http_method_not_allowed)
+
+		# У ViewSet обработчик - действие (list, create...), у APIView - сам метод
+		name = getattr(self, 'action_map', {}).get(method, method)
+		handler = getattr(self, f'a{name}', None)
+		if iscoroutinefunction(handler):
+			return handler
+		return sync_to_async(getattr(self, method, self.http_method_not_allowed))
+
+
+class AsyncViewSetMixin(AsyncAPIViewMixin):
+	"""
+	Асинхронные `alist`/`aretrieve`/`acreate` для GenericViewSet. Маршрут
+	становится асинхронным, если у одного из его действий есть `a`-вариант,
+	остальные действия маршрута выполняются в потоке.<br>
+	Сериализаторы не должны ходить в БД при валидации и выводе: связи
+	подгружаются заранее, иначе Django выбросит SynchronousOnlyOperation
+	"""
+	@classonlymethod
+	def as_view(cls, actions = None, **initkwargs):
+		initkwargs['async_dispatch'] = cls._is_async_view(initkwargs, (actions or {}).values())
+		# Мимо AsyncAPIViewMixin.as_view - сразу к ViewSetMixin.as_view
+		view = super(AsyncAPIViewMixin, cls).as_view(actions, **initkwargs)
+		return _mark_async(view, initkwargs['async_dispatch'])
+
+
+	async def alist(self, request: Request, *args, **kwargs):
+		queryset = self.filter_queryset(self.get_queryset())
+
+		page = await self.apaginate_queryset(queryset)
+		if page is not None:
+			return self.get_paginated_response(self.get_serializer(page, many = True).data)
+
+		return Response(self.get_serializer([obj async for obj in queryset], many = True).data)
+
+	async def aretrieve(self, request: Request, *args, **kwargs):
+		instance = await self.aget_object()
+		return Response(self.get_serializer(instance).data)
+
+	async def acreate(self, request: Request, *args, **kwargs):
+		serializer = self.get_serializer(data = request.data)
+		serializer.is_valid(raise_exception = True)
+		await self.aperform_create(serializer)
+
+		headers = self.get_success_headers(serializer.data)
+		return Response(serializer.data, status = status.HTTP_201_CREATED, headers = headers)
+
+	async def aperform_create(self, serializer) -> None:
+		await sync_to_async(self.perform_create)(serializer)
+
+
+	async def aget_object(self):
+		# < Как GenericAPIView.get_object() >
+		queryset = self.filter_queryset(self.get_queryset())
+
+		lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+		filter_kwargs = { self.lookup_field: self.kwargs[lookup_url_kwarg] }
+
+		try:
+			obj = await queryset.aget(**filter_kwargs)
+		except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+			raise Http404
+
+		self.check_object_permissions(self.request, obj)
+		return obj
+		# </>
+
+	async def apaginate_queryset(self, queryset):
+		if self.paginator is None:
+			return None
+
+		paginate = getattr(self.paginator, 'apaginate_queryset', None)
+		if paginate is None:
+			return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view = self)
+		return await paginate(queryset, self.request, view = self)
+
+
+def _mark_async(view, is_async: bool):
+	# DRF оборачивает view в обычную функцию: Django должен знать, что она вернёт корутину
+	return markcoroutinefunction(view) if is_async else view
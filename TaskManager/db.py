@@ -0,0 +1,65 @@
+"""
+Счётчики соединений с БД для метрик (см. TaskManager.views.DatabaseStatsView).<br>
+Считаются в пределах процесса: у каждого воркера gunicorn/uvicorn свои.
+С пулом `connection_created` приходит на каждую выдачу соединения из пула,
+поэтому открытые соединения берутся из статистики самого пула
+"""
+from collections import Counter
+from threading   import Lock
+
+from django.db.backends.signals import connection_created
+from django.core.signals        import request_started
+from django.dispatch            import receiver
+from django.db                  import connections
+
+
+_lock = Lock()
+_requests = 0
+_connections_created = Counter()
+
+
+@receiver(request_started, dispatch_uid = 'TaskManager.db.count_request')
+def count_request(sender, **kwargs):
+	global _requests
+	with _lock:
+		_requests += 1
+
+
+@receiver(connection_created, dispatch_uid = 'TaskManager.db.count_connection')
+def count_connection(sender, connection, **kwargs):
+	with _lock:
+		_connections_created[connection.alias] += 1
+
+
+def get_connection_mode(alias: str = 'default') -> str:
+	settings_dict = connections[alias].settings_dict
+	if settings_dict['OPTIONS'].get('pool'):
+		return 'pool'
+	# None - соединение не закрывается никогда
+	if settings_dict['CONN_MAX_AGE'] != 0:
+		return 'persistent'
+	return 'per_request'
+
+
+def get_database_stats(alias: str = 'default') -> dict:
+	connection = connections[alias]
+	mode = get_connection_mode(alias)
+
+	with _lock:
+		requests, created = _requests, _connections_created[alias]
+
+	pool = connection.pool.get_stats() if mode == 'pool' else None
+	if pool is not None:
+		created = pool.get('connections_num', 0)
+
+	return {
+		'alias':                   alias,
+		'driver':                  connection.Database.__name__,
+		'mode':                    mode,
+		'conn_max_age':            connection.settings_dict['CONN_MAX_AGE'],
+		'conn_health_checks':      connection.settings_dict['CONN_HEALTH_CHECKS'],
+		'requests':                requests,
+		'connections_created':     created,
+		'connections_per_request': round(created / requests, 3) if requests else None,
+		'pool':                    pool,
+	}
@@ -0,0 +1,222 @@
+import secrets
+import struct
+import zlib
+
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.cache       import patch_vary_headers
+from django.utils.text        import compress_string
+from django.http.response     import FileResponse
+from django.conf              import settings
+
+try:
+	import brotli
+except ImportError:
+	brotli = None
+
+try:
+	import zstandard
+except ImportError:
+	zstandard = None
+
+
+# Типы, которые уже сжаты: повторное сжатие тратит CPU и почти ничего не даёт
+INCOMPRESSIBLE_CONTENT_TYPES = (
+	'image/', 'video/', 'audio/', 'font/woff',
+	'application/zip', 'application/gzip', 'application/x-gzip', 'application/x-brotli',
+	'application/zstd', 'application/x-7z-compressed', 'application/x-rar-compressed',
+	'application/x-bzip', 'application/x-bzip2', 'application/x-xz', 'application/pdf',
+)
+# Исключения среди image/*: текстовые форматы
+COMPRESSIBLE_IMAGE_TYPES = ('image/svg+xml',)
+
+
+class _GzipStream:
+	def __init__(self, level: int):
+		# wbits 16+ - заголовок и контрольная сумма gzip
+		self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+	def compress(self, chunk: bytes) -> bytes:
+		return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+	def finish(self) -> bytes:
+		return self.compressor.flush()
+
+
+class _BrotliStream:
+	def __init__(self, level: int):
+		self.compressor = brotli.Compressor(quality = level)
+
+	def compress(self, chunk: bytes) -> bytes:
+		return self.compressor.process(chunk) + self.compressor.flush()
+
+	def finish(self) -> bytes:
+		return self.compressor.finish()
+
+
+class _ZstdStream:
+	def __init__(self, level: int):
+		self.compressor = zstandard.ZstdCompressor(level = level).compressobj()
+
+	def compress(self, chunk: bytes) -> bytes:
+		return self.compressor.compress(chunk) + self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+	def finish(self) -> bytes:
+		return self.compressor.flush()
+
+
+# Против BREACH длина сжатого ответа меняется на случайные 0-100 байт, как у GZipMiddleware
+MAX_RANDOM_BYTES = 100
+
+
+def _gzip(content: bytes, level: int) -> bytes:
+	# Как GZipMiddleware: случайная длина заголовка, уровень всегда 6
+	return compress_string(content, max_random_bytes = MAX_RANDOM_BYTES)
+
+def _brotli(content: bytes, level: int) -> bytes:
+	compressor = brotli.Compressor(quality = level)
+	# После flush() поток выровнен по байту, и можно вставить свой метаблок
+	return compressor.process(content) + compressor.flush() + _brotli_padding() + compressor.finish()
+
+def _zstd(content: bytes, level: int) -> bytes:
+	return zstandard.ZstdCompressor(level = level).compress(content) + _zstd_padding()
+
+
+def _brotli_padding() -> bytes:
+	"""
+	Метаблок метаданных (RFC 7932, 9.2) со случайными байтами, декодер их пропускает:
+	ISLAST = 0, MNIBBLES = 0, MSKIPBYTES = 1, затем MSKIPLEN - 1
+	"""
+	size = secrets.randbelow(MAX_RANDOM_BYTES) + 1
+	skip = size - 1
+	return bytes(((skip & 0b11) << 6 | 0b010110, skip >> 2)) + secrets.token_bytes(size)
+
+def _zstd_padding() -> bytes:
+	# Пропускаемый кадр (RFC 8878, 3.1.2): magic, длина, данные
+	size = secrets.randbelow(MAX_RANDOM_BYTES + 1)
+	return struct.pack('<II', 0x184D2A50, size) + secrets.token_bytes(size)
+
+
+# Content-Encoding -> (сжатие целиком, потоковое сжатие, доступен ли, уровень по умолчанию)
+CODECS = {
+	'zstd': (_zstd,   _ZstdStream,   lambda: zstandard is not None, 3),
+	'br':   (_brotli, _BrotliStream, lambda: brotli is not None,    4),
+	'gzip': (_gzip,   _GzipStream,   lambda: True,                  6),
+}
+
+
+def get_available_encodings() -> tuple[str, ...]:
+	"""
+	Кодировки из `RESPONSE_COMPRESSION['ENCODINGS']`, для которых установлена
+	библиотека. gzip из stdlib доступен всегда
+	"""
+	encodings = _get_options().get('ENCODINGS', ('zstd', 'br', 'gzip'))
+	return tuple(encoding for encoding in encodings if encoding in CODECS and CODECS[encoding][2]())
+
+
+def choose_encoding(accept_encoding: str, available: tuple[str, ...]) -> str | None:
+	"""
+	Кодировка с наибольшим q из `Accept-Encoding`; при равном q - первая в `available`
+	"""
+	weights, wildcard = {}, None
+	for part in accept_encoding.split(','):
+		coding, _, params = part.strip().partition(';')
+		coding = coding.strip().lower()
+		if not coding:
+			continue
+
+		weight = 1.0
+		for param in params.split(';'):
+			name, _, value = param.strip().partition('=')
+			if name.strip() == 'q':
+				try:
+					weight = float(value)
+				except ValueError:
+					weight = 0.0
+
+		if coding == '*':
+			wildcard = weight
+		else:
+			weights[coding] = weight
+
+	best, best_weight = None, 0.0
+	for encoding in available:
+		weight = weights.get(encoding, wildcard or 0.0)
+		if weight > best_weight:
+			best, best_weight = encoding, weight
+	return best
+
+
+def is_compressible(content_type: str) -> bool:
+	content_type = content_type.split(';', 1)[0].strip().lower()
+	if content_type in COMPRESSIBLE_IMAGE_TYPES:
+		return True
+	return not content_type.startswith(INCOMPRESSIBLE_CONTENT_TYPES)
+
+
+def _get_options() -> dict:
+	return getattr(settings, 'RESPONSE_COMPRESSION', {})
+
+
+class CompressionMiddleware(MiddlewareMixin):
+	"""
+	Сжатие ответов zstd/brotli/gzip по `Accept-Encoding`.<br>
+	brotli и zstandard - необязательные зависимости, без них остаётся gzip.
+	Маленькие ответы (меньше `MIN_SIZE`) и уже сжатые типы не трогаются.
+	Потоковые ответы сжимаются по чанкам, каждый чанк сразу отдаётся клиенту.<br>
+	`FileResponse` (вложения задач) не сжимается: иначе сервер не сможет
+	отдать файл через `sendfile()`, а `Range` указывал бы на сжатые байты
+	"""
+	def process_response(self, request, response):
+		if (
+			response.has_header('Content-Encoding') or
+			response.status_code in (206, 304) or
+			isinstance(response, FileResponse) or
+			not is_compressible(response.get('Content-Type', ''))
+		):
+			return response
+
+		if not response.streaming and len(response.content) < _get_options().get('MIN_SIZE', 1024):
+			return response
+
+		# Кеши должны различать ответы по Accept-Encoding, даже если сейчас не сжимаем
+		patch_vary_headers(response, ('Accept-Encoding',))
+
+		encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), get_available_encodings())
+		if encoding is None:
+			return response
+
+		compress, stream_class, _, default_level = CODECS[encoding]
+		level = _get_options().get('LEVELS', {}).get(encoding, default_level)
+
+		if response.streaming:
+			if response.is_async:
+				response.streaming_content = _compress_async_stream(response.streaming_content, stream_class(level))
+			else:
+				response.streaming_content = _compress_stream(response.streaming_content, stream_class(level))
+			del response.headers['Content-Length']
+		else:
+			compressed = compress(response.content, level)
+			if len(compressed) >= len(response.content):
+				return response
+			response.content = compressed
+			response.headers['Content-Length'] = str(len(compressed))
+
+		# Сжатое представление уже не совпадает побайтово с исходным
+		if (etag := response.get('ETag')) and etag.startswith('"'):
+			response.headers['ETag'] = f'W/{etag}'
+		response.headers['Content-Encoding'] = encoding
+
+		return response
+
+
+def _compress_stream(chunks, stream):
+	for chunk in chunks:
+		if data := stream.compress(chunk):
+			yield data
+	yield stream.finish()
+
+async def _compress_async_stream(chunks, stream):
+	async for chunk in chunks:
+		if data := stream.compress(chunk):
+			yield data
+	yield stream.finish()
@@ -0,0 +1,64 @@
+"""
+JSON рендерер и парсер для REST_FRAMEWORK на orjson.<br>
+orjson - необязательная зависимость: без него работают стандартные
+`JSONRenderer`/`JSONParser` DRF, вывод в обоих случаях одинаковый побайтово
+"""
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.exceptions     import ParseError
+from rest_framework.renderers      import JSONRenderer
+from rest_framework.parsers        import JSONParser
+from django.conf                   import settings
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+	"""
+	Компактный UTF-8 JSON через orjson. Типы, которых orjson не знает
+	(lazy строки переводов вроде меток `User.Role`, Decimal, timedelta,
+	QuerySet...), уходят в `JSONEncoder.default` DRF, как и раньше.<br>
+	Отступы (`application/json; indent=4`, browsable API) и настройки
+	`UNICODE_JSON`/`COMPACT_JSON` = False отдаются стандартному рендеру
+	"""
+	def render(self, data, accepted_media_type = None, renderer_context = None) -> bytes:
+		if (
+			orjson is None or data is None or
+			self.ensure_ascii or not self.compact or
+			self.get_indent(accepted_media_type, renderer_context or {}) is not None
+		):
+			return super().render(data, accepted_media_type, renderer_context)
+
+		try:
+			content = orjson.dumps(data, default = _default, option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+		except TypeError:
+			# Например, int больше 64 бит - stdlib справится
+			return super().render(data, accepted_media_type, renderer_context)
+
+		# Как и JSONRenderer: \u2028 и \u2029 экранируются, чтобы JSON был подмножеством JavaScript
+		if b'\xe2\x80' in content:
+			content = content.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+		return content
+
+
+class FastJSONParser(JSONParser):
+	renderer_class = FastJSONRenderer
+
+	def parse(self, stream, media_type = None, parser_context = None):
+		encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+		# orjson читает только UTF-8 и всегда отклоняет NaN/Infinity
+		if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8') or not self.strict:
+			return super().parse(stream, media_type, parser_context)
+
+		try:
+			return orjson.loads(stream.read())
+		except orjson.JSONDecodeError as exc:
+			raise ParseError(f'JSON parse error - {exc}')
+
+
+_encoder = JSONEncoder()
+
+def _default(obj):
+	return _encoder.default(obj)
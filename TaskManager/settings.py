@@ -10,10 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
-from datetime import timedelta
-from pathlib  import Path
-from dotenv   import load_dotenv
-from os       import getenv
+from django.core.exceptions import ImproperlyConfigured
+from importlib.util         import find_spec
+from datetime               import timedelta
+from pathlib                import Path
+from dotenv                 import load_dotenv
+from os                     import getenv
 
 load_dotenv()
 
@@ -53,7 +55,7 @@ INSTALLED_APPS = [
 	'rest_framework',
 	'rest_framework_simplejwt',
 	'rest_framework_simplejwt.token_blacklist',
-	'django_cleanup.apps.CleanupConfig',
+	'django_filters',
 
 	# This project
 	'users',
@@ -61,6 +63,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+	# Сжатие - первым: debug toolbar должен видеть ещё не сжатый ответ
+	'TaskManager.middleware.CompressionMiddleware',
+
 	# Debug Toolbar
 	"debug_toolbar.middleware.DebugToolbarMiddleware",
 	'debug_toolbar_force.middleware.ForceDebugToolbarMiddleware',
@@ -93,6 +98,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'TaskManager.wsgi.application'
 
+# Асинхронные варианты представлений API (см. TaskManager.async_views).
+# TaskManager.asgi включает их по умолчанию, под WSGI они только медленнее
+ASYNC_API_VIEWS = getenv('ASYNC_API_VIEWS', 'false').lower() in ('1', 'true', 'yes')
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
@@ -104,23 +113,85 @@ DATABASES = {
 		'NAME': getenv('DB_NAME'),
 		'HOST': getenv('DB_HOST'),
 		'PORT': getenv('DB_PORT'),
+		# Соединение переживает запрос и закрывается после стольких секунд (0 - новое
+		# на каждый запрос). Под ASGI у каждого запроса свой поток, постоянные
+		# соединения там не переиспользуются: TaskManager.asgi ставит 0, нужен DB_POOL
+		'CONN_MAX_AGE': int(getenv('DB_CONN_MAX_AGE', 60)),
+		# Перед переиспользованием соединение проверяется, разорванное - пересоздаётся
+		'CONN_HEALTH_CHECKS': getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() in ('1', 'true', 'yes'),
+		'OPTIONS': {},
 	}
 }
 
+# Пул соединений psycopg 3 (psycopg[pool]) в каждом процессе, общий для потоков
+# и для ASGI. С psycopg2 Django его не поддерживает. Счётчики - см. TaskManager.db
+if getenv('DB_POOL', 'false').lower() in ('1', 'true', 'yes'):
+	# Иначе ошибка всплыла бы только на первом запросе к БД
+	if not (find_spec('psycopg') and find_spec('psycopg_pool')):
+		raise ImproperlyConfigured('DB_POOL requires psycopg 3 with the pool extra: pip install "psycopg[binary,pool]".')
+	DATABASES['default']['CONN_MAX_AGE'] = 0
+	DATABASES['default']['OPTIONS']['pool'] = {
+		'min_size': int(getenv('DB_POOL_MIN_SIZE', 2)),
+		'max_size': int(getenv('DB_POOL_MAX_SIZE', 10)),
+		# Сколько секунд запрос ждёт свободное соединение
+		'timeout':  float(getenv('DB_POOL_TIMEOUT', 10)),
+	}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# Похожесть и частые пароли - версии из users.validators: список частых
+# паролей загружается один раз при старте процесса
 AUTH_PASSWORD_VALIDATORS = [
-	{ 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
+	{ 'NAME': 'users.validators.BoundedUserAttributeSimilarityValidator', },
 	{ 'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator', },
-	{ 'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator', },
+	{ 'NAME': 'users.validators.PreloadedCommonPasswordValidator', },
 	{ 'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator', },
 
 	# { 'NAME': 'users.validators.NoInvisibleCharsAroundTheEdgesValidator' },
 ]
 
 
+# Хеширование паролей (см. users.hashers)
+# Первый хешер - политика для новых хешей, остальные только проверяют старые.
+# Хеш не по политике (другой алгоритм или параметры) перезаписывается при входе.
+# По умолчанию argon2, если установлен argon2-cffi
+PASSWORD_HASHER_POLICY = getenv('PASSWORD_HASHER_POLICY') or ('argon2' if find_spec('argon2') else 'pbkdf2')
+
+_PASSWORD_HASHERS = {
+	'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+	'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+	'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [
+	_PASSWORD_HASHERS[PASSWORD_HASHER_POLICY],
+	*(hasher for policy, hasher in _PASSWORD_HASHERS.items() if policy != PASSWORD_HASHER_POLICY),
+	'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+PASSWORD_HASHING = {
+	'PBKDF2_ITERATIONS': int(getenv('PASSWORD_PBKDF2_ITERATIONS', 1_000_000)),
+	# Рекомендации OWASP для argon2id: 19 MiB, 2 прохода, 1 поток
+	'ARGON2': {
+		'TIME_COST':   int(getenv('PASSWORD_ARGON2_TIME_COST', 2)),
+		'MEMORY_COST': int(getenv('PASSWORD_ARGON2_MEMORY_COST', 19 * 1024)), # KiB
+		'PARALLELISM': int(getenv('PASSWORD_ARGON2_PARALLELISM', 1)),
+	},
+	'SCRYPT': {
+		'WORK_FACTOR': int(getenv('PASSWORD_SCRYPT_WORK_FACTOR', 2 ** 14)),
+		'BLOCK_SIZE':  int(getenv('PASSWORD_SCRYPT_BLOCK_SIZE', 8)),
+		'PARALLELISM': int(getenv('PASSWORD_SCRYPT_PARALLELISM', 1)),
+	},
+	# Потоков хеширования у асинхронных view в процессе, 0 - по числу ядер
+	'THREADS': int(getenv('PASSWORD_HASHING_THREADS', 0)),
+}
+
+AUTHENTICATION_BACKENDS = [
+	'users.backends.HashingPoolModelBackend',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -147,17 +218,48 @@ STATIC_ROOT = Path(BASE_DIR / 'static')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = Path(BASE_DIR / 'media')
 
+STORAGES = {
+	'default':     { 'BACKEND': 'django.core.files.storage.FileSystemStorage' },
+	'staticfiles': { 'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' },
+	# Вложения задач: один файл на одинаковое содержимое (см. tasks.storage)
+	'attachments': { 'BACKEND': 'tasks.storage.ContentAddressedStorage' },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Сжатие ответов (см. TaskManager.middleware)
+RESPONSE_COMPRESSION = {
+	# Меньшие ответы отдаются как есть: выигрыш меньше накладных расходов
+	'MIN_SIZE':  int(getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),
+	# Порядок - предпочтение сервера при равном q в Accept-Encoding
+	'ENCODINGS': ('zstd', 'br', 'gzip'),
+	# Уровень gzip всегда 6 (как у GZipMiddleware)
+	'LEVELS':    { 'zstd': 3, 'br': 4 },
+}
+
+
 # MARK: Rest framework
 REST_FRAMEWORK = {
 	'DEFAULT_AUTHENTICATION_CLASSES': (
 		'users.authenticators.JWTFromCookiesAuthentication',
-	)
+	),
+	# JSON через orjson, если он установлен (см. TaskManager.renderers)
+	'DEFAULT_RENDERER_CLASSES': (
+		'TaskManager.renderers.FastJSONRenderer',
+		'rest_framework.renderers.BrowsableAPIRenderer',
+	),
+	'DEFAULT_PARSER_CLASSES': (
+		'TaskManager.renderers.FastJSONParser',
+		'rest_framework.parsers.FormParser',
+		'rest_framework.parsers.MultiPartParser',
+	),
+	# Сколько прокси перед приложением: адрес клиента для лимитов берётся из
+	# X-Forwarded-For только за ними, иначе заголовок подделывается
+	'NUM_PROXIES': int(getenv('NUM_PROXIES', 0)),
 }
 
 
@@ -166,6 +268,7 @@ SIMPLE_JWT = {
 	'BLACKLIST_AFTER_ROTATION': True,
 	'ACCESS_TOKEN_LIFETIME':    timedelta(minutes = 15),
 	'REFRESH_TOKEN_LIFETIME':   timedelta(days = 7),
+	'TOKEN_OBTAIN_SERIALIZER':  'users.serializers.ClaimsTokenObtainPairSerializer',
 	'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CookieTokenRefreshSerializer',
 
 	# Настройки для хранения токена в куках
@@ -177,3 +280,80 @@ SIMPLE_JWT = {
 	'AUTH_COOKIE_DOMAIN':    None,
 	'AUTH_COOKIE_PATH':      '/',
 }
+
+
+# MARK: Users
+# Кеш пользователей в JWTFromCookiesAuthentication (см. users.cache).
+# Без CACHE_ALIAS это LRU в каждом процессе: изменения пользователя другие
+# процессы видят только через TTL, поэтому он не больше 5 секунд
+USERS_AUTH_CACHE = {
+	'MAX_SIZE':    int(getenv('USERS_AUTH_CACHE_MAX_SIZE', 1024)),
+	'TTL':         float(getenv('USERS_AUTH_CACHE_TTL', 5)),
+	'CACHE_ALIAS': getenv('USERS_AUTH_CACHE_ALIAS') or None,
+}
+
+# Роль, is_staff и username кладутся в JWT, и пользователь запроса собирается
+# из токена без обращения к БД (см. users.tokens). Только с общим кешем
+# USERS_AUTH_CACHE (Redis, Memcached), с LocMemCache - ImproperlyConfigured
+USERS_STATELESS_JWT = getenv('USERS_STATELESS_JWT', 'false').lower() in ('1', 'true', 'yes')
+
+# Bloom фильтр отозванных refresh токенов перед запросом к token_blacklist
+# (см. users.blacklist). Поколение фильтра хранится в кеше USERS_AUTH_CACHE:
+# включается только с общим кешем (Redis, Memcached), с LocMemCache - ImproperlyConfigured
+USERS_TOKEN_BLACKLIST = {
+	'ENABLED':             getenv('USERS_TOKEN_BLACKLIST_FILTER', 'false').lower() in ('1', 'true', 'yes'),
+	'FALSE_POSITIVE_RATE': 0.001,
+	'REBUILD_INTERVAL':    10 * 60,
+	'MAX_CATCHUP':         1_000,
+}
+
+# Лимиты входа, регистрации и обновления токенов (см. users.throttling).
+# Короткое окно режет всплески, длинное - постоянный перебор. Для нескольких
+# процессов CACHE_ALIAS должен указывать на общий кеш (Redis, Memcached)
+USERS_THROTTLING = {
+	'ENABLED':     getenv('USERS_THROTTLING', 'true').lower() in ('1', 'true', 'yes'),
+	'CACHE_ALIAS': getenv('USERS_THROTTLING_CACHE_ALIAS') or None,
+	'RATES': {
+		'register': { 'ip': ['5/10s', '30/h'] },
+		'login':    { 'ip': ['10/10s', '100/h'], 'username_ip': ['5/min', '30/h'] },
+		'refresh':  { 'ip': ['30/10s', '600/h'] },
+	},
+}
+
+
+# MARK: Tasks
+# Вложения задач (см. tasks.uploads)
+TASK_ATTACHMENT_MAX_SIZE   = int(getenv('TASK_ATTACHMENT_MAX_SIZE', 100 * 1024 * 1024))
+TASK_ATTACHMENT_CHUNK_SIZE = 64 * 1024
+# Отдача вложений веб-сервером после проверки прав (см. tasks.downloads):
+# '' - сам Django (FileResponse), 'x-accel-redirect' - nginx, 'x-sendfile' - apache/lighttpd
+TASK_ATTACHMENT_SENDFILE        = getenv('TASK_ATTACHMENT_SENDFILE', '').lower()
+# internal location nginx, который смотрит в MEDIA_ROOT
+TASK_ATTACHMENT_SENDFILE_PREFIX = getenv('TASK_ATTACHMENT_SENDFILE_PREFIX', '/protected-media/')
+
+# Кеш ответов list/retrieve с ETag/Last-Modified (см. tasks.caching).
+# Версии задач хранятся в этом кеше, поэтому он должен быть общим для всех
+# процессов (Redis, Memcached), с LocMemCache - ImproperlyConfigured
+TASK_RESPONSE_CACHE = {
+	'ENABLED':         getenv('TASK_RESPONSE_CACHE_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+	'CACHE_ALIAS':     getenv('TASK_RESPONSE_CACHE_ALIAS') or None,
+	'TIMEOUT':         int(getenv('TASK_RESPONSE_CACHE_TIMEOUT', 5 * 60)),
+	# Сколько живут версии задач (не меньше TIMEOUT)
+	'VERSION_TIMEOUT': 24 * 60 * 60,
+}
+
+# Строк на одну выборку серверного курсора и на один чанк ответа выгрузки (см. tasks.exports)
+TASK_EXPORT_CHUNK_SIZE = int(getenv('TASK_EXPORT_CHUNK_SIZE', 2_000))
+
+# Импорт задач из CSV/NDJSON (см. tasks.imports)
+TASK_IMPORT = {
+	'MAX_SIZE':    int(getenv('TASK_IMPORT_MAX_SIZE', 200 * 1024 * 1024)),
+	# Строк на одну транзакцию (и одну контрольную точку)
+	'BATCH_SIZE':  1_000,
+	# 'copy' - COPY FROM STDIN на PostgreSQL, 'bulk_create' - INSERT
+	'METHOD':      getenv('TASK_IMPORT_METHOD', 'copy'),
+	# Сколько ошибок строк хранится в отчёте (счётчик - по всем)
+	'MAX_ERRORS':  1_000,
+	# Импорт без прогресса дольше этого (сек) считается прерванным и может быть продолжен
+	'STALE_AFTER': 10 * 60,
+}
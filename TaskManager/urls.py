@@ -22,12 +22,16 @@ from django.conf                    import settings
 from django.shortcuts               import redirect
 from django.urls                    import reverse
 
+from TaskManager.views import DatabaseStatsView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls, name = 'admin_panel'),
     path('', lambda _: redirect('api/'), name = 'home_page'),
 	path('', include('tasks.urls')),
 	path('', include('users.urls')),
+	# Метрики соединений с БД (только для staff)
+	path('api/db-stats/', DatabaseStatsView.as_view(), name = 'db-stats'),
 ] + debug_toolbar_urls()
 
 
@@ -0,0 +1,16 @@
+from typing    import Iterable, Iterator, TypeVar
+from itertools import islice
+
+
+T = TypeVar('T')
+
+
+# < Как itertools.batched() (он есть только с Python 3.12) >
+def batched(iterable: Iterable[T], n: int) -> Iterator[tuple[T, ...]]:
+	if n < 1:
+		raise ValueError('n must be at least one')
+
+	iterator = iter(iterable)
+	while batch := tuple(islice(iterator, n)):
+		yield batch
+# </>
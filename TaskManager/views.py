@@ -0,0 +1,17 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response    import Response
+from rest_framework             import views
+from django.conf                import settings
+
+from TaskManager.db import get_database_stats
+
+
+class DatabaseStatsView(views.APIView):
+	"""
+	Соединения с БД этого процесса: режим (пул, постоянные, на каждый запрос),
+	сколько соединений открыто на сколько запросов и статистика пула psycopg
+	"""
+	permission_classes = [IsAdminUser]
+
+	def get(self, request):
+		return Response([get_database_stats(alias) for alias in settings.DATABASES])
@@ -4,4 +4,5 @@ from . import models
 
 admin.site.register((
 	models.Task,
+	models.TaskImport,
 ))
\ No newline at end of file
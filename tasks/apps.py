@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        from tasks.caching import check_response_cache
+        from tasks import signals # noqa: F401
+        # Счётчики соединений для DatabaseStatsView: TaskManager - не приложение,
+        # своего ready() у него нет
+        from TaskManager import db # noqa: F401
+
+        check_response_cache()
@@ -0,0 +1,276 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import hashlib
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.dummy  import DummyCache
+from django.core.exceptions            import ImproperlyConfigured
+from django.http.response              import HttpResponse, HttpResponseNotModified
+from django.utils.http                 import http_date, parse_etags, parse_http_date_safe
+from django.core.cache                 import caches
+from django.conf                       import settings
+from django.db                         import transaction
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response  import Response
+from rest_framework.request   import Request
+
+from tasks.downloads import etag_matches
+
+
+__all__ = [
+	'is_response_cache_enabled',
+	'check_response_cache',
+	'invalidate_tasks',
+	'invalidate_task_owners',
+	'deferred_invalidation',
+	'CachedTaskResponseMixin',
+]
+
+# Версии - метки времени последнего изменения (в нс): по ним же считается Last-Modified
+_TASKS_VERSION_KEY  = 'tasks:version'
+_OWNERS_VERSION_KEY = 'tasks:owners_version'
+
+# Во время deferred_invalidation() id изменённых задач копятся здесь
+_pending_invalidation: ContextVar[set | None] = ContextVar('tasks_pending_invalidation', default = None)
+
+
+def _get_options() -> dict:
+	return getattr(settings, 'TASK_RESPONSE_CACHE', {})
+
+def is_response_cache_enabled() -> bool:
+	return _get_options().get('ENABLED', False)
+
+def _get_cache():
+	return caches[_get_options().get('CACHE_ALIAS') or 'default']
+
+def _get_timeout() -> int:
+	return _get_options().get('TIMEOUT', 300)
+
+def _get_version_timeout() -> int:
+	# Не меньше жизни ответа: иначе ответ в кеше пережил бы свою версию впустую
+	return max(_get_options().get('VERSION_TIMEOUT', 24 * 60 * 60), _get_timeout())
+
+
+def check_response_cache() -> None:
+	"""
+	Версии задач сдвигаются в процессе, изменившем задачу: с LocMemCache
+	другие воркеры их не увидят и будут отдавать устаревшие ответы
+	"""
+	if is_response_cache_enabled() and isinstance(_get_cache(), (LocMemCache, DummyCache)):
+		raise ImproperlyConfigured(
+			'TASK_RESPONSE_CACHE requires a cache shared by all processes (Redis, Memcached, database):'
+			' set its CACHE_ALIAS to one or disable the response cache.'
+		)
+
+def _make_task_key(pk) -> str:
+	return f'tasks:version:{pk}'
+
+
+# MARK: Invalidation
+def invalidate_tasks(pks) -> None:
+	"""
+	Сдвигает версию списка задач и каждой из `pks` одним обращением к кешу.<br>
+	Внутри транзакции версия сдвигается ещё раз после коммита: иначе запрос,
+	прочитавший новую версию до коммита, закешировал бы старые данные
+	"""
+	if not is_response_cache_enabled():
+		return
+
+	pending = _pending_invalidation.get()
+	if pending is not None:
+		pending.update(pks)
+		return
+
+	keys = [_TASKS_VERSION_KEY, *map(_make_task_key, pks)]
+	_bump(keys)
+	if transaction.get_connection().in_atomic_block:
+		transaction.on_commit(lambda: _bump(keys))
+
+def invalidate_task_owners() -> None:
+	# Владелец вложен в ответ задачи (username, email)
+	if not is_response_cache_enabled():
+		return
+
+	_bump([_OWNERS_VERSION_KEY])
+	if transaction.get_connection().in_atomic_block:
+		transaction.on_commit(lambda: _bump([_OWNERS_VERSION_KEY]))
+
+
+@contextmanager
+def deferred_invalidation():
+	"""
+	Для пакетных операций: сигналы каждой задачи только запоминают её id,
+	а версии сдвигаются один раз на выходе
+	"""
+	pending = set()
+	token = _pending_invalidation.set(pending)
+	try:
+		yield pending
+	finally:
+		_pending_invalidation.reset(token)
+		if pending:
+			invalidate_tasks(pending)
+
+
+def _bump(keys: list[str]) -> None:
+	version = time.time_ns()
+	_get_cache().set_many(dict.fromkeys(keys, version), timeout = _get_version_timeout())
+
+
+def _get_versions(keys: tuple[str, ...]) -> tuple[tuple[int, ...], dict[str, int]]:
+	"""
+	Пропавшая из кеша версия заменяется текущим временем: закешированные
+	с ней ответы больше не совпадут ни по ключу, ни по ETag.<br>
+	Такие версии возвращаются вторым значением и записываются в кеш только
+	после успешного ответа (`_save_versions()`): иначе каждый GET
+	несуществующего id оставлял бы в кеше ключ
+	"""
+	found = _get_cache().get_many(keys)
+	missing = { key: time.time_ns() for key in keys if key not in found }
+	return tuple(found.get(key) or missing[key] for key in keys), missing
+
+async def _aget_versions(keys: tuple[str, ...]) -> tuple[tuple[int, ...], dict[str, int]]:
+	found = await _get_cache().aget_many(keys)
+	missing = { key: time.time_ns() for key in keys if key not in found }
+	return tuple(found.get(key) or missing[key] for key in keys), missing
+
+
+def _save_versions(missing: dict[str, int]) -> None:
+	# add, а не set: версию мог уже сдвинуть другой запрос
+	cache = _get_cache()
+	for key, version in missing.items():
+		cache.add(key, version, timeout = _get_version_timeout())
+
+async def _asave_versions(missing: dict[str, int]) -> None:
+	cache = _get_cache()
+	for key, version in missing.items():
+		await cache.aadd(key, version, timeout = _get_version_timeout())
+
+
+# MARK: Responses
+class CachedTaskResponseMixin:
+	"""
+	Кеширует отрендеренные ответы list/retrieve для каждого пользователя.<br>
+	Ключ - URL запроса, формат ответа и версии задач из кеша, которые
+	сдвигаются сигналами при create/update/delete. `ETag`/`Last-Modified`
+	считаются из тех же версий, поэтому на `If-None-Match`/`If-Modified-Since`
+	ответ 304 отдаётся без запросов к БД и без сериализации
+	"""
+	def list(self, request: Request, *args, **kwargs):
+		return self._get_cached_response(request, (_TASKS_VERSION_KEY,), super().list, *args, **kwargs)
+
+	def retrieve(self, request: Request, *args, **kwargs):
+		pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+		return self._get_cached_response(request, (_make_task_key(pk),), super().retrieve, *args, **kwargs)
+
+	# Для асинхронного dispatch (см. TaskManager.async_views)
+	async def alist(self, request: Request, *args, **kwargs):
+		return await self._aget_cached_response(request, (_TASKS_VERSION_KEY,), super().alist, *args, **kwargs)
+
+	async def aretrieve(self, request: Request, *args, **kwargs):
+		pk = kwargs[self.lookup_url_kwarg or self.lookup_field]
+		return await self._aget_cached_response(request, (_make_task_key(pk),), super().aretrieve, *args, **kwargs)
+
+
+	def _get_cached_response(self, request: Request, version_keys: tuple[str, ...], view, *args, **kwargs):
+		# HTML browsable API содержит CSRF токен и формы - его не кешируем
+		if not self._is_cacheable(request):
+			return view(request, *args, **kwargs)
+
+		versions, missing = _get_versions((*version_keys, _OWNERS_VERSION_KEY))
+		etag, last_modified = self._make_validators(request, versions)
+
+		if _is_not_modified(request, etag, last_modified):
+			return _not_modified_response(etag, last_modified)
+
+		key = f'tasks:response:{etag}'
+		cached = _get_cache().get(key)
+		if cached is not None:
+			return _cached_response(cached, etag, last_modified)
+
+		response: Response = view(request, *args, **kwargs)
+		if response.status_code != 200:
+			return response
+
+		self._render(request, response)
+		_save_versions(missing)
+		_get_cache().set(key, (response.content, response['Content-Type']), timeout = _get_timeout())
+		_set_validators(response, etag, last_modified)
+		return response
+
+	async def _aget_cached_response(self, request: Request, version_keys: tuple[str, ...], view, *args, **kwargs):
+		# То же, что _get_cached_response, но через async API кеша
+		if not self._is_cacheable(request):
+			return await view(request, *args, **kwargs)
+
+		versions, missing = await _aget_versions((*version_keys, _OWNERS_VERSION_KEY))
+		etag, last_modified = self._make_validators(request, versions)
+
+		if _is_not_modified(request, etag, last_modified):
+			return _not_modified_response(etag, last_modified)
+
+		key = f'tasks:response:{etag}'
+		cached = await _get_cache().aget(key)
+		if cached is not None:
+			return _cached_response(cached, etag, last_modified)
+
+		response: Response = await view(request, *args, **kwargs)
+		if response.status_code != 200:
+			return response
+
+		self._render(request, response)
+		await _asave_versions(missing)
+		await _get_cache().aset(key, (response.content, response['Content-Type']), timeout = _get_timeout())
+		_set_validators(response, etag, last_modified)
+		return response
+
+	def _is_cacheable(self, request: Request) -> bool:
+		return is_response_cache_enabled() and not isinstance(request.accepted_renderer, BrowsableAPIRenderer)
+
+	def _render(self, request: Request, response: Response) -> None:
+		# Рендер здесь, а не в finalize_response, чтобы положить в кеш готовые байты
+		response.accepted_renderer = request.accepted_renderer
+		response.accepted_media_type = request.accepted_media_type
+		response.renderer_context = self.get_renderer_context()
+		response.render()
+
+	def _make_validators(self, request: Request, versions: tuple[int, ...]) -> tuple[str, int]:
+		return self._make_etag(request, versions), max(versions) // 1_000_000_000
+
+	def _make_etag(self, request: Request, versions: tuple[int, ...]) -> str:
+		parts = (
+			str(request.user.pk),
+			request.accepted_media_type,
+			request.build_absolute_uri(),
+			*map(str, versions),
+		)
+		return 'W/"{}"'.format(hashlib.md5('\n'.join(parts).encode(), usedforsecurity = False).hexdigest())
+
+
+def _not_modified_response(etag: str, last_modified: int) -> HttpResponseNotModified:
+	response = HttpResponseNotModified()
+	_set_validators(response, etag, last_modified)
+	return response
+
+def _cached_response(cached: tuple[bytes, str], etag: str, last_modified: int) -> HttpResponse:
+	content, content_type = cached
+	response = HttpResponse(content, content_type = content_type)
+	_set_validators(response, etag, last_modified)
+	return response
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: int) -> bool:
+	if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+	if if_none_match:
+		return etag_matches(etag, parse_etags(if_none_match))
+
+	if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+	return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def _set_validators(response: HttpResponse, etag: str, last_modified: int) -> None:
+	response.headers['ETag'] = etag
+	response.headers['Last-Modified'] = http_date(last_modified)
+	# Ответ зависит от пользователя: общим кешам хранить нельзя, клиенту - только с проверкой
+	response.headers['Cache-Control'] = 'private, no-cache'
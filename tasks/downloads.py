@@ -0,0 +1,171 @@
+from pathlib import PurePosixPath
+import re
+
+from django.http.response          import FileResponse, HttpResponse, HttpResponseBase, HttpResponseNotModified
+from django.db.models.fields.files import FieldFile
+from django.utils.http             import content_disposition_header, parse_etags, quote_etag
+from django.conf                   import settings
+
+from tasks.uploads import get_chunk_size
+from tasks.models  import Task
+
+
+SENDFILE_X_ACCEL_REDIRECT = 'x-accel-redirect'
+SENDFILE_X_SENDFILE       = 'x-sendfile'
+
+# Поддерживается один диапазон: на несколько (через запятую) отдаётся весь файл
+_RANGE_RE = re.compile(r'^bytes=(?P<start>\d*)-(?P<end>\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+	pass
+
+
+class _FileRange:
+	"""
+	Читает не больше `length` байт с текущей позиции файла.<br>
+	`fileno()` проброшен, чтобы `wsgi.file_wrapper` сервера (gunicorn и т.п.)
+	мог отдать диапазон через `sendfile()`: длину он берёт из `Content-Length`
+	"""
+	def __init__(self, file, length: int):
+		self.file = file
+		self.remaining = length
+
+	def read(self, size: int = -1) -> bytes:
+		if self.remaining <= 0:
+			return b''
+		if size < 0 or size > self.remaining:
+			size = self.remaining
+
+		data = self.file.read(size)
+		self.remaining -= len(data)
+		return data
+
+	def fileno(self) -> int:
+		return self.file.fileno()
+
+	def close(self) -> None:
+		self.file.close()
+
+
+def get_attachment_etag(task: Task) -> str:
+	"""
+	Сильный ETag по SHA-256 содержимого. Для файлов, загруженных
+	до появления хеша, - по размеру и времени изменения
+	"""
+	if task.attachment_sha256:
+		return quote_etag(task.attachment_sha256)
+
+	storage, name = task.attachment.storage, task.attachment.name
+	modified = storage.get_modified_time(name).timestamp()
+	return quote_etag(f'{storage.size(name):x}-{int(modified * 1_000_000):x}')
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+	"""
+	Возвращает `(start, end)` включительно или None, если заголовок
+	нужно проигнорировать и отдать весь файл
+	"""
+	match = _RANGE_RE.match(header.strip())
+	if not match or not (match['start'] or match['end']):
+		return None
+
+	if not match['start']:
+		# bytes=-N: последние N байт
+		suffix = int(match['end'])
+		if suffix == 0 or size == 0:
+			raise RangeNotSatisfiable()
+		return max(size - suffix, 0), size - 1
+
+	start = int(match['start'])
+	if start >= size:
+		raise RangeNotSatisfiable()
+
+	end = min(int(match['end']), size - 1) if match['end'] else size - 1
+	if end < start:
+		return None
+	return start, end
+
+
+def build_attachment_response(request, task: Task) -> HttpResponseBase:
+	"""
+	Ответ с вложением задачи. Файл не читается в память воркера:
+	- при `TASK_ATTACHMENT_SENDFILE` отдача целиком переходит веб-серверу
+	(`X-Accel-Redirect` для nginx, `X-Sendfile` для apache/lighttpd);
+	- иначе `FileResponse`, который WSGI сервер отдаёт через `sendfile()`.<br>
+	Поддерживаются `Range`/`If-Range` (один диапазон) и `If-None-Match`
+	"""
+	etag = get_attachment_etag(task)
+	filename = task.attachment_filename or PurePosixPath(task.attachment.name).name
+
+	if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+	if if_none_match and etag_matches(etag, parse_etags(if_none_match)):
+		response = HttpResponseNotModified()
+		_set_cache_headers(response, etag)
+		return response
+
+	sendfile = getattr(settings, 'TASK_ATTACHMENT_SENDFILE', '')
+	if sendfile:
+		response = _build_sendfile_response(sendfile, task.attachment, filename)
+		_set_cache_headers(response, etag)
+		return response
+
+	file = task.attachment.storage.open(task.attachment.name, 'rb')
+	size = file.size
+
+	content_range = None
+	range_header = request.META.get('HTTP_RANGE')
+	# If-Range: диапазон имеет смысл, только если файл не поменялся
+	if range_header and request.META.get('HTTP_IF_RANGE', etag) == etag:
+		try:
+			content_range = parse_range(range_header, size)
+		except RangeNotSatisfiable:
+			file.close()
+			response = HttpResponse(status = 416)
+			response.headers['Content-Range'] = f'bytes */{size}'
+			_set_cache_headers(response, etag)
+			return response
+
+	if content_range is None:
+		response = FileResponse(file, as_attachment = True, filename = filename)
+	else:
+		start, end = content_range
+		file.seek(start)
+		response = FileResponse(_FileRange(file, end - start + 1), as_attachment = True, filename = filename, status = 206)
+		response.headers['Content-Length'] = end - start + 1
+		response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+	response.block_size = get_chunk_size()
+	_set_cache_headers(response, etag)
+	return response
+
+
+def _build_sendfile_response(sendfile: str, attachment: FieldFile, filename: str) -> HttpResponse:
+	response = HttpResponse()
+	# Content-Type и Range веб-сервер выставит и обработает сам
+	del response.headers['Content-Type']
+	response.headers['Content-Disposition'] = content_disposition_header(True, filename)
+
+	if sendfile == SENDFILE_X_ACCEL_REDIRECT:
+		prefix = getattr(settings, 'TASK_ATTACHMENT_SENDFILE_PREFIX', '/protected-media/')
+		response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + attachment.name
+	elif sendfile == SENDFILE_X_SENDFILE:
+		response.headers['X-Sendfile'] = attachment.path
+	else:
+		raise ValueError(f'Unknown TASK_ATTACHMENT_SENDFILE: {sendfile!r}')
+
+	return response
+
+
+def _set_cache_headers(response: HttpResponseBase, etag: str) -> None:
+	response.headers['ETag'] = etag
+	response.headers['Accept-Ranges'] = 'bytes'
+	# Файл отдаётся после проверки прав - общим кешам его хранить нельзя
+	response.headers['Cache-Control'] = 'private, no-cache'
+
+
+def etag_matches(etag: str, etags: list[str]) -> bool:
+	# Для If-None-Match сравнение слабое (W/ не учитывается)
+	if '*' in etags:
+		return True
+	return etag.removeprefix('W/') in (tag.removeprefix('W/') for tag in etags)
@@ -0,0 +1,151 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+import csv
+
+from django.http.response import StreamingHttpResponse
+from django.utils.http    import content_disposition_header
+from django.db.models     import QuerySet
+from django.conf          import settings
+
+from TaskManager.renderers import FastJSONRenderer
+from TaskManager.utils     import batched
+from tasks.serializers     import TaskValuesSerializer
+
+
+EXPORT_QUERY_PARAM = 'output'
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+# Рендеры нужны только для согласования Accept: сами строки пишут
+# генераторы ниже, а через рендер проходят лишь ответы с ошибками (JSON)
+class NDJSONRenderer(FastJSONRenderer):
+	media_type = 'application/x-ndjson'
+	format = 'ndjson'
+
+class CSVRenderer(FastJSONRenderer):
+	media_type = 'text/csv'
+	format = 'csv'
+
+
+def get_export_chunk_size() -> int:
+	return getattr(settings, 'TASK_EXPORT_CHUNK_SIZE', 2_000)
+
+
+def build_export_response(
+	queryset: QuerySet, serializer: TaskValuesSerializer, output: str, asynchronous: bool = False,
+) -> StreamingHttpResponse:
+	"""
+	Потоковая выгрузка: строки читаются серверным курсором PostgreSQL
+	(`iterator(chunk_size)`) и сразу уходят клиенту пачками, так что память
+	воркера не зависит от количества задач.<br>
+	Под ASGI (`asynchronous`) нужен асинхронный итератор (`aiterator()`):
+	синхронный Django сначала целиком собирает в список
+	"""
+	chunk_size = get_export_chunk_size()
+	rows = queryset.values(*serializer.values_fields)
+	encoder = (_CSVEncoder if output == 'csv' else _NDJSONEncoder)(serializer)
+
+	if asynchronous:
+		content = _astream(rows.aiterator(chunk_size = chunk_size), encoder, chunk_size)
+	else:
+		content = _stream(rows.iterator(chunk_size = chunk_size), encoder, chunk_size)
+
+	response = StreamingHttpResponse(content, content_type = encoder.content_type)
+	response.headers['Content-Disposition'] = content_disposition_header(True, f'tasks.{output}')
+	return response
+
+
+def _stream(rows: Iterable[dict], encoder: '_NDJSONEncoder', chunk_size: int) -> Iterator[bytes]:
+	for batch in batched(rows, chunk_size):
+		yield encoder.encode(batch)
+	if tail := encoder.finish():
+		yield tail
+
+async def _astream(rows: AsyncIterable[dict], encoder: '_NDJSONEncoder', chunk_size: int) -> AsyncIterator[bytes]:
+	# < Как _stream(), но строки читаются асинхронно >
+	batch = []
+	async for row in rows:
+		batch.append(row)
+		if len(batch) >= chunk_size:
+			yield encoder.encode(batch)
+			batch.clear()
+	if batch:
+		yield encoder.encode(batch)
+	if tail := encoder.finish():
+		yield tail
+	# </>
+
+
+class _NDJSONEncoder:
+	"""Пачка строк -> байты для клиента"""
+	content_type = 'application/x-ndjson'
+
+	def __init__(self, serializer: TaskValuesSerializer):
+		self.serializer = serializer
+		self.renderer = FastJSONRenderer()
+
+	def encode(self, rows: Iterable[dict]) -> bytes:
+		return b''.join(self.renderer.render(self.serializer.to_representation(row)) + b'\n' for row in rows)
+
+	def finish(self) -> bytes:
+		return b''
+
+
+class _Buffer:
+	# csv.writer пишет в файл - здесь "файл" просто возвращает строку
+	def write(self, value: str) -> str:
+		return value
+
+
+class _CSVEncoder(_NDJSONEncoder):
+	"""
+	Вложенный `created_by` разворачивается в колонки `created_by.id`,
+	`created_by.username`, `created_by.email`; null - пустая ячейка
+	"""
+	content_type = 'text/csv; charset=utf-8'
+
+	def __init__(self, serializer: TaskValuesSerializer):
+		self.serializer = serializer
+		self.writer = csv.writer(_Buffer())
+		self.header = None
+
+	def encode(self, rows: Iterable[dict]) -> bytes:
+		lines = []
+		for row in rows:
+			flat = _flatten(self.serializer.to_representation(row))
+			if self.header is None:
+				self.header = list(flat)
+				lines.append(self.writer.writerow(self.header))
+			lines.append(self.writer.writerow([_to_cell(flat[column]) for column in self.header]))
+		return ''.join(lines).encode()
+
+	def finish(self) -> bytes:
+		if self.header is None:
+			# Пустая выгрузка - только заголовок
+			return self.writer.writerow(_flatten_names(self.serializer)).encode()
+		return b''
+
+
+def _flatten(data: dict, prefix: str = '') -> dict:
+	flat = {}
+	for key, value in data.items():
+		if isinstance(value, dict):
+			flat.update(_flatten(value, f'{prefix}{key}.'))
+		else:
+			flat[f'{prefix}{key}'] = value
+	return flat
+
+def _flatten_names(serializer: TaskValuesSerializer) -> list[str]:
+	names = []
+	for field in serializer.fields:
+		if field == 'created_by':
+			names += ['created_by.id', 'created_by.username', 'created_by.email']
+		else:
+			names.append(field)
+	return names
+
+def _to_cell(value) -> str:
+	if value is None:
+		return ''
+	if isinstance(value, bool):
+		return 'true' if value else 'false'
+	return value
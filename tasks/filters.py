@@ -0,0 +1,35 @@
+from django.contrib.postgres.search import SearchQuery
+from django.db.models               import QuerySet
+from django_filters                 import rest_framework as filters
+
+from tasks.models import Task, TASK_SEARCH_CONFIG
+
+
+class TaskFilterSet(filters.FilterSet):
+	"""
+	Каждый фильтр опирается на индекс из `Task.Meta.indexes`:
+	`created_by` - task_owner_created_idx, `is_completed=false` - частичный
+	task_incomplete_created_idx, `search` - GIN по search_vector
+	"""
+	# Числом, а не ModelChoiceFilter - чтобы не проверять существование пользователя запросом
+	created_by     = filters.NumberFilter(field_name = 'created_by_id')
+	created_after  = filters.IsoDateTimeFilter(field_name = 'created_at', lookup_expr = 'gte')
+	created_before = filters.IsoDateTimeFilter(field_name = 'created_at', lookup_expr = 'lt')
+	search         = filters.CharFilter(method = 'filter_search')
+
+	class Meta:
+		model = Task
+		fields = (
+			'is_completed',
+			'created_by',
+			'created_after',
+			'created_before',
+			'search',
+		)
+
+	def filter_search(self, queryset: QuerySet, name: str, value: str) -> QuerySet:
+		if not value.strip():
+			return queryset
+
+		query = SearchQuery(value, config = TASK_SEARCH_CONFIG, search_type = 'websearch')
+		return queryset.filter(search_vector = query)
@@ -0,0 +1,319 @@
+from itertools import islice
+from datetime  import timedelta
+import codecs
+import json
+import csv
+import io
+
+from django.utils.translation  import gettext_lazy as loc
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.settings   import api_settings
+from django.core.files         import File
+from django.db.models          import F, Q
+from django.utils              import timezone
+from django.conf               import settings
+from django.db                 import connection, transaction
+from rest_framework            import status
+
+from TaskManager.utils import batched
+from tasks.serializers import TaskSerializer
+from tasks.caching     import invalidate_tasks
+from tasks.models      import Task, TaskImport
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+
+# Колонки, которые берутся из файла. Остальные (id, created_by.*, created_at
+# из выгрузки) игнорируются: вложения текстом не импортируются
+IMPORT_FIELDS = ('title', 'description', 'is_completed')
+
+IMPORT_CONTENT_TYPES = {
+	'text/csv':             TaskImport.Format.CSV,
+	'application/x-ndjson': TaskImport.Format.NDJSON,
+	'application/jsonl':    TaskImport.Format.NDJSON,
+}
+IMPORT_EXTENSIONS = {
+	'.csv':    TaskImport.Format.CSV,
+	'.ndjson': TaskImport.Format.NDJSON,
+	'.jsonl':  TaskImport.Format.NDJSON,
+}
+
+
+def _get_options() -> dict:
+	return getattr(settings, 'TASK_IMPORT', {})
+
+def get_max_import_size() -> int:
+	return _get_options().get('MAX_SIZE', 200 * 1024 * 1024)
+
+
+class ImportTooLarge(APIException):
+	status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+	default_detail = loc('Import file is too large.')
+	default_code = 'import_too_large'
+
+
+class ImportInProgress(APIException):
+	status_code = status.HTTP_409_CONFLICT
+	default_detail = loc('This import is already running.')
+	default_code = 'import_in_progress'
+
+
+def detect_format(name: str = '', content_type: str = '') -> str | None:
+	content_type = content_type.split(';', 1)[0].strip().lower()
+	if content_type in IMPORT_CONTENT_TYPES:
+		return IMPORT_CONTENT_TYPES[content_type]
+
+	for extension, format in IMPORT_EXTENSIONS.items():
+		if name.lower().endswith(extension):
+			return format
+	return None
+
+
+def create_import(file, name: str, format: str, owner) -> TaskImport:
+	"""
+	Файл копируется в storage по частям: импорт читает его оттуда
+	и при продолжении, в том числе из другого процесса
+	"""
+	# owner - модель или пользователь из JWT
+	task_import = TaskImport(created_by_id = owner.pk, format = format)
+	task_import.source.save(name, File(file), save = False)
+	task_import.save()
+	return task_import
+
+
+# MARK: Reading
+def iter_rows(file, format: str):
+	"""
+	`(данные строки, ошибка разбора)` по одной строке файла без чтения его целиком
+	"""
+	if format == TaskImport.Format.CSV:
+		# utf-8-sig - CSV из Excel начинается с BOM
+		for row in csv.DictReader(codecs.iterdecode(file, 'utf-8-sig')):
+			# Пустая ячейка - поля нет: description станет null, как в выгрузке
+			yield { key: value for key, value in row.items() if key in IMPORT_FIELDS and value != '' }, None
+		return
+
+	loads = orjson.loads if orjson is not None else json.loads
+	for line in file:
+		if not line.strip():
+			continue
+		try:
+			data = loads(line)
+		except ValueError:
+			yield None, { api_settings.NON_FIELD_ERRORS_KEY: [loc('Invalid JSON.')] }
+			continue
+
+		if isinstance(data, dict):
+			yield { key: value for key, value in data.items() if key in IMPORT_FIELDS }, None
+		else:
+			yield None, { api_settings.NON_FIELD_ERRORS_KEY: [loc('Expected a JSON object.')] }
+
+
+def validate_rows(rows, first_row: int) -> tuple[list[dict], list[dict]]:
+	"""
+	Проверка правилами `TaskSerializer`, как у `POST /api/tasks/`.
+	Один сериализатор на пачку, как у ListSerializer, но ошибка
+	в одной строке не отбрасывает остальные
+	"""
+	serializer = TaskSerializer()
+	valid, errors = [], []
+
+	for number, (data, error) in enumerate(rows, first_row):
+		try:
+			if error is not None:
+				raise ValidationError(error)
+			valid.append(serializer.run_validation(data))
+		except ValidationError as exc:
+			errors.append({ 'row': number, 'errors': exc.detail })
+
+	return valid, errors
+
+
+# MARK: Writing
+def write_tasks(tasks: list[Task]) -> list:
+	"""
+	Возвращает id созданных задач. `COPY` их не возвращает - тогда список пустой
+	"""
+	if _get_options().get('METHOD', 'copy') == 'copy' and connection.vendor == 'postgresql':
+		_copy_tasks(tasks)
+		return []
+	return [task.pk for task in Task.objects.bulk_create(tasks)]
+
+
+def _copy_tasks(tasks: list[Task]) -> None:
+	"""
+	`COPY ... FROM STDIN` в текстовом формате. Значения готовятся теми же
+	`pre_save`/`get_db_prep_save`, что и у bulk_create (auto_now_add и т.п.),
+	search_vector считает сама БД
+	"""
+	if not tasks:
+		return
+
+	fields = [field for field in Task._meta.concrete_fields if not field.primary_key and not field.generated]
+	lines = []
+	for task in tasks:
+		values = (field.get_db_prep_save(field.pre_save(task, True), connection) for field in fields)
+		lines.append('\t'.join(map(_to_copy_text, values)))
+
+	quote = connection.ops.quote_name
+	sql = 'COPY {} ({}) FROM STDIN'.format(
+		quote(Task._meta.db_table),
+		', '.join(quote(field.column) for field in fields),
+	)
+	data = '\n'.join(lines) + '\n'
+
+	with connection.cursor() as cursor:
+		if hasattr(cursor.cursor, 'copy_expert'):
+			# psycopg2
+			cursor.copy_expert(sql, io.StringIO(data))
+		else:
+			# psycopg 3
+			with cursor.copy(sql) as copy:
+				copy.write(data)
+
+
+def _to_copy_text(value) -> str:
+	if value is None:
+		return r'\N'
+	if isinstance(value, bool):
+		return 't' if value else 'f'
+	return (
+		str(value)
+		.replace('\\', '\\\\')
+		.replace('\t', '\\t')
+		.replace('\n', '\\n')
+		.replace('\r', '\\r')
+	)
+
+
+# MARK: Running
+def run_import(task_import: TaskImport, batch_size: int | None = None, force: bool = False) -> TaskImport:
+	"""
+	Импортирует строки после `rows_processed` пачками по `batch_size`.<br>
+	Зависший импорт (`RUNNING` без прогресса дольше `STALE_AFTER`) можно
+	продолжить, `force` - не дожидаясь этого срока. Даже если два процесса
+	возьмут один импорт, пачку запишет только один из них (см. `_import_batch`)
+	"""
+	batch_size = batch_size or _get_options().get('BATCH_SIZE', 1_000)
+
+	if task_import.status == TaskImport.Status.DONE:
+		return task_import
+	if not _claim(task_import, force):
+		raise ImportInProgress()
+	task_import.refresh_from_db()
+
+	try:
+		with task_import.source.open('rb') as file:
+			rows = islice(iter_rows(file, task_import.format), task_import.rows_processed, None)
+			for batch in batched(rows, batch_size):
+				_import_batch(task_import, batch)
+
+	except ImportInProgress:
+		raise
+	except (UnicodeDecodeError, csv.Error) as exc:
+		# Дальше файл не прочитать - импорт останавливается с ошибкой в отчёте
+		_add_errors(task_import, [{
+			'row': task_import.rows_processed + 1,
+			'errors': { api_settings.NON_FIELD_ERRORS_KEY: [str(exc)] },
+		}])
+		_set_status(task_import, TaskImport.Status.FAILED, ('errors', 'error_count'))
+		return task_import
+	except BaseException:
+		# Включая KeyboardInterrupt: импорт можно сразу продолжить, не дожидаясь STALE_AFTER
+		_set_status(task_import, TaskImport.Status.FAILED)
+		raise
+
+	_set_status(task_import, TaskImport.Status.DONE)
+	return task_import
+
+
+def queue_import(task_import: TaskImport, force: bool = False) -> TaskImport:
+	"""
+	Ставит прерванный импорт обратно в очередь (`PENDING`): его продолжит
+	`import_tasks --pending` с контрольной точки. Ограничения - как у `run_import()`
+	"""
+	if task_import.status == TaskImport.Status.DONE:
+		return task_import
+	if not TaskImport.objects.filter(_claimable(force), pk = task_import.pk).update(
+		status = TaskImport.Status.PENDING, updated_at = timezone.now()
+	):
+		raise ImportInProgress()
+	task_import.refresh_from_db()
+	return task_import
+
+
+def run_pending_imports(batch_size: int | None = None) -> list[TaskImport]:
+	"""
+	Выполняет импорты из очереди и зависшие (см. `run_import()`) по порядку создания.
+	Импорты, которые уже взял другой процесс, пропускаются
+	"""
+	done = []
+	for task_import in TaskImport.objects.filter(_claimable(False) & ~Q(status = TaskImport.Status.FAILED)).order_by('pk'):
+		try:
+			done.append(run_import(task_import, batch_size))
+		except ImportInProgress:
+			continue
+	return done
+
+
+def _claimable(force: bool) -> Q:
+	claimable = Q(status__in = (TaskImport.Status.PENDING, TaskImport.Status.FAILED))
+	if force:
+		claimable |= Q(status = TaskImport.Status.RUNNING)
+	else:
+		stale = timezone.now() - timedelta(seconds = _get_options().get('STALE_AFTER', 10 * 60))
+		claimable |= Q(status = TaskImport.Status.RUNNING, updated_at__lt = stale)
+	return claimable
+
+def _claim(task_import: TaskImport, force: bool) -> bool:
+	return bool(
+		TaskImport.objects
+		.filter(_claimable(force), pk = task_import.pk)
+		.update(status = TaskImport.Status.RUNNING, updated_at = timezone.now())
+	)
+
+
+def _import_batch(task_import: TaskImport, batch: tuple) -> None:
+	valid, errors = validate_rows(batch, task_import.rows_processed + 1)
+	tasks = [Task(created_by_id = task_import.created_by_id, **attrs) for attrs in valid]
+
+	with transaction.atomic():
+		# Контрольная точка сдвигается вместе с записью пачки. Если её уже
+		# сдвинул другой процесс, условие не совпадёт и пачка откатится
+		moved = TaskImport.objects.filter(
+			pk = task_import.pk,
+			status = TaskImport.Status.RUNNING,
+			rows_processed = task_import.rows_processed,
+		).update(
+			rows_processed = F('rows_processed') + len(batch),
+			created_count = F('created_count') + len(tasks),
+			error_count = F('error_count') + len(errors),
+			errors = task_import.errors + _get_reported(task_import, errors),
+			updated_at = timezone.now(),
+		)
+		if not moved:
+			raise ImportInProgress()
+
+		# bulk_create/COPY не отправляют post_save
+		invalidate_tasks(write_tasks(tasks))
+
+	task_import.rows_processed += len(batch)
+	task_import.created_count += len(tasks)
+	_add_errors(task_import, errors)
+
+
+def _get_reported(task_import: TaskImport, errors: list[dict]) -> list[dict]:
+	# В отчёте хранятся только первые MAX_ERRORS ошибок, счётчик - по всем
+	return errors[:max(0, _get_options().get('MAX_ERRORS', 1_000) - len(task_import.errors))]
+
+def _add_errors(task_import: TaskImport, errors: list[dict]) -> None:
+	task_import.errors = task_import.errors + _get_reported(task_import, errors)
+	task_import.error_count += len(errors)
+
+
+def _set_status(task_import: TaskImport, status: str, fields: tuple[str, ...] = ()) -> None:
+	task_import.status = status
+	task_import.save(update_fields = ['status', 'updated_at', *fields])
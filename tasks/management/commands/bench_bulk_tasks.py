@@ -0,0 +1,58 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth         import get_user_model
+from django.urls                 import reverse
+from django.db                   import transaction
+from rest_framework.test         import APIClient
+
+from users.models import User as _User # для аннотации
+from users.tokens import ClaimsRefreshToken
+from users        import local_settings
+from tasks.models import Task
+
+User: type[_User] = get_user_model()
+
+
+class Command(BaseCommand):
+	help = (
+		'Compares tasks/sec of one POST/PATCH per task against the /api/tasks/bulk/ endpoint.'
+		' Runs in-process inside a rolled back transaction.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--tasks', type = int, default = 1_000, help = 'Tasks per measurement')
+
+	def handle(self, *args, **options):
+		count = options['tasks']
+
+		with transaction.atomic():
+			user = User.objects.create_user(username = 'bench_bulk_user', password = None)
+
+			# REMOTE_ADDR не из INTERNAL_IPS - иначе в замер попадёт debug toolbar
+			client = APIClient(SERVER_NAME = 'localhost', REMOTE_ADDR = '10.0.0.1')
+			client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME] = str(ClaimsRefreshToken.for_user(user).access_token)
+
+			list_url, bulk_url = reverse('task-list'), reverse('task-bulk')
+			items = [{ 'title': f'Bench task {i}' } for i in range(count)]
+
+			self.report('create, per item', count, lambda: [
+				client.post(list_url, item, format = 'json') for item in items
+			])
+			self.report('create, bulk', count, lambda: client.post(bulk_url, items, format = 'json'))
+
+			ids = list(Task.objects.filter(created_by = user).values_list('pk', flat = True)[:count])
+			self.report('update, per item', count, lambda: [
+				client.patch(reverse('task-detail', args = [pk]), { 'is_completed': True }, format = 'json') for pk in ids
+			])
+			self.report('update, bulk', count, lambda: client.patch(
+				bulk_url, [{ 'id': pk, 'is_completed': False } for pk in ids], format = 'json'
+			))
+
+			transaction.set_rollback(True)
+
+	def report(self, title: str, count: int, run) -> None:
+		started = perf_counter()
+		run()
+		elapsed = perf_counter() - started
+		self.stdout.write(f'{title:<20} {count / elapsed:>10.1f} tasks/s  ({elapsed:.2f} s)')
@@ -0,0 +1,73 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth         import get_user_model
+from django.urls                 import reverse
+from django.db                   import transaction
+from rest_framework.test         import APIClient
+
+from TaskManager.middleware import get_available_encodings
+from users.models           import User as _User # для аннотации
+from users.tokens           import ClaimsRefreshToken
+from users                  import local_settings
+from tasks.models           import Task
+
+User: type[_User] = get_user_model()
+
+
+class Command(BaseCommand):
+	help = (
+		'Measures GET /api/tasks/ latency and response size for every available Content-Encoding.'
+		' Runs in-process inside a rolled back transaction.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--tasks',     type = int,   default = 2_000, help = 'Seeded tasks')
+		parser.add_argument('--page-size', type = int,   default = 500,   help = 'page_size of the measured request')
+		parser.add_argument('--repeat',    type = int,   default = 20,    help = 'Requests per encoding (best is reported)')
+		parser.add_argument('--bandwidth', type = float, default = 10,
+			help = 'Link speed in Mbit/s used to estimate transfer time (computed, not measured)')
+
+	def handle(self, *args, **options):
+		with transaction.atomic():
+			owners = [User.objects.create_user(username = f'bench_compression_{i}', email = f'user{i}@mail.com') for i in range(20)]
+			Task.objects.bulk_create([
+				Task(
+					title = f'Задача №{i}',
+					description = 'Описание задачи, достаточно длинное для реалистичного ответа. ' * 4,
+					is_completed = i % 3 == 0,
+					created_by = owners[i % len(owners)],
+				)
+				for i in range(options['tasks'])
+			])
+
+			# REMOTE_ADDR не из INTERNAL_IPS - иначе в замер попадёт debug toolbar
+			client = APIClient(SERVER_NAME = 'localhost', REMOTE_ADDR = '10.0.0.1')
+			client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME] = str(ClaimsRefreshToken.for_user(owners[0]).access_token)
+			url = f'{reverse("task-list")}?page_size={options["page_size"]}'
+
+			bytes_per_second = options['bandwidth'] * 1_000_000 / 8
+			self.stdout.write(f'{"encoding":<10} {"bytes":>10} {"ratio":>7} {"server ms":>10} {"transfer ms":>12} {"total ms":>9}')
+
+			for encoding in ('identity', *get_available_encodings()):
+				size, elapsed = self.measure(client, url, encoding, options['repeat'])
+				transfer = size / bytes_per_second
+				self.stdout.write(
+					f'{encoding:<10} {size:>10} {self.plain_size / size:>7.1f} {elapsed * 1000:>10.2f}'
+					f' {transfer * 1000:>12.2f} {(elapsed + transfer) * 1000:>9.2f}'
+				)
+
+			transaction.set_rollback(True)
+
+	def measure(self, client: APIClient, url: str, encoding: str, repeat: int) -> tuple[int, float]:
+		best = float('inf')
+		for _ in range(repeat):
+			started = perf_counter()
+			response = client.get(url, HTTP_ACCEPT = 'application/json', HTTP_ACCEPT_ENCODING = encoding)
+			best = min(best, perf_counter() - started)
+
+		if response.get('Content-Encoding', 'identity') != encoding:
+			raise CommandError(f'Response was not encoded with {encoding}')
+		if encoding == 'identity':
+			self.plain_size = len(response.content)
+		return len(response.content), best
@@ -0,0 +1,219 @@
+from importlib.util import find_spec
+from itertools      import count
+from tempfile       import TemporaryFile
+from statistics     import quantiles
+from time           import perf_counter, sleep
+import subprocess
+import asyncio
+import socket
+import sys
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth         import get_user_model
+from django.urls                 import reverse
+
+from users.models import User as _User # для аннотации
+from users.tokens import ClaimsRefreshToken
+from users        import local_settings
+from tasks.models import Task
+
+try:
+	import httpx
+except ImportError:
+	httpx = None
+
+User: type[_User] = get_user_model()
+
+# Сервер: (приложение, аргументы gunicorn, ASYNC_API_VIEWS).
+# ASGI тоже под gunicorn: `uvicorn --workers` пересоздаёт сокет в воркерах из
+# дескриптора, asyncio не включает на нём TCP_NODELAY, и keep-alive ответы
+# ждут delayed ACK (~40 мс на запрос)
+SERVERS = {
+	'wsgi':      ('TaskManager.wsgi:application', ['--worker-class', 'gthread'], 'false'),
+	'asgi':      ('TaskManager.asgi:application', ['--worker-class', 'uvicorn.workers.UvicornWorker'], 'true'),
+	'asgi-sync': ('TaskManager.asgi:application', ['--worker-class', 'uvicorn.workers.UvicornWorker'], 'false'),
+}
+
+# Соединения с БД (см. settings.DATABASES): переменные окружения сервера
+DB_MODES = {
+	'per_request': { 'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '0' },
+	'persistent':  { 'DB_POOL': 'false', 'DB_CONN_MAX_AGE': '60' },
+	'pool':        { 'DB_POOL': 'true' },
+}
+
+# Замеряемый запрос: tasks - GET списка задач, register - POST регистрации
+# с новым username на каждый запрос (хеширование и валидация пароля)
+ENDPOINTS = ('tasks', 'register')
+SIGNUP_PREFIX = 'bench_signup_'
+
+
+class Command(BaseCommand):
+	help = (
+		'Load-tests GET /api/tasks/ under gunicorn with gthread (WSGI) and uvicorn (ASGI, with and without async views)'
+		' at increasing concurrency and reports throughput, latency and DB connections opened per request.'
+		' --db repeats every server with per-request, persistent and pooled (psycopg 3) connections.'
+		' --endpoint register measures concurrent signups (POST /api/register/) instead.'
+		' Needs gunicorn, uvicorn and httpx. The seeded users and tasks are committed for the servers'
+		' to see and deleted afterwards.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--servers', nargs = '+', choices = SERVERS, default = list(SERVERS))
+		parser.add_argument('--endpoint', choices = ENDPOINTS, default = 'tasks')
+		parser.add_argument('--db', nargs = '+', choices = DB_MODES, default = [None],
+			help = 'DB connection modes, by default as configured by the environment')
+		parser.add_argument('--concurrency', nargs = '+', type = int, default = [1, 16, 64, 256],
+			help = 'Simultaneous client connections')
+		parser.add_argument('--duration',  type = float, default = 5,   help = 'Seconds per concurrency level')
+		parser.add_argument('--workers',   type = int,   default = 2,   help = 'Server processes')
+		parser.add_argument('--threads',   type = int,   default = 16,  help = 'Threads per gunicorn worker')
+		parser.add_argument('--tasks',     type = int,   default = 500, help = 'Seeded tasks')
+		parser.add_argument('--page-size', type = int,   default = 20,  help = 'page_size of the measured request')
+
+	def handle(self, *args, **options):
+		missing = [name for name in ('gunicorn', 'uvicorn', 'httpx') if find_spec(name) is None]
+		if missing:
+			raise CommandError(f'Install {", ".join(missing)} to run the load test.')
+
+		user = User.objects.create_user(username = 'bench_concurrency')
+		# Отдельно, чтобы staff не видел в замеряемом списке все задачи
+		staff = User.objects.create_user(username = 'bench_concurrency_staff', is_staff = True)
+		try:
+			Task.objects.bulk_create([
+				Task(title = f'Задача №{i}', description = 'Описание задачи. ' * 4, created_by = user)
+				for i in range(options['tasks'])
+			])
+			cookie = f'{local_settings.ACCESS_TOKEN_COOKIE_NAME}={ClaimsRefreshToken.for_user(user).access_token}'
+			staff_cookie = f'{local_settings.ACCESS_TOKEN_COOKIE_NAME}={ClaimsRefreshToken.for_user(staff).access_token}'
+			path = f'{reverse("task-list")}?page_size={options["page_size"]}'
+			body = None
+
+			if options['endpoint'] == 'register':
+				# Регистрация только для анонимов. Заголовок Cookie задан явно,
+				# и куки из ответов клиент не подставляет
+				cookie, path = 'bench=1', reverse('register')
+				usernames = (f'{SIGNUP_PREFIX}{i}' for i in count())
+				body = lambda: { 'username': next(usernames), 'password': 'Bench-signup-password-1987' }
+
+			self.stdout.write(
+				f'{"server":<10} {"db":<11} {"clients":>7} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7} {"conn/req":>8}'
+			)
+			for name in options['servers']:
+				for db in options['db']:
+					with self.server(name, db, options) as base_url:
+						for concurrency in options['concurrency']:
+							result = asyncio.run(load(base_url + path, cookie, concurrency, options['duration'], body))
+							stats = self.db_stats(base_url, staff_cookie, options['workers'])
+							self.stdout.write(
+								f'{name:<10} {db or stats["mode"]:<11} {concurrency:>7} {result["rps"]:>8.0f}'
+								f' {result["p50"] * 1000:>8.1f} {result["p99"] * 1000:>8.1f} {result["errors"]:>7}'
+								f' {stats["connections_per_request"] or 0:>8.3f}'
+							)
+		finally:
+			user.delete()
+			staff.delete()
+			User.objects.filter(username__startswith = SIGNUP_PREFIX).delete()
+
+
+	def db_stats(self, base_url: str, cookie: str, workers: int) -> dict:
+		# Счётчики - у каждого воркера свои, запрос попадает в случайный:
+		# берётся воркер, обработавший больше всего запросов
+		responses = [
+			httpx.get(base_url + reverse('db-stats'), headers = { 'Cookie': cookie }).json()[0]
+			for _ in range(workers * 4)
+		]
+		return max(responses, key = lambda stats: stats['requests'])
+
+	def server(self, name: str, db: str | None, options: dict) -> '_Server':
+		application, arguments, async_views = SERVERS[name]
+		port = free_port()
+
+		command = [
+			sys.executable, '-m', 'gunicorn', application, *arguments, '--bind', f'127.0.0.1:{port}',
+			# --threads у UvicornWorker не используется
+			'--workers', str(options['workers']), '--threads', str(options['threads']), '--log-level', 'warning',
+		]
+		env = { **os.environ, 'ASYNC_API_VIEWS': async_views, **DB_MODES.get(db, {}) }
+		# Пул не меньше числа потоков воркера, иначе потоки ждут соединение
+		env.setdefault('DB_POOL_MAX_SIZE', str(options['threads']))
+		return _Server(command, env, f'http://127.0.0.1:{port}')
+
+
+class _Server:
+	"""Сервер в дочернем процессе на время `with`"""
+	def __init__(self, command: list[str], env: dict, base_url: str):
+		self.command, self.env, self.base_url = command, env, base_url
+
+	def __enter__(self) -> str:
+		self.log = TemporaryFile()
+		self.process = subprocess.Popen(self.command, env = self.env, stdout = self.log, stderr = subprocess.STDOUT)
+
+		started = perf_counter()
+		while perf_counter() - started < 30:
+			if self.process.poll() is not None:
+				break
+			try:
+				httpx.get(self.base_url + '/admin/login/', timeout = 1)
+				return self.base_url
+			except httpx.TransportError:
+				sleep(0.2)
+
+		self.__exit__()
+		self.log.seek(0)
+		raise CommandError(f'{self.command[3]} did not start:\n{self.log.read().decode(errors = "replace")}')
+
+	def __exit__(self, *exc_info):
+		self.process.terminate()
+		try:
+			self.process.wait(10)
+		except subprocess.TimeoutExpired:
+			self.process.kill()
+		self.log.close()
+
+
+async def load(url: str, cookie: str, concurrency: int, duration: float, body = None) -> dict:
+	"""GET `url`, а если задан `body` - POST JSON, который он возвращает"""
+	# Запросы идут с 127.0.0.2: 127.0.0.1 в INTERNAL_IPS, и в замер попал бы debug toolbar
+	transport = httpx.AsyncHTTPTransport(
+		local_address = '127.0.0.2',
+		limits = httpx.Limits(max_connections = concurrency, max_keepalive_connections = concurrency),
+	)
+	latencies, errors = [], 0
+
+	async with httpx.AsyncClient(transport = transport, headers = { 'Cookie': cookie }, timeout = 60) as client:
+		async def worker(deadline: float):
+			nonlocal errors
+			while perf_counter() < deadline:
+				started = perf_counter()
+				try:
+					response = await (client.post(url, json = body()) if body else client.get(url))
+				except httpx.HTTPError:
+					errors += 1
+					continue
+				if not response.is_success:
+					errors += 1
+				latencies.append(perf_counter() - started)
+
+		# Прогрев: соединения, импорты и кеши воркеров
+		await asyncio.gather(*(worker(perf_counter() + 0.5) for _ in range(concurrency)))
+		latencies.clear()
+		errors = 0
+
+		started = perf_counter()
+		await asyncio.gather(*(worker(started + duration) for _ in range(concurrency)))
+		elapsed = perf_counter() - started
+
+	percentiles = quantiles(latencies, n = 100) if len(latencies) > 1 else latencies * 99
+	return {
+		'rps':    len(latencies) / elapsed,
+		'p50':    percentiles[49] if percentiles else 0,
+		'p99':    percentiles[98] if percentiles else 0,
+		'errors': errors,
+	}
+
+
+def free_port() -> int:
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from time     import perf_counter
+from io       import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth         import get_user_model
+from django.utils                import timezone
+from rest_framework.renderers    import JSONRenderer
+from rest_framework.parsers      import JSONParser
+
+from TaskManager.renderers import FastJSONRenderer, FastJSONParser, orjson
+from tasks.serializers     import TaskSerializer
+from users.models          import User as _User # для аннотации
+from tasks.models          import Task
+
+User: type[_User] = get_user_model()
+
+
+class Command(BaseCommand):
+	help = (
+		'Measures JSON rendering and parsing time of a serialized task list'
+		' with the stdlib-based DRF classes and with TaskManager.renderers. No database access.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--tasks',  type = int, default = 10_000, help = 'Tasks in the rendered list')
+		parser.add_argument('--repeat', type = int, default = 20,     help = 'Runs per measurement (best is reported)')
+
+	def handle(self, *args, **options):
+		if orjson is None:
+			self.stdout.write(self.style.WARNING('orjson is not installed: FastJSONRenderer falls back to the stdlib'))
+
+		data = TaskSerializer(self.build_tasks(options['tasks']), many = True).data
+
+		baseline = JSONRenderer().render(data)
+		fast = FastJSONRenderer().render(data)
+		if fast != baseline:
+			raise CommandError('FastJSONRenderer output differs from JSONRenderer')
+
+		self.stdout.write(f'{options["tasks"]} tasks, {len(baseline) / 1024:.0f} KiB of JSON')
+		per_10k = 10_000 / options['tasks']
+
+		for title, run in {
+			'render, JSONRenderer':     lambda: JSONRenderer().render(data),
+			'render, FastJSONRenderer': lambda: FastJSONRenderer().render(data),
+			'parse,  JSONParser':       lambda: JSONParser().parse(BytesIO(baseline)),
+			'parse,  FastJSONParser':   lambda: FastJSONParser().parse(BytesIO(baseline)),
+		}.items():
+			elapsed = self.measure(run, options['repeat'])
+			self.stdout.write(f'{title:<26} {elapsed * per_10k * 1000:>8.2f} ms per 10k tasks')
+
+	def build_tasks(self, count: int) -> list[Task]:
+		# Объекты в памяти: замеряется только JSON, а не БД и не сериализатор
+		owners = [
+			User(id = i, username = f'Пользователь {i}', email = f'user{i}@mail.com')
+			for i in range(1, 101)
+		]
+		now = timezone.now()
+
+		return [
+			Task(
+				id = i,
+				title = f'Задача №{i}',
+				description = 'Описание задачи, достаточно длинное для реалистичного ответа. ' * 4,
+				is_completed = i % 3 == 0,
+				created_by = owners[i % len(owners)],
+				created_at = now - timedelta(minutes = i),
+			)
+			for i in range(1, count + 1)
+		]
+
+	def measure(self, run, repeat: int) -> float:
+		best = float('inf')
+		for _ in range(repeat):
+			started = perf_counter()
+			run()
+			best = min(best, perf_counter() - started)
+		return best
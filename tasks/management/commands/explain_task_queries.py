@@ -0,0 +1,134 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth         import get_user_model
+from django.test.client          import RequestFactory
+from django.db                   import connection, transaction
+from django.db.models            import QuerySet
+from rest_framework.request      import Request
+
+from tasks.serializers  import TaskSerializer
+from tasks.optimization import optimize_queryset
+from tasks.pagination   import Cursor, KeysetCursorPagination
+from tasks.models       import Task
+from users.models       import User as _User # для аннотации
+
+User: type[_User] = get_user_model()
+
+_ROWS_REMOVED_RE = re.compile(r'Rows Removed by Filter: (\d+)')
+
+
+class Command(BaseCommand):
+	help = (
+		'Seeds a throwaway dataset, runs EXPLAIN ANALYZE on the canonical TaskViewSet queries'
+		' and fails if any of them uses a sequential scan or discards far more rows by filter than it returns'
+		' (an index scan that is not bounded by the condition). All changes are rolled back.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--tasks', type = int, default = 200_000, help = 'Number of seeded tasks')
+		parser.add_argument('--users', type = int, default = 1_000,   help = 'Number of seeded users')
+		parser.add_argument('--incomplete-ratio', type = float, default = 0.1,
+			help = 'Share of seeded tasks with is_completed = false')
+		parser.add_argument('--show-plans', action = 'store_true', help = 'Print every query plan')
+		parser.add_argument('--max-removed-ratio', type = float, default = 10,
+			help = 'Max rows removed by filter per row the query may return')
+
+	def handle(self, *args, **options):
+		if connection.vendor != 'postgresql':
+			raise CommandError('EXPLAIN ANALYZE checks are only supported on PostgreSQL.')
+
+		failed = []
+
+		with transaction.atomic():
+			self.seed(options['users'], options['tasks'], options['incomplete_ratio'])
+
+			for title, (queryset, limit) in self.get_canonical_queries().items():
+				plan = queryset.explain(analyze = True)
+				removed = sum(int(rows) for rows in _ROWS_REMOVED_RE.findall(plan))
+
+				if options['show_plans']:
+					self.stdout.write(self.style.MIGRATE_HEADING(title))
+					self.stdout.write(plan + '\n')
+
+				if 'Seq Scan' in plan:
+					failed.append((title, plan))
+					self.stdout.write(self.style.ERROR(f'SEQ SCAN  {title}'))
+				elif removed > limit * options['max_removed_ratio']:
+					# Индекс читается не от условия, а с начала: стоимость растёт с глубиной
+					failed.append((title, plan))
+					self.stdout.write(self.style.ERROR(f'FILTERED  {title} ({removed} rows removed)'))
+				else:
+					self.stdout.write(self.style.SUCCESS(f'OK        {title}'))
+
+			transaction.set_rollback(True)
+
+		if failed:
+			details = '\n\n'.join(f'{title}:\n{plan}' for title, plan in failed)
+			raise CommandError(f'Unbounded scans found in {len(failed)} queries:\n\n{details}')
+
+
+	def seed(self, users_count: int, tasks_count: int, incomplete_ratio: float) -> None:
+		"""
+		Данные генерируются на стороне БД через generate_series:
+		так сотни тысяч строк вставляются за секунды, а не за минуты bulk_create
+		"""
+		user_table, task_table = User._meta.db_table, Task._meta.db_table
+
+		with connection.cursor() as cursor:
+			cursor.execute(f'''
+				INSERT INTO {user_table} (
+					password, is_superuser, username, first_name, last_name,
+					email, is_staff, is_active, date_joined, role, token_version
+				)
+				SELECT '!', false, 'explain_user_' || n, '', '',
+					'', false, true, now(), %s, 0
+				FROM generate_series(1, %s) AS n
+			''', [User.Role.REGULAR_USER, users_count])
+
+			cursor.execute(f'''
+				INSERT INTO {task_table} (
+					created_by_id, title, description, is_completed, created_at,
+					attachment, attachment_sha256, attachment_filename
+				)
+				SELECT
+					(SELECT min(id) FROM {user_table} WHERE username LIKE 'explain_user_%%') + (n %% %s),
+					'Explain task ' || n,
+					NULL,
+					random() >= %s,
+					now() - (n || ' seconds')::interval,
+					'', '', ''
+				FROM generate_series(1, %s) AS n
+			''', [users_count, incomplete_ratio, tasks_count])
+
+			cursor.execute(f'ANALYZE {user_table}, {task_table}')
+
+	def get_canonical_queries(self) -> dict[str, tuple[QuerySet, int]]:
+		"""
+		Те же запросы, что строит TaskViewSet: оптимизированный queryset и
+		страница KeysetCursorPagination (с настоящим курсором для глубоких
+		страниц).<br>
+		Значения - (queryset, сколько строк он может вернуть)
+		"""
+		ordering = KeysetCursorPagination.ordering
+		limit = KeysetCursorPagination.page_size + 1
+
+		base = optimize_queryset(Task.objects.all(), TaskSerializer(), extra_fields = ordering)
+		middle = Task.objects.order_by(*ordering)[Task.objects.count() // 2]
+		owner = Task.objects.order_by('?').values_list('created_by_id', flat = True).first()
+		position = [getattr(middle, field).isoformat() if field == 'created_at' else getattr(middle, field) for field in ordering]
+
+		return {
+			'list: first page':    (self.paginate(base), limit),
+			'list: deep page':     (self.paginate(base, Cursor(list(ordering), position, reverse = False)), limit),
+			'list: previous page': (self.paginate(base, Cursor(list(ordering), position, reverse = True)), limit),
+			'list: owner tasks':   (self.paginate(base.filter(created_by_id = owner)), limit),
+			'list: incomplete':    (self.paginate(base.filter(is_completed = False)), limit),
+			'retrieve':            (base.filter(pk = middle.pk), 1),
+		}
+
+	def paginate(self, queryset: QuerySet, cursor: Cursor | None = None) -> QuerySet:
+		paginator = KeysetCursorPagination()
+		params = { paginator.cursor_query_param: paginator.encode_cursor(cursor) } if cursor else {}
+		request = Request(RequestFactory().get('/', params))
+		return paginator._get_page_queryset(queryset, request, view = None)
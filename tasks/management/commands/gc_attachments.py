@@ -0,0 +1,121 @@
+import time
+import os
+
+from django.core.management.base import BaseCommand
+
+from TaskManager.utils import batched
+from tasks.storage     import get_attachment_storage, get_blob_sha256
+from tasks.uploads     import ATTACHMENTS_DIR, PARTIAL_UPLOADS_DIR
+from tasks.models      import Task
+
+
+class Command(BaseCommand):
+	help = (
+		'Deletes attachment blobs (and files with legacy, non content-addressed names)'
+		' that are no longer referenced by any task and stale partial uploads. Meant to be run periodically (cron, systemd timer).'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--grace', type = int, default = 60 * 60,
+			help = 'Seconds since the last write/dedup hit before an unreferenced blob may be deleted')
+		parser.add_argument('--partial-max-age', type = int, default = 24 * 60 * 60,
+			help = 'Seconds after which an unfinished upload is discarded')
+		parser.add_argument('--batch-size', type = int, default = 500, help = 'Blobs checked per database query')
+		parser.add_argument('--dry-run', action = 'store_true', help = 'Only report what would be deleted')
+
+	def handle(self, *args, **options):
+		self.storage = get_attachment_storage()
+		self.dry_run = options['dry_run']
+		now = time.time()
+
+		scanned = deleted = freed = 0
+		for batch in batched(self.iter_blobs(), options['batch_size']):
+			scanned += len(batch)
+			names = [name for name, _ in batch]
+			# Ссылки считаются по таблице задач: одна выборка по индексу на пачку
+			referenced = set(Task.objects.filter(attachment__in = names).values_list('attachment', flat = True))
+
+			for name, path in batch:
+				if name in referenced:
+					continue
+				size = self.delete_if_older(path, now - options['grace'])
+				if size is not None:
+					deleted += 1
+					freed += size
+					if not self.dry_run and get_blob_sha256(name):
+						_remove_empty_dirs(os.path.dirname(path), levels = 2)
+
+		partials = 0
+		partial_dir = self.storage.path(PARTIAL_UPLOADS_DIR)
+		if os.path.isdir(partial_dir):
+			threshold = now - options['partial_max_age']
+			for entry in os.scandir(partial_dir):
+				if not entry.is_file():
+					continue
+				if entry.name.endswith('.json'):
+					# Параметры загрузки удаляются вместе с её файлом, отдельно - только осиротевшие
+					if not os.path.exists(entry.path.removesuffix('.json')):
+						self.delete_if_older(entry.path, threshold)
+					continue
+
+				if self.delete_if_older(entry.path, threshold) is not None:
+					partials += 1
+					if not self.dry_run:
+						self.delete_if_older(f'{entry.path}.json', now)
+
+		prefix = 'Would delete' if self.dry_run else 'Deleted'
+		self.stdout.write(self.style.SUCCESS(
+			f'Scanned {scanned} blobs. {prefix} {deleted} unreferenced blobs ({freed} bytes)'
+			f' and {partials} stale partial uploads.'
+		))
+
+
+	def iter_blobs(self):
+		"""
+		`(имя в storage, путь)` всех блобов вида `attachments/ab/cd/<sha256>.ext`
+		и файлов со старыми именами (до хранения по хешу) прямо в `attachments/`.
+		Старые файлы после замены или удаления вложения больше ничто не удаляет
+		"""
+		root = self.storage.path(ATTACHMENTS_DIR)
+		if not os.path.isdir(root):
+			return
+
+		for entry in os.scandir(root):
+			if entry.is_file():
+				yield f'{ATTACHMENTS_DIR}/{entry.name}', entry.path
+
+		for first in _scan_dirs(root):
+			for second in _scan_dirs(first.path):
+				for entry in os.scandir(second.path):
+					name = f'{ATTACHMENTS_DIR}/{first.name}/{second.name}/{entry.name}'
+					if entry.is_file() and get_blob_sha256(name):
+						yield name, entry.path
+
+	def delete_if_older(self, path: str, threshold: float) -> int | None:
+		"""
+		Удаляет файл, если он не менялся с `threshold`. Возвращает размер удалённого.<br>
+		mtime проверяется непосредственно перед удалением: дедупликация в
+		`ContentAddressedStorage.adopt` обновляет его при каждом повторном использовании
+		"""
+		try:
+			stat = os.stat(path)
+			if stat.st_mtime > threshold:
+				return None
+			if not self.dry_run:
+				os.unlink(path)
+		except FileNotFoundError:
+			return None
+		return stat.st_size
+
+
+def _scan_dirs(path: str):
+	return (entry for entry in os.scandir(path) if entry.is_dir() and not entry.name.startswith('.'))
+
+
+def _remove_empty_dirs(path: str, levels: int) -> None:
+	for _ in range(levels):
+		try:
+			os.rmdir(path)
+		except OSError:
+			return
+		path = os.path.dirname(path)
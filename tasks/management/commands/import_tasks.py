@@ -0,0 +1,102 @@
+import time
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth         import get_user_model
+
+from tasks.imports import ImportInProgress, create_import, detect_format, run_import, run_pending_imports
+from tasks.models  import TaskImport
+
+
+class Command(BaseCommand):
+	help = (
+		'Imports tasks from a CSV or NDJSON file in batches, reporting invalid rows.'
+		' An interrupted import is continued from its last committed batch with --resume.'
+		' Imports uploaded through the API are run with --pending (cron, systemd timer or --interval as a worker).'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('path', nargs = '?', help = 'CSV (.csv) or NDJSON (.ndjson, .jsonl) file')
+		parser.add_argument('--owner', help = 'Username of the user who will own the imported tasks')
+		parser.add_argument('--format', choices = TaskImport.Format.values, help = 'File format, by default from the extension')
+		parser.add_argument('--resume', type = int, metavar = 'ID', help = 'Continue an interrupted import')
+		parser.add_argument('--force', action = 'store_true',
+			help = 'With --resume: take over an import that still looks running')
+		parser.add_argument('--pending', action = 'store_true',
+			help = 'Run queued imports (uploaded through the API or resumed) and stale ones')
+		parser.add_argument('--interval', type = int, metavar = 'SECONDS',
+			help = 'With --pending: keep checking the queue every SECONDS')
+		parser.add_argument('--batch-size', type = int, default = None, help = 'Rows per transaction')
+
+	def handle(self, *args, **options):
+		if options['pending']:
+			return self.handle_pending(options['batch_size'], options['interval'])
+
+		if options['resume']:
+			task_import = TaskImport.objects.filter(pk = options['resume']).first()
+			if task_import is None:
+				raise CommandError(f'Import {options["resume"]} does not exist.')
+		else:
+			task_import = self.create(options)
+
+		try:
+			run_import(task_import, options['batch_size'], force = options['force'])
+		except ImportInProgress:
+			raise CommandError(
+				f'Import {task_import.pk} is running in another process.'
+				' Use --force if that process is gone.'
+			)
+		except KeyboardInterrupt:
+			raise CommandError(
+				f'Interrupted after {task_import.rows_processed} rows.'
+				f' Continue with: import_tasks --resume {task_import.pk}'
+			)
+
+		self.report(task_import)
+
+
+	def handle_pending(self, batch_size: int | None, interval: int | None):
+		while True:
+			try:
+				for task_import in run_pending_imports(batch_size):
+					self.report(task_import)
+			except Exception as exc:
+				# run_import() уже отметил импорт FAILED - его продолжат через resume
+				if interval is None:
+					raise
+				self.stderr.write(f'Import failed: {exc!r}')
+
+			if interval is None:
+				return
+			time.sleep(interval)
+
+	def create(self, options: dict) -> TaskImport:
+		path, username = options['path'], options['owner']
+		if not path or not username:
+			raise CommandError('Either a path and --owner or --resume is required.')
+
+		format = options['format'] or detect_format(name = path)
+		if format is None:
+			raise CommandError('Cannot detect the file format, use --format.')
+
+		owner = get_user_model().objects.filter(username = username).first()
+		if owner is None:
+			raise CommandError(f'User "{username}" does not exist.')
+
+		with open(path, 'rb') as file:
+			task_import = create_import(file, os.path.basename(path), format, owner)
+
+		self.stdout.write(f'Import {task_import.pk} created.')
+		return task_import
+
+	def report(self, task_import: TaskImport):
+		for error in task_import.errors[:20]:
+			self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+		if task_import.error_count > 20:
+			self.stderr.write(f'... see import {task_import.pk} for the first {len(task_import.errors)} errors.')
+
+		style = self.style.SUCCESS if task_import.status == TaskImport.Status.DONE else self.style.ERROR
+		self.stdout.write(style(
+			f'Import {task_import.pk} {task_import.status}: {task_import.rows_processed} rows processed,'
+			f' {task_import.created_count} tasks created, {task_import.error_count} invalid rows.'
+		))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='attachment_sha256',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
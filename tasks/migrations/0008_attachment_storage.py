@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:38
+
+import tasks.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_attachment_sha256'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='attachment_filename',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='task',
+            name='attachment',
+            field=models.FileField(blank=True, null=True, storage=tasks.storage.get_attachment_storage, upload_to='attachments/'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['attachment'], name='task_attachment_idx'),
+        ),
+    ]
@@ -1,11 +1,156 @@
-from django.conf import settings
-from django.db   import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search  import SearchVector, SearchVectorField
+from django.utils.translation        import gettext_lazy as loc
+from django.utils.text               import get_valid_filename
+from django.conf                     import settings
+from django.db                       import models
+
+from tasks.storage import get_attachment_storage, get_blob_sha256
+from users.models  import User
+
+
+# Конфигурация PostgreSQL для полнотекстового поиска по задачам
+TASK_SEARCH_CONFIG = 'russian'
+
+
+def can_edit_all_tasks(user) -> bool:
+	"""
+	Менеджеры проектов и персонал могут изменять и удалять любые задачи.<br>
+	Работает и с моделью, и с пользователем из claims JWT
+	"""
+	return bool(user.is_staff or getattr(user, 'role', None) == User.Role.PROJECT_MANAGER)
+
+
+class TaskQuerySet(models.QuerySet):
+	"""
+	Правила доступа к задачам в виде SQL-условий: сравнивается только
+	`created_by_id`, владелец задачи не загружается
+	"""
+	def visible_to(self, user) -> 'TaskQuerySet':
+		# Читать задачи может любой аутентифицированный пользователь
+		if user is None or not user.is_authenticated:
+			return self.none()
+		return self
+
+	def editable_by(self, user) -> 'TaskQuerySet':
+		if user is None or not user.is_authenticated:
+			return self.none()
+		if can_edit_all_tasks(user):
+			return self
+		return self.filter(created_by_id = user.pk)
+
+	def annotate_editable(self, user) -> 'TaskQuerySet':
+		"""
+		Добавляет `user_can_edit` - право изменять задачу, посчитанное БД.
+		В отличие от `editable_by` не скрывает чужие задачи, чтобы на них можно
+		было ответить 403, а не 404
+		"""
+		if user is None or not user.is_authenticated:
+			can_edit = models.Value(False)
+		elif can_edit_all_tasks(user):
+			can_edit = models.Value(True)
+		else:
+			can_edit = models.Q(created_by_id = user.pk)
+
+		return self.annotate(user_can_edit = models.ExpressionWrapper(can_edit, output_field = models.BooleanField()))
 
 
 class Task(models.Model):
-	created_by   = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete = models.CASCADE)
+	# Отдельный индекс по FK не нужен: его покрывает task_owner_created_idx
+	created_by   = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete = models.CASCADE, db_index = False)
 	title        = models.CharField(max_length = 255)
 	description  = models.TextField(max_length = 8_190, null = True, blank = True)
 	is_completed = models.BooleanField(default = False)
 	created_at   = models.DateTimeField(auto_now_add = True)
-	attachment   = models.FileField(null = True, blank = True, upload_to = 'attachments/')
+	# Хранится по хешу содержимого и может быть общим у нескольких задач (см. tasks.storage)
+	attachment   = models.FileField(null = True, blank = True, upload_to = 'attachments/', storage = get_attachment_storage)
+	# SHA-256 содержимого вложения, считается при загрузке (см. tasks.uploads)
+	attachment_sha256 = models.CharField(max_length = 64, blank = True, default = '', editable = False)
+	# Исходное имя файла: в storage он лежит под именем-хешем
+	attachment_filename = models.CharField(max_length = 255, blank = True, default = '', editable = False)
+
+	# Считается самой БД при каждой вставке/изменении title и description
+	search_vector = models.GeneratedField(
+		expression = SearchVector('title', 'description', config = TASK_SEARCH_CONFIG),
+		output_field = SearchVectorField(),
+		db_persist = True,
+	)
+
+	objects = TaskQuerySet.as_manager()
+
+	class Meta:
+		indexes = [
+			# Порядок списка и keyset пагинации
+			models.Index(fields = ('created_at', 'id'), name = 'task_created_idx'),
+			# Задачи пользователя X по created_at
+			models.Index(fields = ('created_by', 'created_at', 'id'), name = 'task_owner_created_idx'),
+			# Незавершённые задачи по created_at
+			models.Index(
+				fields = ('created_at', 'id'),
+				condition = models.Q(is_completed = False),
+				name = 'task_incomplete_created_idx'
+			),
+			GinIndex(fields = ('search_vector',), name = 'task_search_vector_idx'),
+			# Поиск ссылок на блоб при сборке мусора (gc_attachments)
+			models.Index(fields = ('attachment',), name = 'task_attachment_idx'),
+		]
+
+
+	def save(self, *args, **kwargs):
+		update_fields = kwargs.get('update_fields')
+
+		if update_fields is None or 'attachment' in update_fields:
+			self.prepare_attachment()
+			if update_fields is not None:
+				kwargs['update_fields'] = { *update_fields, *self.ATTACHMENT_FIELDS }
+
+		super().save(*args, **kwargs)
+
+	# Колонки, которые меняются вместе с attachment
+	ATTACHMENT_FIELDS = ('attachment_sha256', 'attachment_filename')
+
+	def prepare_attachment(self) -> None:
+		"""
+		Сохраняет новый файл вложения и обновляет `ATTACHMENT_FIELDS`.
+		Вызывается из `save()`, а перед `bulk_create`/`bulk_update` - вручную
+		"""
+		# Новый файл из multipart запроса: исходное имя запоминается до того,
+		# как storage сохранит его под именем-хешем
+		if self.attachment and not self.attachment._committed:
+			self.attachment_filename = get_valid_filename(self.attachment.name.rsplit('/', 1)[-1])
+			self.attachment.save(self.attachment.name, self.attachment.file, save = False)
+			self.attachment_sha256 = get_blob_sha256(self.attachment.name) or ''
+		elif not self.attachment:
+			self.attachment_sha256 = self.attachment_filename = ''
+
+
+class TaskImport(models.Model):
+	"""
+	Импорт задач из CSV/NDJSON (см. tasks.imports).<br>
+	`rows_processed` - контрольная точка: она сохраняется в той же транзакции,
+	что и задачи очередной пачки, поэтому прерванный импорт продолжается
+	ровно с первой незаписанной строки, без дублей и пропусков
+	"""
+	class Format(models.TextChoices):
+		CSV    = ('csv',    'CSV')
+		NDJSON = ('ndjson', 'NDJSON')
+
+	class Status(models.TextChoices):
+		PENDING = ('pending', loc('Pending'))
+		RUNNING = ('running', loc('Running'))
+		DONE    = ('done',    loc('Done'))
+		FAILED  = ('failed',  loc('Failed'))
+
+	# Владелец всех созданных задач
+	created_by     = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete = models.CASCADE)
+	source         = models.FileField(upload_to = 'imports/')
+	format         = models.CharField(max_length = 16, choices = Format.choices)
+	status         = models.CharField(max_length = 16, choices = Status.choices, default = Status.PENDING)
+	rows_processed = models.PositiveIntegerField(default = 0)
+	created_count  = models.PositiveIntegerField(default = 0)
+	error_count    = models.PositiveIntegerField(default = 0)
+	# Первые TASK_IMPORT_MAX_ERRORS ошибок: [{'row': номер строки данных, 'errors': {...}}]
+	errors         = models.JSONField(default = list, blank = True)
+	created_at     = models.DateTimeField(auto_now_add = True)
+	# Обновляется с каждой пачкой: по нему видно, что импорт завис
+	updated_at     = models.DateTimeField(auto_now = True)
@@ -0,0 +1,162 @@
+from rest_framework.response import Response
+from django.db.models        import Model, Prefetch, QuerySet
+from rest_framework          import serializers
+
+
+class QuerysetPlan:
+	"""
+	Что нужно подгрузить, чтобы сериализатор не делал запросов на каждую запись
+	"""
+	def __init__(self):
+		self.only: list[str] = []
+		self.select_related: list[str] = []
+		self.prefetch_related: list[Prefetch] = []
+		# False, если в сериализаторе есть поле, источник которого неизвестен
+		# (SerializerMethodField, property и т.п.) - тогда only() применять нельзя
+		self.can_restrict_fields = True
+
+
+def build_queryset_plan(serializer: serializers.Serializer, model: type[Model], prefix: str = '') -> QuerysetPlan:
+	plan = QuerysetPlan()
+	plan.only.append(prefix + model._meta.pk.name)
+
+	for field in serializer.fields.values():
+		if field.write_only:
+			continue
+
+		if field.source == '*' or len(field.source_attrs) != 1:
+			plan.can_restrict_fields = False
+			continue
+
+		name = field.source_attrs[0]
+		try:
+			model_field = model._meta.get_field(name)
+		except Exception:
+			plan.can_restrict_fields = False
+			continue
+
+		if isinstance(field, serializers.ListSerializer) and model_field.is_relation:
+			plan.prefetch_related.append(Prefetch(prefix + name, queryset = _get_child_queryset(field.child, model_field.related_model)))
+			continue
+
+		if isinstance(field, serializers.BaseSerializer) and (model_field.many_to_one or model_field.one_to_one):
+			nested = build_queryset_plan(field, model_field.related_model, prefix = f'{prefix}{name}__')
+
+			plan.only.append(prefix + name)
+			plan.select_related.append(prefix + name)
+			plan.only += nested.only
+			plan.select_related += nested.select_related
+			plan.prefetch_related += nested.prefetch_related
+			plan.can_restrict_fields &= nested.can_restrict_fields
+			continue
+
+		if model_field.many_to_many or model_field.one_to_many:
+			plan.prefetch_related.append(Prefetch(prefix + name))
+			continue
+
+		if model_field.concrete:
+			plan.only.append(prefix + name)
+		else:
+			plan.can_restrict_fields = False
+
+	return plan
+
+
+def optimize_queryset(queryset: QuerySet, serializer: serializers.Serializer, extra_fields: tuple[str, ...] = ()) -> QuerySet:
+	"""
+	Применяет `select_related`/`prefetch_related`/`only()` по объявленным
+	полям сериализатора, включая вложенные сериализаторы (например `created_by`)
+	"""
+	plan = build_queryset_plan(serializer, queryset.model)
+
+	if plan.select_related:
+		queryset = queryset.select_related(*plan.select_related)
+	if plan.prefetch_related:
+		queryset = queryset.prefetch_related(*plan.prefetch_related)
+	if plan.can_restrict_fields:
+		queryset = queryset.only(*dict.fromkeys(plan.only + list(extra_fields)))
+
+	return queryset
+
+
+def _get_child_queryset(serializer: serializers.Serializer, model: type[Model]) -> QuerySet:
+	plan = build_queryset_plan(serializer, model)
+	queryset = model._default_manager.all()
+
+	if plan.select_related:
+		queryset = queryset.select_related(*plan.select_related)
+	if plan.prefetch_related:
+		queryset = queryset.prefetch_related(*plan.prefetch_related)
+	# only() для prefetch не применяем: Django'у нужен обратный FK для связывания
+	return queryset
+
+
+class SerializerOptimizedQuerysetMixin:
+	"""
+	Миксин для GenericAPIView: `get_queryset()` подгоняется под `serializer_class`.<br>
+	`optimization_extra_fields` - поля, которые нужны помимо сериализатора
+	(например, поля сортировки для пагинации)
+	"""
+	optimization_extra_fields: tuple[str, ...] = ()
+
+	def get_queryset(self) -> QuerySet:
+		queryset = super().get_queryset()
+		if not self.should_optimize_queryset():
+			return queryset
+
+		return optimize_queryset(
+			queryset,
+			self.get_serializer(),
+			extra_fields = self.get_optimization_extra_fields()
+		)
+
+	def should_optimize_queryset(self) -> bool:
+		return True
+
+	def get_optimization_extra_fields(self) -> tuple[str, ...]:
+		return self.optimization_extra_fields
+
+
+class ValuesListMixin(SerializerOptimizedQuerysetMixin):
+	"""
+	`list()` через `.values()`: строки сразу превращаются в словари
+	`values_serializer_class` (класс с `values_fields`, `many()` и
+	`to_representation()`), модели и ModelSerializer не создаются
+	"""
+	values_serializer_class = None
+	# Действия, которые сами читают .values() через values_serializer_class
+	values_list_actions: tuple[str, ...] = ('list',)
+
+	def uses_values_list(self) -> bool:
+		return self.action in self.values_list_actions and self.values_serializer_class is not None
+
+	def should_optimize_queryset(self) -> bool:
+		# Колонки задаёт .values(), строить сериализатор ради only() не нужно
+		return not self.uses_values_list() and super().should_optimize_queryset()
+
+	def list(self, request, *args, **kwargs):
+		if not self.uses_values_list():
+			return super().list(request, *args, **kwargs)
+
+		serializer, queryset = self.get_values_queryset()
+		page = self.paginate_queryset(queryset)
+		if page is not None:
+			return self.get_paginated_response(serializer.many(page))
+		return Response(serializer.many(queryset))
+
+	async def alist(self, request, *args, **kwargs):
+		# Для асинхронного dispatch (см. TaskManager.async_views)
+		if not self.uses_values_list():
+			return await super().alist(request, *args, **kwargs)
+
+		serializer, queryset = self.get_values_queryset()
+		page = await self.apaginate_queryset(queryset)
+		if page is not None:
+			return self.get_paginated_response(serializer.many(page))
+		return Response(serializer.many([row async for row in queryset]))
+
+	def get_values_queryset(self) -> tuple:
+		serializer = self.values_serializer_class(context = self.get_serializer_context())
+		# Поля сортировки нужны пагинации, даже если их нет в ответе
+		columns = dict.fromkeys((*serializer.values_fields, *self.get_optimization_extra_fields()))
+		return serializer, self.filter_queryset(self.get_queryset()).values(*columns)
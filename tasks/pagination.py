@@ -0,0 +1,231 @@
+from collections import namedtuple
+from functools   import reduce
+from operator    import or_
+
+from django.utils.translation import gettext_lazy as loc
+from django.core              import signing
+from django.db.models         import BooleanField, F, Field, Func, Q, QuerySet, Value
+from rest_framework.exceptions  import NotFound
+from rest_framework.pagination  import BasePagination
+from rest_framework.filters     import OrderingFilter
+from rest_framework.response    import Response
+from rest_framework.request     import Request
+from rest_framework.utils.urls  import replace_query_param, remove_query_param
+
+
+Cursor = namedtuple('Cursor', ('ordering', 'position', 'reverse'))
+
+
+class KeysetCursorPagination(BasePagination):
+	"""
+	Keyset (cursor) пагинация: страница выбирается условием
+	`(created_at, id) > (последние значения)`, а не OFFSET, поэтому стоимость
+	запроса зависит только от размера страницы и не меняется с глубиной.<br>
+	Курсор непрозрачный и подписан `SECRET_KEY`, подделать позицию нельзя.
+	"""
+	page_size = 50
+	page_size_query_param = 'page_size'
+	max_page_size = 500
+
+	cursor_query_param = 'cursor'
+	cursor_salt = 'tasks.pagination.KeysetCursorPagination'
+
+	# Последнее поле обязано быть уникальным, иначе порядок нестабилен
+	ordering = ('created_at', 'id')
+
+	invalid_cursor_message = loc('Invalid cursor')
+
+
+	def paginate_queryset(self, queryset: QuerySet, request: Request, view = None) -> list:
+		return self._set_page(list(self._get_page_queryset(queryset, request, view)))
+
+	async def apaginate_queryset(self, queryset: QuerySet, request: Request, view = None) -> list:
+		return self._set_page([row async for row in self._get_page_queryset(queryset, request, view)])
+
+	def _get_page_queryset(self, queryset: QuerySet, request: Request, view) -> QuerySet:
+		self.request = request
+		self.page_size = self.get_page_size(request)
+		self.ordering = self.get_ordering(request, queryset, view)
+		self.cursor = self.decode_cursor(request)
+
+		reverse = self.cursor is not None and self.cursor.reverse
+		order_by = [_invert(field) if reverse else field for field in self.ordering]
+
+		queryset = queryset.order_by(*order_by)
+		if self.cursor is not None:
+			queryset = queryset.filter(self._get_keyset_filter(queryset, order_by, self.cursor.position))
+
+		# +1 запись, чтобы узнать, есть ли что-то дальше, без COUNT(*)
+		return queryset[:self.page_size + 1]
+
+	def _set_page(self, rows: list) -> list:
+		reverse = self.cursor is not None and self.cursor.reverse
+		has_more = len(rows) > self.page_size
+		rows = rows[:self.page_size]
+
+		if reverse:
+			rows.reverse()
+			self.has_next, self.has_previous = True, has_more
+		else:
+			self.has_next, self.has_previous = has_more, self.cursor is not None
+
+		self.page = rows
+		return rows
+
+
+	def get_paginated_response(self, data) -> Response:
+		return Response({
+			'next':     self.get_next_link(),
+			'previous': self.get_previous_link(),
+			'results':  data,
+		})
+
+	def get_paginated_response_schema(self, schema: dict) -> dict:
+		return {
+			'type': 'object',
+			'required': ['results'],
+			'properties': {
+				'next':     { 'type': 'string', 'nullable': True, 'format': 'uri' },
+				'previous': { 'type': 'string', 'nullable': True, 'format': 'uri' },
+				'results':  schema,
+			},
+		}
+
+
+	def get_page_size(self, request: Request) -> int:
+		try:
+			page_size = int(request.query_params[self.page_size_query_param])
+		except (KeyError, ValueError):
+			return self.page_size
+
+		if page_size <= 0:
+			return self.page_size
+		return min(page_size, self.max_page_size)
+
+	def get_ordering(self, request: Request, queryset: QuerySet, view) -> tuple[str, ...]:
+		"""
+		Сортировка берётся из `OrderingFilter` представления (если он есть),
+		в конец добавляется `id`, чтобы позиция курсора была однозначной
+		"""
+		ordering = None
+		for backend in getattr(view, 'filter_backends', ()):
+			if issubclass(backend, OrderingFilter):
+				ordering = backend().get_ordering(request, queryset, view)
+				break
+
+		if not ordering:
+			return tuple(self.ordering)
+
+		ordering = tuple(ordering)
+		if ordering[-1].lstrip('-') not in ('id', 'pk'):
+			ordering += ('-id' if ordering[-1].startswith('-') else 'id',)
+		return ordering
+
+
+	def get_next_link(self) -> str | None:
+		if not self.has_next or not self.page:
+			return None
+		return self._get_link(self.page[-1], reverse = False)
+
+	def get_previous_link(self) -> str | None:
+		if not self.has_previous:
+			return None
+		if not self.page:
+			return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+		return self._get_link(self.page[0], reverse = True)
+
+	def _get_link(self, row, reverse: bool) -> str:
+		cursor = Cursor(
+			ordering = list(self.ordering),
+			position = [_to_primitive(_get_value(row, field.lstrip('-'))) for field in self.ordering],
+			reverse  = reverse,
+		)
+		return replace_query_param(
+			self.request.build_absolute_uri(),
+			self.cursor_query_param,
+			self.encode_cursor(cursor)
+		)
+
+
+	def encode_cursor(self, cursor: Cursor) -> str:
+		return signing.dumps(tuple(cursor), salt = self.cursor_salt, compress = True)
+
+	def decode_cursor(self, request: Request) -> Cursor | None:
+		encoded = request.query_params.get(self.cursor_query_param)
+		if not encoded:
+			return None
+
+		try:
+			cursor = Cursor(*signing.loads(encoded, salt = self.cursor_salt))
+		except (signing.BadSignature, TypeError, ValueError):
+			raise NotFound(self.invalid_cursor_message)
+
+		# Курсор от другой сортировки указывает в никуда
+		if tuple(cursor.ordering) != tuple(self.ordering) or len(cursor.position) != len(self.ordering):
+			raise NotFound(self.invalid_cursor_message)
+
+		return cursor
+
+
+	def _get_keyset_filter(self, queryset: QuerySet, order_by: list[str], position: list):
+		"""
+		Лексикографическое сравнение кортежей. При одном направлении всех полей -
+		сравнение строк `(a, b) > (x, y)`: PostgreSQL превращает его в границу
+		сканирования индекса. При разных направлениях - `a > x OR (a = x AND b > y) OR ...`
+		с границей `a >= x`, иначе индекс читается с начала и стоимость страницы
+		растёт с её глубиной
+		"""
+		opts = queryset.model._meta
+		values = []
+		for field, raw_value in zip(order_by, position):
+			try:
+				values.append(opts.get_field(field.lstrip('-')).to_python(raw_value))
+			except Exception:
+				raise NotFound(self.invalid_cursor_message)
+
+		if len({ field.startswith('-') for field in order_by }) == 1:
+			return _RowComparison(
+				_Row(*(F(field.lstrip('-')) for field in order_by)),
+				_Row(*map(Value, values)),
+				arg_joiner = ' < ' if order_by[0].startswith('-') else ' > ',
+			)
+
+		conditions = []
+		for i, field in enumerate(order_by):
+			name = field.lstrip('-')
+			lookup = 'lt' if field.startswith('-') else 'gt'
+
+			equal = { f.lstrip('-'): v for f, v in zip(order_by[:i], values[:i]) }
+			conditions.append(Q(**equal, **{ f'{name}__{lookup}': values[i] }))
+
+		first = order_by[0]
+		bound = Q(**{ f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': values[0] })
+		return bound & reduce(or_, conditions)
+
+
+# Строка `(a, b)` и сравнение строк `(a, b) > (x, y)` через публичный API выражений:
+# Tuple-лукапы Django (django.db.models.fields.tuple_lookups) - приватный модуль
+class _Row(Func):
+	function = ''
+	output_field = Field()
+
+class _RowComparison(Func):
+	template = '%(expressions)s'
+	output_field = BooleanField()
+
+
+def _invert(field: str) -> str:
+	return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def _get_value(row, name: str):
+	# Поддержка и моделей, и словарей из .values()
+	if isinstance(row, dict):
+		return row[name]
+	return getattr(row, name)
+
+
+def _to_primitive(value):
+	if hasattr(value, 'isoformat'):
+		return value.isoformat()
+	return value
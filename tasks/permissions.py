@@ -1,22 +1,24 @@
-from django.contrib.auth        import get_user_model
 from django.http.request        import HttpRequest
 from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 
-from users.models import User
-from tasks.models import Task
-
-UserModel: type[User] = get_user_model()
+from tasks.models import Task, can_edit_all_tasks
 
 
 class IsAuthenticatedAndIsReadOnlyOrOwnerOrProjectManagerOrStaff(IsAuthenticated):
 	def has_object_permission(self, request: HttpRequest, view, obj: Task):
+		if not super().has_object_permission(request, view, obj):
+			return False
+
+		if request.method in SAFE_METHODS:
+			return True
+
+		# Посчитано в SQL через Task.objects.annotate_editable()
+		can_edit = getattr(obj, 'user_can_edit', None)
+		if can_edit is not None:
+			return bool(can_edit)
 
-		return bool (
-			super().has_object_permission(request, view, obj) and
-			bool(
-				request.method in SAFE_METHODS or
-				obj.created_by == request.user or
-				request.user.role == UserModel.Role.PROJECT_MANAGER or
-				request.user.is_staff
-			)
+		return bool(
+			# Сравнение по id: не загружает владельца и работает с пользователем из токена
+			obj.created_by_id == request.user.pk or
+			can_edit_all_tasks(request.user)
 		)
@@ -1,8 +1,13 @@
-from django.contrib.auth import get_user_model
-from rest_framework      import serializers
+from rest_framework.permissions import SAFE_METHODS
+from django.utils.translation   import gettext_lazy as loc
+from django.contrib.auth        import get_user_model
+from rest_framework             import serializers
+from django.urls                import reverse
+from django.db                  import models, transaction
 
-from tasks.models import Task
-from users.models import User as _User
+from tasks.caching import invalidate_tasks
+from tasks.models  import Task, TaskImport
+from users.models  import User as _User
 
 User: type[_User] = get_user_model()
 
@@ -17,10 +22,146 @@ class TaskOwnerSerializer(serializers.ModelSerializer):
 		)
 
 
-class TaskSerializer(serializers.ModelSerializer):
+# Предел количества задач в одном bulk запросе
+BULK_MAX_ITEMS = 5_000
+
+
+class TaskListSerializer(serializers.ListSerializer):
+	"""
+	Пакетные create/update: одна транзакция и один `bulk_create`/`bulk_update`
+	вместо запроса на каждую задачу.<br>
+	Для update в `instance` ожидается словарь `{id: Task}`
+	"""
+	def run_child_validation(self, data):
+		if isinstance(self.instance, dict) and isinstance(data, dict):
+			self.child.instance = self.instance.get(data.get('id'))
+		return super().run_child_validation(data)
+
+	def create(self, validated_data: list[dict]) -> list[Task]:
+		tasks = [Task(**attrs) for attrs in validated_data]
+		for task in tasks:
+			task.prepare_attachment()
+
+		with transaction.atomic():
+			tasks = Task.objects.bulk_create(tasks)
+			# bulk_create/bulk_update не отправляют post_save
+			invalidate_tasks([task.pk for task in tasks])
+			return tasks
+
+	def update(self, instances: dict[int, Task], validated_data: list[dict]) -> list[Task]:
+		updated, fields, with_attachment = [], set(), []
+
+		for item, attrs in zip(self.initial_data, validated_data):
+			task = instances[item['id']]
+			for attr, value in attrs.items():
+				setattr(task, attr, value)
+			if 'attachment' in attrs:
+				# bulk_update не вызывает Task.save()
+				task.prepare_attachment()
+				with_attachment.append(task)
+			fields.update(attrs)
+			updated.append(task)
+
+		if fields:
+			with transaction.atomic():
+				Task.objects.bulk_update(updated, fields)
+				if with_attachment:
+					# Отдельно: у остальных задач эти колонки не загружены
+					Task.objects.bulk_update(with_attachment, Task.ATTACHMENT_FIELDS)
+				invalidate_tasks([task.pk for task in updated])
+
+		return updated
+
+
+FIELDS_QUERY_PARAM  = 'fields'
+EXCLUDE_QUERY_PARAM = 'exclude'
+
+
+def get_requested_fields(request, available: tuple[str, ...]) -> tuple[str, ...]:
+	"""
+	Поля из `?fields=id,title` и `?exclude=description` в порядке `available`.<br>
+	Только для чтения: при записи сужение молча отбросило бы присланные поля
+	"""
+	if request is None or request.method not in SAFE_METHODS:
+		return available
+
+	params = getattr(request, 'query_params', request.GET)
+	selected = set(available)
+	errors = {}
+
+	for param in (FIELDS_QUERY_PARAM, EXCLUDE_QUERY_PARAM):
+		if param not in params:
+			continue
+
+		names = { name.strip() for name in params[param].split(',') if name.strip() }
+		if unknown := names - set(available):
+			errors[param] = [loc('Unknown fields: {fields}.').format(fields = ', '.join(sorted(unknown)))]
+		elif param == FIELDS_QUERY_PARAM:
+			selected &= names
+		else:
+			selected -= names
+
+	if errors:
+		raise serializers.ValidationError(errors)
+	return tuple(name for name in available if name in selected)
+
+
+class SparseFieldsetMixin:
+	"""
+	Оставляет в сериализаторе только поля из `?fields=`/`?exclude=`.
+	Оптимизатор queryset строит план по оставшимся полям, поэтому сужается
+	и `only()`, а без `created_by` нет и JOIN пользователей
+	"""
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+
+		requested = set(get_requested_fields(self.context.get('request'), tuple(self.fields)))
+		for name in tuple(self.fields):
+			if name not in requested:
+				self.fields.pop(name)
+
+
+# Подставляется вместо id задачи в шаблон URL скачивания (см. get_attachment_url_template)
+_PK_PLACEHOLDER = '__pk__'
+
+
+def get_attachment_url_template(request = None) -> str:
+	"""
+	URL эндпоинта скачивания вложения (с проверкой доступа к задаче) с `__pk__`
+	вместо id: reverse() один раз на ответ, а не на каждую задачу
+	"""
+	url = reverse('task-attachment', args = [_PK_PLACEHOLDER])
+	if request is not None:
+		return request.build_absolute_uri(url)
+	return url
+
+
+class TaskAttachmentField(serializers.FileField):
+	"""
+	Принимает файл как FileField, но отдаёт не MEDIA_URL файла (его бы
+	раздал кто угодно), а URL `GET /api/tasks/{id}/attachment/`
+	"""
+	def to_representation(self, value):
+		if not value:
+			return None
+		return get_attachment_url_template(self.context.get('request')).replace(_PK_PLACEHOLDER, str(value.instance.pk))
+
+
+class TaskSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+	serializer_field_mapping = {
+		**serializers.ModelSerializer.serializer_field_mapping,
+		models.FileField: TaskAttachmentField,
+	}
+
 	created_by = TaskOwnerSerializer(read_only = True)
 
+	@classmethod
+	def many_init(cls, *args, **kwargs):
+		kwargs.setdefault('max_length', BULK_MAX_ITEMS)
+		return super().many_init(*args, **kwargs)
+
 	class Meta:
+		list_serializer_class = TaskListSerializer
 		model = Task
 		fields = (
 			'id',
@@ -35,3 +176,98 @@ class TaskSerializer(serializers.ModelSerializer):
 			'created_by': { 'read_only': True },
 			'created_at': { 'read_only': True },
 		}
+
+
+class TaskValuesSerializer:
+	"""
+	Быстрый путь чтения для list: ответ строится прямо из строк `.values()`,
+	без ModelSerializer и вызова `to_representation` каждого поля.<br>
+	Вывод совпадает с `TaskSerializer` побайтово (см. tests/test_values_serializer.py),
+	поэтому при изменении полей `TaskSerializer` нужно поменять и этот класс.<br>
+	`?fields=`/`?exclude=` сужают и ответ, и список колонок `.values()`
+	"""
+	# Поле ответа -> колонки .values(), из которых оно строится
+	columns = {
+		'id':           ('id',),
+		'title':        ('title',),
+		'description':  ('description',),
+		'is_completed': ('is_completed',),
+		'created_by':   ('created_by_id', 'created_by__username', 'created_by__email'),
+		'created_at':   ('created_at',),
+		'attachment':   ('id', 'attachment'),
+	}
+
+	def __init__(self, context: dict | None = None):
+		self.context = context or {}
+		self.request = self.context.get('request')
+		# Формат даты и часовой пояс - как у поля, которое построил бы ModelSerializer
+		self.created_at_field = serializers.DateTimeField(read_only = True)
+		self.attachment_url = get_attachment_url_template(self.request)
+
+		self.fields = get_requested_fields(self.request, tuple(self.columns))
+		self.values_fields = tuple(dict.fromkeys(column for field in self.fields for column in self.columns[field]))
+		self.is_sparse = len(self.fields) != len(self.columns)
+
+	def to_representation(self, row: dict) -> dict:
+		if self.is_sparse:
+			return { field: getattr(self, f'get_{field}')(row) for field in self.fields }
+
+		# Все поля - самый частый случай, без вызова метода на каждое поле
+		return {
+			'id':           row['id'],
+			'title':        row['title'],
+			'description':  row['description'],
+			'is_completed': row['is_completed'],
+			'created_by':   self.get_created_by(row),
+			'created_at':   self.created_at_field.to_representation(row['created_at']),
+			'attachment':   self.get_attachment(row),
+		}
+
+	def many(self, rows) -> list[dict]:
+		return [self.to_representation(row) for row in rows]
+
+
+	def get_id(self, row: dict) -> int:
+		return row['id']
+
+	def get_title(self, row: dict) -> str:
+		return row['title']
+
+	def get_description(self, row: dict) -> str | None:
+		return row['description']
+
+	def get_is_completed(self, row: dict) -> bool:
+		return row['is_completed']
+
+	def get_created_by(self, row: dict) -> dict:
+		return {
+			'id':       row['created_by_id'],
+			'username': row['created_by__username'],
+			'email':    row['created_by__email'],
+		}
+
+	def get_created_at(self, row: dict) -> str:
+		return self.created_at_field.to_representation(row['created_at'])
+
+	def get_attachment(self, row: dict) -> str | None:
+		# Как TaskAttachmentField: пустое имя - null, иначе URL эндпоинта скачивания
+		if not row['attachment']:
+			return None
+		return self.attachment_url.replace(_PK_PLACEHOLDER, str(row['id']))
+
+
+class TaskImportSerializer(serializers.ModelSerializer):
+	class Meta:
+		model = TaskImport
+		fields = (
+			'id',
+			'format',
+			'status',
+			'rows_processed',
+			'created_count',
+			'error_count',
+			'errors',
+			'created_at',
+			'updated_at',
+		)
+		read_only_fields = fields
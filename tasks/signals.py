@@ -0,0 +1,23 @@
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth      import get_user_model
+from django.dispatch          import receiver
+
+from tasks.caching import invalidate_tasks, invalidate_task_owners
+from tasks.models  import Task
+from users.models  import User as _User # для аннотации
+
+User: type[_User] = get_user_model()
+
+# Поля владельца, которые попадают в ответ задачи (TaskOwnerSerializer)
+_OWNER_FIELDS = { 'username', 'email' }
+
+
+@receiver((post_save, post_delete), sender = Task, dispatch_uid = 'tasks.invalidate_responses')
+def invalidate_task_responses(sender, instance: Task, **kwargs):
+	invalidate_tasks([instance.pk])
+
+
+@receiver(post_save, sender = User, dispatch_uid = 'tasks.invalidate_owner_responses')
+def invalidate_owner_responses(sender, instance: _User, created: bool, update_fields = None, **kwargs):
+	if not created and (update_fields is None or _OWNER_FIELDS & set(update_fields)):
+		invalidate_task_owners()
@@ -0,0 +1,82 @@
+from pathlib import Path, PurePosixPath
+import tempfile
+import hashlib
+import re
+import os
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.core.files.move    import file_move_safe
+
+
+# Имя блоба: `<каталог>/ab/cd/<sha256><.ext>`
+_BLOB_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(?:\.[\w-]+)?$')
+
+
+def get_attachment_storage() -> 'ContentAddressedStorage':
+	# Callable, чтобы бэкенд брался из STORAGES в рантайме, а не попадал в миграции
+	return storages['attachments']
+
+
+def get_blob_sha256(name: str) -> str | None:
+	match = _BLOB_NAME_RE.search(name)
+	return match['sha256'] if match else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+	"""
+	Файлы хранятся по SHA-256 содержимого: `attachments/ab/cd/<sha256>.pdf`.<br>
+	Одинаковые вложения разных задач - один файл на диске. Поэтому удалять
+	файл вместе с задачей нельзя: на него могут ссылаться другие. Файлы без
+	ссылок из БД удаляет `manage.py gc_attachments`
+	"""
+	def get_available_name(self, name: str, max_length: int | None = None) -> str:
+		# Итоговое имя определяет содержимое, а не занятость имени
+		return name
+
+	def partial_dir(self, name: str) -> str:
+		# Недописанные файлы; устаревшие удаляет тот же сборщик мусора
+		return str(PurePosixPath(name).parent / '.partial')
+
+	def blob_name(self, name: str, sha256: str) -> str:
+		path = PurePosixPath(name)
+		extension = path.suffix.lower() if re.fullmatch(r'\.[\w-]+', path.suffix) else ''
+		return str(path.parent / sha256[:2] / sha256[2:4] / f'{sha256}{extension}')
+
+	def _save(self, name: str, content) -> str:
+		"""
+		Один проход по содержимому: запись во временный файл рядом с
+		хранилищем и подсчёт хеша, затем перенос на место блоба
+		"""
+		temp_dir = self.path(self.partial_dir(name))
+		os.makedirs(temp_dir, exist_ok = True)
+
+		hasher = hashlib.sha256()
+		with tempfile.NamedTemporaryFile(dir = temp_dir, prefix = 'upload-', delete = False) as file:
+			for chunk in content.chunks():
+				hasher.update(chunk)
+				file.write(chunk)
+
+		return self.adopt(file.name, name, hasher.hexdigest())
+
+	def adopt(self, path: str | Path, name: str, sha256: str) -> str:
+		"""
+		Забирает уже записанный на диск файл с известным хешем (например,
+		загруженный по частям) и возвращает имя его блоба
+		"""
+		name = self.blob_name(name, sha256)
+		full_path = self.path(name)
+
+		if os.path.exists(full_path):
+			# Дубликат: свежий mtime не даст сборщику мусора удалить блоб,
+			# пока задача с новой ссылкой на него ещё не сохранена
+			os.utime(full_path)
+			os.unlink(path)
+			return name
+
+		os.makedirs(os.path.dirname(full_path), exist_ok = True)
+		# Одновременная запись того же блоба безопасна: содержимое одинаковое
+		file_move_safe(str(path), full_path, allow_overwrite = True)
+		if self.file_permissions_mode is not None:
+			os.chmod(full_path, self.file_permissions_mode)
+
+		return name
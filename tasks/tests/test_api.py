@@ -75,7 +75,9 @@ class TaskAPITest(APITestCase):
 
 		response: HttpResponse = self.client.get(self.tasks_url)
 		self.assertEqual(response.status_code, status.HTTP_200_OK, to_verbose_data(response.data))
-		self.assertEqual(response.data, expected_data)
+		self.assertEqual(response.data['results'], expected_data)
+		self.assertIsNone(response.data['next'])
+		self.assertIsNone(response.data['previous'])
 
 
 		expected_data = TaskSerializer(self.user1_task).data
@@ -0,0 +1,122 @@
+from inspect import iscoroutinefunction
+
+from django.test.utils      import CaptureQueriesContext
+from django.test            import override_settings
+from django.urls            import path, include, resolve, reverse
+from django.db              import connection
+from rest_framework.routers import DefaultRouter
+from rest_framework.test    import APITestCase
+from rest_framework         import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.tokens             import ClaimsRefreshToken
+from users.models             import User
+from users.cache              import user_cache
+from users                    import local_settings
+from tasks.models             import Task
+from tasks.views              import TaskViewSet
+from tasks                    import urls as tasks_urls
+
+
+class AsyncTaskViewSet(TaskViewSet):
+	async_dispatch = True
+
+router = DefaultRouter()
+router.register('tasks', AsyncTaskViewSet, basename = 'task')
+
+# Тот же API, но маршруты задач - асинхронные (как под ASGI)
+urlpatterns = [
+	path('api/', include(router.urls)),
+	path('', include('users.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF = __name__)
+class AsyncTaskViewSetTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		user_cache.clear()
+		self.owner = User.objects.create(username = 'Owner', email = 'owner@example.com', password = '12345')
+		self.other = User.objects.create(username = 'Other', password = '12345')
+		self.task = Task.objects.create(title = 'Task', description = 'Description', created_by = self.owner)
+		Task.objects.create(title = 'Other task', created_by = self.other)
+
+		self.list_url = reverse('task-list')
+		self.detail_url = reverse('task-detail', args = [self.task.pk])
+		self.login(self.owner)
+
+	def login(self, user: User):
+		self.client.force_login(user)
+		self.async_client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME] = str(ClaimsRefreshToken.for_user(user).access_token)
+
+
+	def test_routes(self):
+		self.assertTrue(iscoroutinefunction(resolve(self.list_url).func))
+		self.assertTrue(iscoroutinefunction(resolve(self.detail_url).func))
+		# Действия без async-варианта остаются синхронными
+		self.assertFalse(iscoroutinefunction(resolve(reverse('task-export')).func))
+
+	def test_sync_by_default(self):
+		with override_settings(ROOT_URLCONF = tasks_urls):
+			self.assertFalse(iscoroutinefunction(resolve(reverse('task-list')).func))
+
+	async def test_list_matches_sync_view(self):
+		response = await self.async_client.get(self.list_url, { 'fields': 'id,title,created_by' })
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		with override_settings(ROOT_URLCONF = tasks_urls):
+			expected = await self.async_client.get(self.list_url, { 'fields': 'id,title,created_by' })
+		self.assertEqual(response.content, expected.content)
+
+	async def test_retrieve(self):
+		response = await self.async_client.get(self.detail_url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.json()['created_by']['username'], 'Owner')
+
+		response = await self.async_client.get(reverse('task-detail', args = [0]))
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_create(self):
+		response = self.client.post(self.list_url, { 'title': 'New' }, format = 'json')
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(response.data['created_by']['email'], 'owner@example.com')
+		self.assertTrue(Task.objects.filter(title = 'New', created_by = self.owner).exists())
+
+		response = self.client.post(self.list_url, { 'title': '' }, format = 'json')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn('title', response.data)
+
+	def test_sync_actions_on_async_route(self):
+		response = self.client.patch(self.detail_url, { 'is_completed': True }, format = 'json')
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		self.login(self.other)
+		response = self.client.delete(self.detail_url)
+		self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+	@override_settings(USERS_STATELESS_JWT = True)
+	def test_stateless_create(self):
+		self.login(self.owner)
+		response = self.client.post(self.list_url, { 'title': 'Stateless' }, format = 'json')
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(response.data['created_by']['username'], 'Owner')
+
+	def test_authentication(self):
+		with CaptureQueriesContext(connection) as context:
+			self.client.get(self.list_url)
+			response = self.client.get(self.list_url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		# Пользователь загружен один раз, второй запрос - из кеша
+		user_queries = [query for query in context.captured_queries if 'FROM "users_user"' in query['sql']]
+		self.assertEqual(len(user_queries), 1)
+
+		self.client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME] = 'broken'
+		self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+		del self.client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME]
+		self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_inactive_user(self):
+		User.objects.filter(pk = self.owner.pk).update(is_active = False)
+		self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,154 @@
+from django.urls               import reverse
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.fields     import IntegerField
+from rest_framework.test       import APITestCase
+from rest_framework            import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.serializers        import TaskSerializer, BULK_MAX_ITEMS
+from tasks.models             import Task
+
+
+class TaskBulkAPITest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.user1 = User.objects.create(username = 'BulkUser1', password = '12345')
+		self.user2 = User.objects.create(username = 'BulkUser2', password = '12345')
+		self.pm_user = User.objects.create(username = 'BulkManager', password = '12345', role = User.Role.PROJECT_MANAGER)
+
+		self.user1_tasks = [Task.objects.create(title = f'User1 task {i}', created_by = self.user1) for i in range(3)]
+		self.user2_task = Task.objects.create(title = 'User2 task', created_by = self.user2)
+
+		self.bulk_url = reverse('task-bulk')
+
+	def send(self, method: str, data):
+		return getattr(self.client, method)(self.bulk_url, data, content_type = 'application/json')
+
+
+	def test_anonymous(self):
+		response = self.send('post', [{ 'title': 'Anonymous' }])
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_bulk_create(self):
+		self.client.force_login(self.user1)
+
+		# аутентификация + SAVEPOINT + один INSERT + RELEASE SAVEPOINT
+		with self.assertNumQueries(4):
+			response = self.send('post', [{ 'title': f'New {i}', 'is_completed': i % 2 == 0 } for i in range(50)])
+
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+		self.assertEqual(len(response.data), 50)
+		self.assertEqual(response.data[0]['title'], 'New 0')
+		self.assertEqual(response.data[0]['created_by']['id'], self.user1.pk)
+
+		created = Task.objects.filter(title__startswith = 'New ')
+		self.assertEqual(created.count(), 50)
+		self.assertEqual(TaskSerializer(created.get(title = 'New 3')).data, response.data[3])
+
+	def test_bulk_create_is_atomic(self):
+		self.client.force_login(self.user1)
+
+		response = self.send('post', [{ 'title': 'Valid' }, { 'description': 'No title' }, { 'title': 'x' * 300 }])
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(len(response.data['errors']), 3)
+		self.assertEqual(response.data['errors'][0], {})
+		self.assertIn('title', response.data['errors'][1])
+		self.assertIn('title', response.data['errors'][2])
+		self.assertFalse(Task.objects.filter(title = 'Valid').exists())
+
+	def test_bulk_payload_limits(self):
+		self.client.force_login(self.user1)
+
+		self.assertEqual(self.send('post', []).status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.send('post', { 'title': 'Not a list' }).status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(
+			self.send('post', [{ 'title': 'Too many' }] * (BULK_MAX_ITEMS + 1)).status_code,
+			status.HTTP_400_BAD_REQUEST
+		)
+
+	def test_bulk_update_own(self):
+		self.client.force_login(self.user1)
+
+		response = self.send('patch', [
+			{ 'id': task.pk, 'is_completed': True, 'title': f'Done {task.pk}' }
+			for task in self.user1_tasks
+		])
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		self.assertEqual([task['id'] for task in response.data], [task.pk for task in self.user1_tasks])
+		for task in self.user1_tasks:
+			task.refresh_from_db()
+			self.assertTrue(task.is_completed)
+			self.assertEqual(task.title, f'Done {task.pk}')
+
+	def test_bulk_update_clears_attachment_columns(self):
+		sha256 = 'a' * 64
+		task = self.user1_tasks[0]
+		Task.objects.filter(pk = task.pk).update(
+			attachment = f'attachments/aa/aa/{sha256}.pdf', attachment_sha256 = sha256, attachment_filename = 'report.pdf'
+		)
+		self.client.force_login(self.user1)
+
+		response = self.send('patch', [{ 'id': task.pk, 'attachment': None }, { 'id': self.user1_tasks[1].pk, 'title': 'Other' }])
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+
+		task.refresh_from_db()
+		self.assertFalse(task.attachment)
+		self.assertEqual((task.attachment_sha256, task.attachment_filename), ('', ''))
+
+	def test_bulk_update_other_user_own(self):
+		self.client.force_login(self.user1)
+
+		response = self.send('patch', [
+			{ 'id': self.user1_tasks[0].pk, 'title': 'Changed' },
+			{ 'id': self.user2_task.pk, 'title': 'Changed' },
+			{ 'id': 0, 'title': 'Changed' },
+			{ 'title': 'No id' },
+		])
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		errors = response.data['errors']
+		self.assertEqual(errors[0], {})
+		self.assertEqual(errors[1]['id'], [PermissionDenied.default_detail])
+		self.assertEqual(errors[2]['id'], [NotFound.default_detail])
+		self.assertEqual(errors[3]['id'], [IntegerField.default_error_messages['invalid']])
+		self.assertFalse(Task.objects.filter(title = 'Changed').exists())
+
+	def test_bulk_update_with_manager(self):
+		self.client.force_login(self.pm_user)
+
+		response = self.send('patch', [{ 'id': self.user2_task.pk, 'is_completed': True }])
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		self.user2_task.refresh_from_db()
+		self.assertTrue(self.user2_task.is_completed)
+
+	def test_bulk_delete(self):
+		self.client.force_login(self.user1)
+		ids = [task.pk for task in self.user1_tasks]
+
+		response = self.send('delete', ids + [self.user2_task.pk])
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(Task.objects.filter(pk__in = ids).count(), 3)
+
+		response = self.send('delete', ids)
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		self.assertEqual(response.data, [{ 'id': pk, 'deleted': True } for pk in ids])
+		self.assertFalse(Task.objects.filter(pk__in = ids).exists())
+		self.assertTrue(Task.objects.filter(pk = self.user2_task.pk).exists())
+
+	def test_bulk_unhashable_ids(self):
+		self.client.force_login(self.user1)
+		invalid = [IntegerField.default_error_messages['invalid']]
+
+		response = self.send('patch', [{ 'id': [1], 'title': 'x' }, { 'id': { 'pk': 1 }, 'title': 'x' }])
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual([error['id'] for error in response.data['errors']], [invalid, invalid])
+
+		response = self.send('delete', [[self.user1_tasks[0].pk], self.user1_tasks[1].pk])
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(response.data['errors'], [{ 'id': invalid }, {}])
+		self.assertEqual(Task.objects.filter(created_by = self.user1).count(), 3)
@@ -0,0 +1,129 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test.utils      import CaptureQueriesContext
+from django.core.cache      import cache
+from django.utils.http      import http_date
+from django.test            import override_settings
+from django.urls            import reverse
+from django.db              import connection
+from rest_framework.test    import APITestCase
+from rest_framework         import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.caching            import check_response_cache
+from tasks.models             import Task
+
+
+@override_settings(TASK_RESPONSE_CACHE = { 'ENABLED': True, 'CACHE_ALIAS': None, 'TIMEOUT': 60 })
+class TaskResponseCacheTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		cache.clear()
+
+		self.owner = User.objects.create(username = 'Owner', password = '12345', email = 'owner@mail.com')
+		self.tasks = [Task.objects.create(title = f'Task {i}', created_by = self.owner) for i in range(3)]
+
+		self.list_url = reverse('task-list')
+		self.detail_url = reverse('task-detail', args = [self.tasks[0].pk])
+		self.client.force_login(self.owner)
+
+	def get(self, url: str, **headers):
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url, HTTP_ACCEPT = 'application/json', **headers)
+		self.queries = len(context.captured_queries)
+		return response
+
+
+	def test_conditional_get(self):
+		response = self.get(self.list_url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		etag = response['ETag']
+
+		response = self.get(self.list_url, HTTP_IF_NONE_MATCH = etag)
+		self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(response['ETag'], etag)
+		self.assertEqual(response.content, b'')
+		# Пользователь - из кеша аутентификации, задачи не запрашиваются
+		self.assertEqual(self.queries, 0)
+
+		response = self.get(self.list_url, HTTP_IF_MODIFIED_SINCE = response['Last-Modified'])
+		self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+		response = self.get(self.list_url, HTTP_IF_MODIFIED_SINCE = http_date(0))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+	def test_cached_body(self):
+		first = self.get(self.list_url)
+		second = self.get(self.list_url)
+
+		self.assertEqual(second.status_code, status.HTTP_200_OK)
+		self.assertEqual(second.content, first.content)
+		self.assertEqual(second['Content-Type'], first['Content-Type'])
+		self.assertEqual(self.queries, 0)
+
+	def test_update_invalidates_list_and_detail(self):
+		list_etag = self.get(self.list_url)['ETag']
+		detail_etag = self.get(self.detail_url)['ETag']
+
+		self.client.patch(self.detail_url, { 'title': 'Updated' })
+
+		response = self.get(self.list_url, HTTP_IF_NONE_MATCH = list_etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.json()['results'][0]['title'], 'Updated')
+
+		response = self.get(self.detail_url, HTTP_IF_NONE_MATCH = detail_etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.json()['title'], 'Updated')
+
+	def test_other_task_change_keeps_detail(self):
+		list_etag = self.get(self.list_url)['ETag']
+		detail_etag = self.get(self.detail_url)['ETag']
+
+		self.client.delete(reverse('task-detail', args = [self.tasks[1].pk]))
+
+		self.assertNotEqual(self.get(self.list_url)['ETag'], list_etag)
+		self.assertEqual(self.get(self.detail_url, HTTP_IF_NONE_MATCH = detail_etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+	def test_bulk_operations_invalidate(self):
+		bulk_url = reverse('task-bulk')
+		requests = (
+			lambda: self.client.post(bulk_url, [{ 'title': 'New' }], format = 'json'),
+			lambda: self.client.patch(bulk_url, [{ 'id': self.tasks[0].pk, 'title': 'Bulk' }], format = 'json'),
+			lambda: self.client.delete(bulk_url, [self.tasks[2].pk], format = 'json'),
+		)
+		for request in requests:
+			etag = self.get(self.list_url)['ETag']
+			self.assertIn(request().status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
+			self.assertEqual(self.get(self.list_url, HTTP_IF_NONE_MATCH = etag).status_code, status.HTTP_200_OK)
+
+	def test_owner_rename_invalidates(self):
+		etag = self.get(self.detail_url)['ETag']
+
+		self.owner.username = 'Renamed'
+		self.owner.save()
+
+		response = self.get(self.detail_url, HTTP_IF_NONE_MATCH = etag)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.json()['created_by']['username'], 'Renamed')
+
+	def test_responses_are_per_user(self):
+		etag = self.get(self.list_url)['ETag']
+
+		self.client.force_login(User.objects.create(username = 'Other', password = '12345'))
+		self.assertEqual(self.get(self.list_url, HTTP_IF_NONE_MATCH = etag).status_code, status.HTTP_200_OK)
+
+	def test_missing_task_creates_no_version(self):
+		url = reverse('task-detail', args = [10 ** 9])
+		self.assertEqual(self.get(url).status_code, status.HTTP_404_NOT_FOUND)
+		self.assertIsNone(cache.get(f'tasks:version:{10 ** 9}'))
+
+		self.get(self.detail_url)
+		self.assertIsNotNone(cache.get(f'tasks:version:{self.tasks[0].pk}'))
+
+	def test_requires_shared_cache(self):
+		with self.assertRaises(ImproperlyConfigured):
+			check_response_cache()
+
+		with override_settings(TASK_RESPONSE_CACHE = { 'ENABLED': False }):
+			check_response_cache()
@@ -0,0 +1,122 @@
+from unittest import skipIf
+import gzip
+
+from django.http.response import HttpResponse, StreamingHttpResponse, FileResponse
+from django.test          import RequestFactory, SimpleTestCase
+from django.urls          import reverse
+from rest_framework.test  import APITestCase
+
+from TaskManager.middleware   import CompressionMiddleware, choose_encoding, brotli, zstandard
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task
+
+
+class CompressionMiddlewareTest(SimpleTestCase):
+	def setUp(self):
+		self.content = b'{"title": "task"}' * 1000
+
+	def process(self, response, accept_encoding: str = 'gzip'):
+		request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING = accept_encoding)
+		return CompressionMiddleware(lambda request: response)(request)
+
+
+	def test_choose_encoding(self):
+		available = ('zstd', 'br', 'gzip')
+		cases = {
+			'gzip, deflate, br, zstd': 'zstd',
+			'gzip;q=1.0, br;q=0.5':    'gzip',
+			'br;q=0, gzip':            'gzip',
+			'*':                       'zstd',
+			'*;q=0.5, br':             'br',
+			'identity':                None,
+			'':                        None,
+		}
+		for header, expected in cases.items():
+			with self.subTest(header):
+				self.assertEqual(choose_encoding(header, available), expected)
+
+	def test_gzip(self):
+		response = HttpResponse(self.content, content_type = 'application/json')
+		response.headers['ETag'] = '"abc"'
+		response = self.process(response)
+
+		self.assertEqual(response['Content-Encoding'], 'gzip')
+		self.assertEqual(response['Vary'], 'Accept-Encoding')
+		self.assertEqual(response['ETag'], 'W/"abc"')
+		self.assertEqual(int(response['Content-Length']), len(response.content))
+		self.assertEqual(gzip.decompress(response.content), self.content)
+
+	@skipIf(brotli is None, 'brotli is not installed')
+	def test_brotli(self):
+		response = self.process(HttpResponse(self.content, content_type = 'application/json'), 'gzip, br')
+
+		self.assertEqual(response['Content-Encoding'], 'br')
+		self.assertEqual(brotli.decompress(response.content), self.content)
+
+	@skipIf(zstandard is None, 'zstandard is not installed')
+	def test_zstd(self):
+		response = self.process(HttpResponse(self.content, content_type = 'application/json'), 'gzip, br, zstd')
+
+		self.assertEqual(response['Content-Encoding'], 'zstd')
+		self.assertEqual(zstandard.ZstdDecompressor().decompressobj().decompress(response.content), self.content)
+
+	def test_random_padding(self):
+		# Против BREACH длина ответа должна меняться у всех кодировок, не только у gzip
+		decompress = {
+			'gzip': gzip.decompress,
+			'br':   brotli and brotli.decompress,
+			'zstd': zstandard and (lambda content: zstandard.ZstdDecompressor().decompressobj().decompress(content)),
+		}
+		for encoding in ('gzip', 'br', 'zstd'):
+			if decompress[encoding] is None:
+				continue
+
+			with self.subTest(encoding):
+				lengths = set()
+				for _ in range(10):
+					response = self.process(HttpResponse(self.content, content_type = 'application/json'), encoding)
+					self.assertEqual(response['Content-Encoding'], encoding)
+					self.assertEqual(decompress[encoding](response.content), self.content)
+					lengths.add(len(response.content))
+				self.assertGreater(len(lengths), 1)
+
+	def test_streaming(self):
+		chunks = [b'{"id": %d}\n' % i * 50 for i in range(20)]
+		response = self.process(StreamingHttpResponse(iter(chunks), content_type = 'application/x-ndjson'))
+
+		self.assertEqual(response['Content-Encoding'], 'gzip')
+		self.assertFalse(response.has_header('Content-Length'))
+		self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(chunks))
+
+	def test_skipped_responses(self):
+		responses = {
+			'small':      HttpResponse(b'{}', content_type = 'application/json'),
+			'compressed': HttpResponse(self.content, content_type = 'image/png'),
+			'file':       FileResponse(iter([self.content]), content_type = 'text/plain'),
+			'encoded':    HttpResponse(self.content, headers = { 'Content-Encoding': 'br' }),
+		}
+		for name, response in responses.items():
+			with self.subTest(name):
+				encoding = response.get('Content-Encoding')
+				self.assertEqual(self.process(response).get('Content-Encoding'), encoding)
+
+		response = self.process(HttpResponse(self.content, content_type = 'application/json'), 'identity')
+		self.assertFalse(response.has_header('Content-Encoding'))
+		self.assertEqual(response.content, self.content)
+
+
+class TaskListCompressionTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def test_task_list_is_compressed(self):
+		owner = User.objects.create(username = 'Owner', password = '12345')
+		Task.objects.bulk_create([Task(title = f'Task {i}', description = 'x' * 100, created_by = owner) for i in range(50)])
+		self.client.force_login(owner)
+
+		plain = self.client.get(reverse('task-list'), HTTP_ACCEPT = 'application/json')
+		response = self.client.get(reverse('task-list'), HTTP_ACCEPT = 'application/json', HTTP_ACCEPT_ENCODING = 'gzip')
+
+		self.assertEqual(response['Content-Encoding'], 'gzip')
+		self.assertEqual(gzip.decompress(response.content), plain.content)
+		self.assertLess(len(response.content), len(plain.content) / 5)
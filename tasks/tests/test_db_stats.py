@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.urls         import reverse
+from django.db           import connection
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from TaskManager.db           import get_connection_mode
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+
+
+class DatabaseStatsTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.url = reverse('db-stats')
+		self.staff = User.objects.create(username = 'Staff', password = '12345', is_staff = True)
+
+
+	def test_only_staff(self):
+		self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+		self.client.force_login(User.objects.create(username = 'Regular', password = '12345'))
+		self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+	def test_stats(self):
+		self.client.force_login(self.staff)
+		before = self.client.get(self.url).json()[0]
+		after = self.client.get(self.url).json()[0]
+
+		self.assertEqual(after['alias'], 'default')
+		self.assertEqual(after['requests'], before['requests'] + 1)
+		self.assertEqual(after['mode'], get_connection_mode())
+		self.assertIsNone(after['pool'])
+
+	def test_connection_mode(self):
+		cases = [
+			({ 'CONN_MAX_AGE': 0 },    'per_request'),
+			({ 'CONN_MAX_AGE': 60 },   'persistent'),
+			({ 'CONN_MAX_AGE': None }, 'persistent'),
+			({ 'CONN_MAX_AGE': 0, 'OPTIONS': { 'pool': True } }, 'pool'),
+		]
+		for settings_dict, expected in cases:
+			with self.subTest(expected), mock.patch.dict(connection.settings_dict, { 'OPTIONS': {}, **settings_dict }):
+				self.assertEqual(get_connection_mode(), expected)
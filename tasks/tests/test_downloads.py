@@ -0,0 +1,113 @@
+from tempfile import TemporaryDirectory
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.test            import override_settings
+from django.urls            import reverse
+from rest_framework.test    import APITestCase
+from rest_framework         import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task
+
+
+class TaskAttachmentDownloadTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.media_root = TemporaryDirectory()
+		self.addCleanup(self.media_root.cleanup)
+
+		settings_override = override_settings(MEDIA_ROOT = self.media_root.name)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		self.owner  = User.objects.create(username = 'Owner', password = '12345')
+		self.reader = User.objects.create(username = 'Reader', password = '12345')
+
+		self.content = bytes(range(256)) * 4
+		self.task = Task.objects.create(
+			title = 'With attachment',
+			created_by = self.owner,
+			attachment = ContentFile(self.content, name = 'report.bin')
+		)
+
+		self.url = reverse('task-attachment', args = [self.task.pk])
+		self.etag = f'"{hashlib.sha256(self.content).hexdigest()}"'
+		self.client.force_login(self.reader)
+
+	def read(self, response) -> bytes:
+		# Тестовый клиент закрывает файл, когда поток дочитан
+		return b''.join(response.streaming_content)
+
+
+	def test_download(self):
+		response = self.client.get(self.url)
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(self.read(response), self.content)
+		self.assertEqual(response['ETag'], self.etag)
+		self.assertEqual(response['Accept-Ranges'], 'bytes')
+		self.assertEqual(response['Content-Length'], str(len(self.content)))
+		self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.bin"')
+
+	def test_if_none_match(self):
+		response = self.client.get(self.url, HTTP_IF_NONE_MATCH = self.etag)
+		self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+		self.assertEqual(response['ETag'], self.etag)
+
+		response = self.client.get(self.url, HTTP_IF_NONE_MATCH = '"outdated"')
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(self.read(response), self.content)
+
+	def test_range(self):
+		cases = {
+			'bytes=10-19': (10, 19),
+			'bytes=1000-': (1000, 1023),
+			'bytes=-24':   (1000, 1023),
+			'bytes=1020-5000': (1020, 1023),
+		}
+		for header, (start, end) in cases.items():
+			with self.subTest(header):
+				response = self.client.get(self.url, HTTP_RANGE = header)
+
+				self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+				self.assertEqual(self.read(response), self.content[start:end + 1])
+				self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{len(self.content)}')
+				self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+	def test_unsatisfiable_range(self):
+		response = self.client.get(self.url, HTTP_RANGE = 'bytes=5000-')
+
+		self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+		self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+	def test_ignored_range(self):
+		# Файл поменялся (If-Range не совпал) или диапазонов несколько - отдаётся весь файл
+		for headers in ({ 'HTTP_RANGE': 'bytes=0-9', 'HTTP_IF_RANGE': '"outdated"' }, { 'HTTP_RANGE': 'bytes=0-9,20-29' }):
+			with self.subTest(headers):
+				response = self.client.get(self.url, **headers)
+				self.assertEqual(response.status_code, status.HTTP_200_OK)
+				self.assertEqual(self.read(response), self.content)
+
+	@override_settings(TASK_ATTACHMENT_SENDFILE = 'x-accel-redirect', TASK_ATTACHMENT_SENDFILE_PREFIX = '/protected-media/')
+	def test_x_accel_redirect(self):
+		response = self.client.get(self.url)
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.task.attachment.name}')
+		self.assertEqual(response['ETag'], self.etag)
+		self.assertEqual(response.content, b'')
+
+	def test_no_attachment(self):
+		task = Task.objects.create(title = 'Empty', created_by = self.owner)
+
+		response = self.client.get(reverse('task-attachment', args = [task.pk]))
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_anonymous(self):
+		self.client.logout()
+
+		response = self.client.get(self.url)
+		self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
@@ -0,0 +1,107 @@
+import json
+import csv
+import io
+
+from django.test.utils   import CaptureQueriesContext, override_settings
+from django.urls         import reverse
+from django.db           import connection
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.tokens             import ClaimsRefreshToken
+from users.models             import User
+from users                    import local_settings
+from tasks.models             import Task
+
+
+class TaskExportTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.owner = User.objects.create(username = 'Owner', email = 'owner@example.com', password = '12345')
+		self.other = User.objects.create(username = 'Other', password = '12345')
+		self.tasks = [
+			Task.objects.create(title = f'Task {index}', description = 'a, "b"\nc', created_by = self.owner)
+			for index in range(5)
+		]
+		Task.objects.create(title = 'Other task', is_completed = True, created_by = self.other)
+
+		self.url = reverse('task-export')
+		self.list_url = reverse('task-list')
+		self.client.force_login(self.owner)
+		self.async_client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME] = str(ClaimsRefreshToken.for_user(self.owner).access_token)
+
+	def read(self, response) -> bytes:
+		self.assertTrue(response.streaming)
+		return b''.join(response.streaming_content)
+
+
+	def test_ndjson_matches_list(self):
+		response = self.client.get(self.url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+		self.assertIn('attachment; filename="tasks.ndjson"', response['Content-Disposition'])
+
+		rows = [json.loads(line) for line in self.read(response).splitlines()]
+		expected = self.client.get(self.list_url, { 'page_size': 100 }).json()['results']
+		self.assertEqual(rows, expected)
+
+	def test_csv(self):
+		response = self.client.get(self.url, { 'output': 'csv' })
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+		rows = list(csv.DictReader(io.StringIO(self.read(response).decode())))
+		self.assertEqual(len(rows), 6)
+		self.assertEqual(rows[0]['title'], 'Task 0')
+		self.assertEqual(rows[0]['description'], 'a, "b"\nc')
+		self.assertEqual(rows[0]['created_by.username'], 'Owner')
+		self.assertEqual(rows[0]['created_by.email'], 'owner@example.com')
+		self.assertEqual(rows[-1]['is_completed'], 'true')
+		self.assertEqual(rows[0]['attachment'], '')
+
+	def test_accept_header_selects_format(self):
+		response = self.client.get(self.url, HTTP_ACCEPT = 'text/csv')
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertTrue(self.read(response).startswith(b'id,title,'))
+
+	def test_filters_and_fields(self):
+		response = self.client.get(self.url, { 'output': 'csv', 'fields': 'id,title', 'is_completed': 'true' })
+		self.assertEqual(self.read(response).decode().splitlines(), ['id,title', f'{Task.objects.get(is_completed = True).pk},Other task'])
+
+	def test_empty_csv_has_header(self):
+		response = self.client.get(self.url, { 'output': 'csv', 'fields': 'title,created_by', 'created_by': 0 })
+		self.assertEqual(self.read(response), b'title,created_by.id,created_by.username,created_by.email\r\n')
+
+	@override_settings(TASK_EXPORT_CHUNK_SIZE = 2)
+	def test_rows_are_streamed_in_chunks(self):
+		with CaptureQueriesContext(connection) as context:
+			chunks = list(self.client.get(self.url).streaming_content)
+
+		self.assertEqual([chunk.count(b'\n') for chunk in chunks], [2, 2, 2])
+		# Один SELECT без LIMIT/OFFSET: строки читаются курсором
+		selects = [query['sql'] for query in context.captured_queries if 'tasks_task' in query['sql']]
+		self.assertEqual(len(selects), 1)
+		self.assertNotIn('LIMIT', selects[0])
+
+	@override_settings(TASK_EXPORT_CHUNK_SIZE = 2)
+	async def test_asgi_streams_async_iterator(self):
+		response = await self.async_client.get(self.url, { 'output': 'csv', 'fields': 'id,title' })
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		# Под ASGI синхронный итератор Django собрал бы в список целиком
+		self.assertTrue(response.is_async)
+		chunks = [chunk async for chunk in response.streaming_content]
+		self.assertEqual([chunk.count(b'\n') for chunk in chunks], [3, 2, 2])
+		self.assertTrue(chunks[0].startswith(b'id,title\r\n'))
+
+	def test_unknown_output(self):
+		response = self.client.get(self.url, { 'output': 'xml' })
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn('output', response.json())
+
+	def test_unauthenticated(self):
+		self.client.logout()
+		response = self.client.get(self.url)
+		self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
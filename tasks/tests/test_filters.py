@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.utils        import timezone
+from django.urls         import reverse
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task
+
+
+class TaskFilterTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.user1 = User.objects.create(username = 'FilterUser1', password = '12345')
+		self.user2 = User.objects.create(username = 'FilterUser2', password = '12345')
+
+		self.old_task = Task.objects.create(
+			title = 'Купить молоко',
+			description = 'Зайти в магазин после работы',
+			created_by = self.user1
+		)
+		self.done_task = Task.objects.create(
+			title = 'Написать отчёт',
+			is_completed = True,
+			created_by = self.user1
+		)
+		self.other_task = Task.objects.create(
+			title = 'Починить принтер',
+			description = 'Сломался лоток для бумаги',
+			created_by = self.user2
+		)
+
+		Task.objects.filter(pk = self.old_task.pk).update(created_at = timezone.now() - timedelta(days = 10))
+
+		self.tasks_url = reverse('task-list')
+		self.client.force_login(self.user1)
+
+	def get_ids(self, **params) -> list[int]:
+		response = self.client.get(self.tasks_url, params)
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		return [task['id'] for task in response.data['results']]
+
+
+	def test_filter_by_completion_and_owner(self):
+		self.assertEqual(self.get_ids(is_completed = 'false'), [self.old_task.pk, self.other_task.pk])
+		self.assertEqual(self.get_ids(created_by = self.user2.pk), [self.other_task.pk])
+		self.assertEqual(self.get_ids(created_by = self.user1.pk, is_completed = 'true'), [self.done_task.pk])
+
+	def test_filter_by_created_at_range(self):
+		border = (timezone.now() - timedelta(days = 1)).isoformat()
+
+		self.assertEqual(self.get_ids(created_before = border), [self.old_task.pk])
+		self.assertEqual(self.get_ids(created_after = border), [self.done_task.pk, self.other_task.pk])
+
+	def test_full_text_search(self):
+		# Поиск по словоформам: "магазин" -> "магазине", "принтер" -> "принтеры"
+		self.assertEqual(self.get_ids(search = 'магазине'), [self.old_task.pk])
+		self.assertEqual(self.get_ids(search = 'принтеры'), [self.other_task.pk])
+		self.assertEqual(self.get_ids(search = 'бумаги -принтер'), [])
+		self.assertEqual(len(self.get_ids(search = '   ')), 3)
+
+	def test_ordering_is_whitelisted(self):
+		self.assertEqual(
+			self.get_ids(ordering = '-created_at'),
+			[self.other_task.pk, self.done_task.pk, self.old_task.pk]
+		)
+
+		# Неизвестное поле игнорируется, остаётся сортировка по умолчанию
+		self.assertEqual(
+			self.get_ids(ordering = 'title'),
+			[self.old_task.pk, self.done_task.pk, self.other_task.pk]
+		)
+
+	def test_descending_pages(self):
+		response = self.client.get(self.tasks_url, { 'ordering': '-created_at', 'page_size': 2 })
+		ids = [task['id'] for task in response.data['results']]
+
+		response = self.client.get(response.data['next'])
+		ids += [task['id'] for task in response.data['results']]
+
+		self.assertEqual(ids, [self.other_task.pk, self.done_task.pk, self.old_task.pk])
+		self.assertIsNone(response.data['next'])
@@ -0,0 +1,197 @@
+from tempfile      import TemporaryDirectory
+from unittest      import mock
+from datetime      import timedelta
+from pathlib       import Path
+import os
+
+from django.core.management import call_command
+from django.test            import override_settings
+from django.utils           import timezone
+from django.urls            import reverse
+from rest_framework.test    import APITestCase
+from rest_framework         import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task, TaskImport
+from tasks                    import imports
+
+
+CSV = (
+	'title,description,is_completed\r\n'
+	'First,"multi\nline, ""quoted""",true\r\n'
+	',no title,false\r\n'
+	'Third,,\r\n'
+	'Fourth,tab\there,maybe\r\n'
+	'Fifth,back\\slash,0\r\n'
+)
+
+
+class TaskImportTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.media_root = TemporaryDirectory()
+		self.addCleanup(self.media_root.cleanup)
+
+		settings_override = override_settings(MEDIA_ROOT = self.media_root.name)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		self.owner = User.objects.create(username = 'Owner', password = '12345')
+		self.url = reverse('task-import-list')
+		self.client.force_login(self.owner)
+
+	def post(self, content: str, content_type: str = 'text/csv', **query):
+		url = f'{self.url}?input={query["input"]}' if query else self.url
+		return self.client.post(url, content.encode(), content_type = content_type)
+
+	def run_import(self, content: str, content_type: str = 'text/csv') -> dict:
+		"""Загрузка через API, выполнение воркером и отчёт импорта"""
+		response = self.post(content, content_type)
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		imports.run_pending_imports()
+		return self.client.get(reverse('task-import-detail', args = [response.json()['id']])).json()
+
+
+	def test_csv(self):
+		# Запрос только ставит импорт в очередь
+		response = self.post(CSV)
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		self.assertEqual(response.json()['status'], TaskImport.Status.PENDING)
+		self.assertFalse(Task.objects.exists())
+
+		imports.run_pending_imports()
+		data = self.client.get(reverse('task-import-detail', args = [response.json()['id']])).json()
+		self.assertEqual(data['status'], TaskImport.Status.DONE)
+		self.assertEqual((data['rows_processed'], data['created_count'], data['error_count']), (5, 3, 2))
+		self.assertEqual([error['row'] for error in data['errors']], [2, 4])
+		self.assertIn('title', data['errors'][0]['errors'])
+		self.assertIn('is_completed', data['errors'][1]['errors'])
+
+		tasks = Task.objects.order_by('id')
+		self.assertEqual(
+			list(tasks.values_list('title', 'description', 'is_completed', 'created_by')),
+			[
+				('First', 'multi\nline, "quoted"', True, self.owner.pk),
+				('Third', None, False, self.owner.pk),
+				('Fifth', 'back\\slash', False, self.owner.pk),
+			]
+		)
+		# search_vector считает БД и при COPY
+		self.assertEqual(Task.objects.filter(search_vector = 'Fifth').count(), 1)
+
+	def test_bulk_create_method_writes_the_same(self):
+		with override_settings(TASK_IMPORT = { 'METHOD': 'bulk_create' }):
+			self.run_import(CSV)
+		expected = list(Task.objects.order_by('id').values_list('title', 'description', 'is_completed'))
+
+		Task.objects.all().delete()
+		self.run_import(CSV)
+		self.assertEqual(list(Task.objects.order_by('id').values_list('title', 'description', 'is_completed')), expected)
+
+	def test_ndjson(self):
+		content = '{"title": "One", "is_completed": true}\n\nnot json\n[1]\n{"title": "Two", "id": 999}\n'
+		data = self.run_import(content, 'application/x-ndjson')
+
+		self.assertEqual((data['rows_processed'], data['created_count'], data['error_count']), (4, 2, 2))
+		self.assertEqual([error['row'] for error in data['errors']], [2, 3])
+		self.assertNotEqual(Task.objects.get(title = 'Two').pk, 999)
+
+	def test_export_round_trip(self):
+		Task.objects.create(title = 'Exported', description = 'a,\n"b"', is_completed = True, created_by = self.owner)
+		Task.objects.create(title = 'Empty', created_by = self.owner)
+		export = b''.join(self.client.get(reverse('task-export'), { 'output': 'csv' }).streaming_content)
+
+		Task.objects.all().delete()
+		self.assertEqual(self.run_import(export.decode())['error_count'], 0)
+		self.assertEqual(
+			list(Task.objects.order_by('id').values_list('title', 'description', 'is_completed')),
+			[('Exported', 'a,\n"b"', True), ('Empty', None, False)]
+		)
+
+	@override_settings(TASK_IMPORT = { 'BATCH_SIZE': 2, 'METHOD': 'bulk_create' })
+	def test_resume_after_failure(self):
+		write_tasks = imports.write_tasks
+		calls = []
+
+		def fail_second_batch(tasks):
+			calls.append(len(tasks))
+			if len(calls) == 2:
+				raise RuntimeError('connection lost')
+			return write_tasks(tasks)
+
+		with mock.patch.object(imports, 'write_tasks', fail_second_batch), self.assertRaises(RuntimeError):
+			self.run_import(CSV)
+
+		task_import = TaskImport.objects.get()
+		self.assertEqual(task_import.status, TaskImport.Status.FAILED)
+		# Вторая пачка откатилась вместе с контрольной точкой
+		self.assertEqual((task_import.rows_processed, task_import.created_count), (2, 1))
+		self.assertEqual(Task.objects.count(), 1)
+
+		# Упавший импорт воркер сам не повторяет
+		self.assertEqual(imports.run_pending_imports(), [])
+
+		response = self.client.post(reverse('task-import-resume', args = [task_import.pk]))
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		self.assertEqual(response.json()['status'], TaskImport.Status.PENDING)
+
+		task_import, = imports.run_pending_imports()
+		self.assertEqual((task_import.status, task_import.error_count), (TaskImport.Status.DONE, 2))
+		self.assertEqual(list(Task.objects.order_by('id').values_list('title', flat = True)), ['First', 'Third', 'Fifth'])
+
+		response = self.client.post(reverse('task-import-resume', args = [task_import.pk]))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+	def test_running_import_is_not_resumed_twice(self):
+		self.run_import(CSV)
+		task_import = TaskImport.objects.get()
+		task_import.status = TaskImport.Status.RUNNING
+		task_import.rows_processed = 0
+		task_import.save()
+
+		response = self.client.post(reverse('task-import-resume', args = [task_import.pk]))
+		self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+		# Без прогресса дольше STALE_AFTER импорт считается прерванным
+		TaskImport.objects.update(updated_at = timezone.now() - timedelta(hours = 1))
+		response = self.client.post(reverse('task-import-resume', args = [task_import.pk]))
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+	def test_invalid_requests(self):
+		self.assertEqual(self.post(CSV, 'text/plain').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.post('', 'text/csv').status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertEqual(self.post(CSV, 'text/plain', input = 'csv').status_code, status.HTTP_202_ACCEPTED)
+
+		with override_settings(TASK_IMPORT = { 'MAX_SIZE': 10 }):
+			self.assertEqual(self.post(CSV).status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+	def test_imports_of_other_users_are_hidden(self):
+		self.post(CSV)
+		task_import = TaskImport.objects.get()
+
+		self.client.force_login(User.objects.create(username = 'Other', password = '12345'))
+		self.assertEqual(self.client.get(self.url).json()['results'], [])
+		response = self.client.post(reverse('task-import-resume', args = [task_import.pk]))
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_command(self):
+		path = Path(self.media_root.name, 'tasks.csv')
+		path.write_text(CSV)
+
+		call_command('import_tasks', str(path), '--owner', 'Owner', stdout = open(os.devnull, 'w'), stderr = open(os.devnull, 'w'))
+		task_import = TaskImport.objects.get()
+		self.assertEqual((task_import.status, task_import.created_count), (TaskImport.Status.DONE, 3))
+
+		# Повторный запуск завершённого импорта ничего не добавляет
+		call_command('import_tasks', '--resume', str(task_import.pk), stdout = open(os.devnull, 'w'), stderr = open(os.devnull, 'w'))
+		self.assertEqual(Task.objects.count(), 3)
+
+	def test_command_runs_pending(self):
+		self.post(CSV)
+		self.post(CSV)
+
+		call_command('import_tasks', '--pending', stdout = open(os.devnull, 'w'), stderr = open(os.devnull, 'w'))
+		self.assertEqual(list(TaskImport.objects.values_list('status', flat = True)), [TaskImport.Status.DONE] * 2)
+		self.assertEqual(Task.objects.count(), 6)
@@ -0,0 +1,99 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.test.utils   import CaptureQueriesContext
+from django.urls         import reverse
+from django.db           import connection
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task
+
+
+class TaskPaginationTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.user = User.objects.create(
+			username = 'PaginatedUser',
+			password = '12345'
+		)
+
+		# created_at у всех одинаковый, чтобы проверить стабильность по id
+		self.tasks = Task.objects.bulk_create([
+			Task(title = f'Task {i}', created_by = self.user)
+			for i in range(7)
+		])
+		Task.objects.update(created_at = Task.objects.first().created_at)
+
+		self.tasks_url = reverse('task-list')
+		self.client.force_login(self.user)
+
+	def collect_pages(self, url: str) -> tuple[list[int], list[str]]:
+		ids, previous_links = [], []
+		while url:
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+			ids += [task['id'] for task in response.data['results']]
+			previous_links.append(response.data['previous'])
+			url = response.data['next']
+		return ids, previous_links
+
+
+	def test_pages_cover_all_tasks_in_order(self):
+		ids, previous_links = self.collect_pages(f'{self.tasks_url}?page_size=3')
+
+		self.assertEqual(ids, sorted(task.pk for task in self.tasks))
+		self.assertEqual(len(previous_links), 3)
+		self.assertIsNone(previous_links[0])
+
+	def test_previous_link(self):
+		first_page = self.client.get(f'{self.tasks_url}?page_size=3').data
+		second_page = self.client.get(first_page['next']).data
+		back = self.client.get(second_page['previous']).data
+
+		self.assertEqual(back['results'], first_page['results'])
+		self.assertIsNone(back['previous'])
+
+	def test_inserts_do_not_shift_pages(self):
+		first_page = self.client.get(f'{self.tasks_url}?page_size=3').data
+
+		Task.objects.create(title = 'Late task', created_by = self.user)
+
+		ids, _ = self.collect_pages(first_page['next'])
+		expected = sorted(task.pk for task in self.tasks)[3:]
+		self.assertEqual(ids[:len(expected)], expected)
+
+	def test_page_size_limits(self):
+		response = self.client.get(f'{self.tasks_url}?page_size=100000')
+		self.assertEqual(len(response.data['results']), 7)
+
+		response = self.client.get(f'{self.tasks_url}?page_size=-1')
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+	def test_tampered_cursor(self):
+		next_link = self.client.get(f'{self.tasks_url}?page_size=3').data['next']
+		cursor = parse_qs(urlparse(next_link).query)['cursor'][0]
+
+		response = self.client.get(self.tasks_url, { 'cursor': cursor[:-2] + 'xx' })
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+		response = self.client.get(f'{self.tasks_url}?cursor=garbage')
+		self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+	def test_keyset_is_row_comparison(self):
+		next_link = self.client.get(f'{self.tasks_url}?page_size=3').data['next']
+		with CaptureQueriesContext(connection) as context:
+			self.client.get(next_link)
+
+		# Сравнение строк - граница сканирования индекса, а не фильтр поверх него
+		sql = next(query['sql'] for query in context.captured_queries if 'FROM "tasks_task"' in query['sql'])
+		self.assertIn('("tasks_task"."created_at", "tasks_task"."id") >', sql)
+
+	def test_mixed_ordering_directions(self):
+		ids, _ = self.collect_pages(f'{self.tasks_url}?page_size=3&ordering=created_at,-id')
+		self.assertEqual(ids, sorted((task.pk for task in self.tasks), reverse = True))
+
+		ids, _ = self.collect_pages(f'{self.tasks_url}?page_size=3&ordering=-created_at')
+		self.assertEqual(ids, sorted((task.pk for task in self.tasks), reverse = True))
@@ -0,0 +1,64 @@
+from django.test.utils   import CaptureQueriesContext
+from django.urls         import reverse
+from django.test         import TestCase
+from django.db           import connection
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from users.cache              import user_cache
+from tasks.models             import Task
+
+
+class TaskQuerySetPermissionTest(TestCase):
+	def setUp(self):
+		self.owner   = User.objects.create(username = 'Owner',   password = '12345')
+		self.other   = User.objects.create(username = 'Other',   password = '12345')
+		self.manager = User.objects.create(username = 'Manager', password = '12345', role = User.Role.PROJECT_MANAGER)
+		self.staff   = User.objects.create(username = 'Staff',   password = '12345', is_staff = True)
+
+		self.owner_task = Task.objects.create(title = 'Owner task', created_by = self.owner)
+		self.other_task = Task.objects.create(title = 'Other task', created_by = self.other)
+
+	def test_editable_by(self):
+		self.assertQuerySetEqual(Task.objects.editable_by(self.owner), [self.owner_task])
+		self.assertQuerySetEqual(Task.objects.editable_by(self.manager), [self.owner_task, self.other_task], ordered = False)
+		self.assertQuerySetEqual(Task.objects.editable_by(self.staff), [self.owner_task, self.other_task], ordered = False)
+
+	def test_annotate_editable(self):
+		editable = dict(Task.objects.annotate_editable(self.owner).values_list('pk', 'user_can_edit'))
+		self.assertEqual(editable, { self.owner_task.pk: True, self.other_task.pk: False })
+
+		editable = dict(Task.objects.annotate_editable(self.manager).values_list('pk', 'user_can_edit'))
+		self.assertEqual(editable, { self.owner_task.pk: True, self.other_task.pk: True })
+
+	def test_visible_to(self):
+		self.assertEqual(Task.objects.visible_to(self.other).count(), 2)
+
+
+class TaskPermissionQueriesTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		user_cache.clear()
+
+		self.owner = User.objects.create(username = 'Owner', password = '12345')
+		self.other = User.objects.create(username = 'Other', password = '12345')
+		self.task  = Task.objects.create(title = 'Owner task', created_by = self.owner)
+
+	def test_forbidden_update_does_not_load_owner(self):
+		self.client.force_login(self.other)
+		# Прогрев кеша пользователей аутентификации
+		self.client.get(reverse('task-list'))
+
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.patch(
+				reverse('task-detail', args = [self.task.pk]),
+				{ 'title': 'Changed' },
+				content_type = 'application/json'
+			)
+
+		self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+		self.assertEqual(len(context.captured_queries), 1)
+		self.assertIn('user_can_edit', context.captured_queries[0]['sql'])
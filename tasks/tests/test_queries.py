@@ -0,0 +1,63 @@
+from django.test.utils   import CaptureQueriesContext
+from django.urls         import reverse
+from django.db           import connection
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.serializers        import TaskSerializer
+from tasks.optimization       import optimize_queryset
+from tasks.models             import Task
+
+
+class TaskQueryCountTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.users = [
+			User.objects.create(username = f'Owner{i}', password = '12345', email = f'owner{i}@mail.com')
+			for i in range(5)
+		]
+		Task.objects.bulk_create([
+			Task(title = f'Task {i}', created_by = self.users[i % len(self.users)])
+			for i in range(30)
+		])
+
+		self.tasks_url = reverse('task-list')
+		self.client.force_login(self.users[0])
+
+	def count_queries(self, url: str) -> int:
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		return len(context.captured_queries)
+
+
+	def test_list_query_count_does_not_depend_on_page_size(self):
+		# Прогрев кеша пользователей аутентификации
+		self.client.get(self.tasks_url)
+
+		small_page = self.count_queries(f'{self.tasks_url}?page_size=2')
+		large_page = self.count_queries(f'{self.tasks_url}?page_size=30')
+
+		self.assertEqual(small_page, large_page)
+		# аутентификация + сама страница
+		self.assertLessEqual(large_page, 2)
+
+	def test_retrieve_query_count(self):
+		task = Task.objects.first()
+		self.assertLessEqual(self.count_queries(reverse('task-detail', args = [task.pk])), 2)
+
+	def test_optimized_queryset_loads_only_serialized_owner_fields(self):
+		queryset = optimize_queryset(Task.objects.all(), TaskSerializer())
+		task = queryset.first()
+
+		self.assertEqual(task.get_deferred_fields(), { 'search_vector', 'attachment_sha256', 'attachment_filename' })
+		self.assertEqual(
+			task.created_by.get_deferred_fields(),
+			{ field.attname for field in User._meta.concrete_fields } - { 'id', 'username', 'email' }
+		)
+
+		with self.assertNumQueries(0):
+			TaskSerializer(task).data
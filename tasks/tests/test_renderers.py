@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipIf
+from decimal  import Decimal
+from io       import BytesIO
+import uuid
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers  import JSONRenderer
+from rest_framework.parsers    import JSONParser
+from django.utils              import timezone
+from django.test               import SimpleTestCase
+
+from TaskManager.renderers import FastJSONRenderer, FastJSONParser, orjson
+from tasks.serializers     import TaskSerializer
+from users.models          import User
+from tasks.models          import Task
+from TaskManager           import renderers
+
+
+class FastJSONRendererTest(SimpleTestCase):
+	def setUp(self):
+		owner = User(id = 1, username = 'Владелец', email = 'owner@mail.com')
+		self.data = {
+			'tasks': TaskSerializer([
+				Task(id = i, title = f'Задача {i} ', description = None, created_by = owner, created_at = timezone.now())
+				for i in range(3)
+			], many = True).data,
+			'role': User.Role.PROJECT_MANAGER.label, # lazy строка перевода
+			'roles': User.Role.choices,
+			'naive': datetime(2025, 1, 2, 3, 4, 5, 678),
+			'utc': datetime(2025, 1, 2, tzinfo = dt_timezone.utc),
+			'aware': datetime(2025, 1, 2, tzinfo = dt_timezone(timedelta(hours = 4))),
+			'date': datetime(2025, 1, 2).date(),
+			'uuid': uuid.UUID(int = 42),
+			'decimal': Decimal('1.50'),
+			'duration': timedelta(minutes = 90),
+			'errors': { 0: ['ошибка'], 2: { 'title': ['ошибка'] } },
+			'separators': 'a\u2028b\u2029c',
+		}
+
+	def assert_same_output(self, *args):
+		self.assertEqual(FastJSONRenderer().render(*args), JSONRenderer().render(*args))
+
+	def test_output_matches_json_renderer(self):
+		self.assert_same_output(self.data)
+		self.assert_same_output(None)
+		# Не влезает в 64 бита - отдаётся стандартному рендеру
+		self.assert_same_output({ 'big': 2 ** 70 })
+		self.assert_same_output(self.data, 'application/json; indent=4')
+
+	@skipIf(orjson is None, 'orjson is not installed')
+	def test_uses_orjson(self):
+		with mock.patch.object(renderers.orjson, 'dumps', wraps = orjson.dumps) as dumps:
+			FastJSONRenderer().render({ 'id': 1 })
+		dumps.assert_called_once()
+
+	def test_stdlib_fallback(self):
+		with mock.patch.object(renderers, 'orjson', None):
+			self.assert_same_output(self.data)
+			self.assertEqual(FastJSONParser().parse(BytesIO(b'{"id": 1}')), { 'id': 1 })
+
+
+class FastJSONParserTest(SimpleTestCase):
+	def test_parse(self):
+		content = '{"title": "Задача", "ids": [1, 2.5, null, true]}'.encode()
+		self.assertEqual(FastJSONParser().parse(BytesIO(content)), JSONParser().parse(BytesIO(content)))
+
+	def test_invalid_json(self):
+		for content in (b'{"title": ', b'{"value": NaN}'):
+			with self.subTest(content), self.assertRaises(ParseError):
+				FastJSONParser().parse(BytesIO(content))
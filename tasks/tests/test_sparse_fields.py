@@ -0,0 +1,65 @@
+from django.test.utils   import CaptureQueriesContext
+from django.urls         import reverse
+from django.db           import connection
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task
+
+
+class SparseFieldsetTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.owner = User.objects.create(username = 'Owner', password = '12345')
+		self.task = Task.objects.create(title = 'Task', description = 'Long description', created_by = self.owner)
+
+		self.list_url = reverse('task-list')
+		self.detail_url = reverse('task-detail', args = [self.task.pk])
+		self.client.force_login(self.owner)
+		# Прогрев кеша пользователей аутентификации
+		self.client.get(self.list_url)
+
+	def get(self, url: str, query: dict):
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(url, query)
+		self.sql = '\n'.join(query['sql'] for query in context.captured_queries)
+		return response
+
+
+	def test_fields(self):
+		for url in (self.list_url, self.detail_url):
+			with self.subTest(url):
+				response = self.get(url, { 'fields': 'id,title,is_completed' })
+				self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+				data = response.data['results'][0] if url == self.list_url else response.data
+				self.assertEqual(list(data), ['id', 'title', 'is_completed'])
+
+				# Ни лишних колонок, ни JOIN владельца
+				self.assertNotIn('"description"', self.sql)
+				self.assertNotIn('JOIN', self.sql)
+
+	def test_exclude(self):
+		for url in (self.list_url, self.detail_url):
+			with self.subTest(url):
+				response = self.get(url, { 'exclude': 'description,created_by' })
+
+				data = response.data['results'][0] if url == self.list_url else response.data
+				self.assertEqual(list(data), ['id', 'title', 'is_completed', 'created_at', 'attachment'])
+				self.assertNotIn('JOIN', self.sql)
+
+	def test_unknown_field(self):
+		response = self.client.get(self.list_url, { 'fields': 'id,secret' })
+
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+		self.assertIn('fields', response.data)
+
+	def test_write_ignores_fields(self):
+		# Иначе title молча не записался бы
+		response = self.client.patch(f'{self.detail_url}?fields=id', { 'title': 'Updated' })
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.data['title'], 'Updated')
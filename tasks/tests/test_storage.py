@@ -0,0 +1,115 @@
+from tempfile import TemporaryDirectory
+from pathlib  import Path
+import hashlib
+import time
+import os
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management         import call_command
+from django.test                    import TestCase, override_settings
+
+from users.models  import User
+from tasks.models  import Task
+
+
+class ContentAddressedStorageTest(TestCase):
+	def setUp(self):
+		self.media_root = TemporaryDirectory()
+		self.addCleanup(self.media_root.cleanup)
+
+		settings_override = override_settings(MEDIA_ROOT = self.media_root.name)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		self.user = User.objects.create(username = 'Owner', password = '12345')
+		self.content = b'same content' * 100
+		self.sha256 = hashlib.sha256(self.content).hexdigest()
+
+	def create_task(self, content: bytes, filename: str = 'Report.PDF') -> Task:
+		return Task.objects.create(
+			title = 'With attachment',
+			created_by = self.user,
+			attachment = SimpleUploadedFile(filename, content)
+		)
+
+	def blobs(self) -> list[Path]:
+		root = Path(self.media_root.name, 'attachments')
+		return sorted(path for path in root.rglob('*') if path.is_file() and '.partial' not in path.parts)
+
+	def age(self, path, seconds: int) -> None:
+		past = time.time() - seconds
+		os.utime(path, (past, past))
+
+	def gc(self, *args) -> None:
+		call_command('gc_attachments', *args, stdout = open(os.devnull, 'w'))
+
+
+	def test_identical_files_share_one_blob(self):
+		first  = self.create_task(self.content)
+		second = self.create_task(self.content, filename = 'copy.pdf')
+
+		self.assertEqual(first.attachment.name, f'attachments/{self.sha256[:2]}/{self.sha256[2:4]}/{self.sha256}.pdf')
+		self.assertEqual(first.attachment.name, second.attachment.name)
+		self.assertEqual(first.attachment_sha256, self.sha256)
+		self.assertEqual((first.attachment_filename, second.attachment_filename), ('Report.PDF', 'copy.pdf'))
+		self.assertEqual(len(self.blobs()), 1)
+
+	def test_delete_keeps_shared_blob(self):
+		first  = self.create_task(self.content)
+		second = self.create_task(self.content)
+
+		first.delete()
+		second.refresh_from_db()
+		self.assertEqual(second.attachment.read(), self.content)
+
+	def test_gc_deletes_only_old_unreferenced_blobs(self):
+		kept    = self.create_task(self.content)
+		deleted = self.create_task(b'deleted')
+		fresh   = self.create_task(b'fresh')
+
+		deleted_path, fresh_path = Path(deleted.attachment.path), Path(fresh.attachment.path)
+		deleted.delete()
+		fresh.delete()
+		for path in self.blobs():
+			self.age(path, 2 * 60 * 60)
+		self.age(fresh_path, 60) # например, только что переиспользован загрузкой
+
+		self.gc('--dry-run')
+		self.assertEqual(len(self.blobs()), 3)
+
+		self.gc()
+		self.assertEqual(self.blobs(), sorted([Path(kept.attachment.path), fresh_path]))
+		# Пустые каталоги шардов тоже удаляются
+		self.assertFalse(deleted_path.parent.exists())
+
+	def test_gc_deletes_unreferenced_legacy_files(self):
+		root = Path(self.media_root.name, 'attachments')
+		root.mkdir(parents = True)
+		kept, orphan = root / 'kept.pdf', root / 'orphan.pdf'
+		for path in (kept, orphan):
+			path.write_bytes(b'legacy')
+			self.age(path, 2 * 60 * 60)
+		# Имя из времён до хранения по хешу
+		Task.objects.filter(pk = self.create_task(self.content).pk).update(attachment = 'attachments/kept.pdf')
+
+		self.gc()
+		self.assertTrue(kept.exists())
+		self.assertFalse(orphan.exists())
+		self.assertTrue(root.exists())
+
+	def test_gc_deletes_stale_partial_uploads(self):
+		partial_dir = Path(self.media_root.name, 'attachments', '.partial')
+		partial_dir.mkdir(parents = True)
+		stale, active = partial_dir / '1', partial_dir / '2'
+		stale.write_bytes(b'stale')
+		active.write_bytes(b'active')
+		self.age(stale, 2 * 24 * 60 * 60)
+
+		# Параметры загрузок пишутся при старте и старше файла, который дописывается
+		orphan = partial_dir / '3.json'
+		for meta in (partial_dir / '1.json', partial_dir / '2.json', orphan):
+			meta.write_text('{}')
+			self.age(meta, 2 * 24 * 60 * 60)
+
+		self.gc()
+		self.assertEqual(sorted(partial_dir.iterdir()), [active, partial_dir / '2.json'])
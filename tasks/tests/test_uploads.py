@@ -0,0 +1,123 @@
+from tempfile import TemporaryDirectory
+from pathlib  import Path
+import hashlib
+
+from django.test         import override_settings
+from django.urls         import reverse
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User
+from tasks.models             import Task
+
+
+class TaskAttachmentUploadTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		self.media_root = TemporaryDirectory()
+		self.addCleanup(self.media_root.cleanup)
+
+		settings_override = override_settings(MEDIA_ROOT = self.media_root.name, TASK_ATTACHMENT_CHUNK_SIZE = 1024)
+		settings_override.enable()
+		self.addCleanup(settings_override.disable)
+
+		self.user  = User.objects.create(username = 'Uploader', password = '12345')
+		self.other = User.objects.create(username = 'Other', password = '12345')
+		self.task  = Task.objects.create(title = 'With attachment', created_by = self.user)
+
+		self.url = reverse('task-attachment', args = [self.task.pk])
+		self.content = bytes(range(256)) * 40 # 10 KiB
+		self.client.force_login(self.user)
+
+	def put(self, data: bytes, content_range: str | None = None, filename: str = 'report.bin'):
+		headers = { 'HTTP_CONTENT_DISPOSITION': f'attachment; filename="{filename}"' }
+		if content_range:
+			headers['HTTP_CONTENT_RANGE'] = content_range
+
+		return self.client.put(self.url, data, content_type = 'application/octet-stream', **headers)
+
+	def assert_attachment_saved(self):
+		sha256 = hashlib.sha256(self.content).hexdigest()
+
+		self.task.refresh_from_db()
+		self.assertEqual(self.task.attachment.name, f'attachments/{sha256[:2]}/{sha256[2:4]}/{sha256}.bin')
+		self.assertEqual(Path(self.task.attachment.path).read_bytes(), self.content)
+		self.assertEqual(self.task.attachment_sha256, sha256)
+		self.assertEqual(self.task.attachment_filename, 'report.bin')
+
+
+	def test_single_request_upload(self):
+		response = self.put(self.content)
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		# Ссылка на эндпоинт с проверкой доступа, а не на MEDIA_URL
+		self.assertEqual(response.data['attachment'], f'http://testserver{self.url}')
+		self.assert_attachment_saved()
+
+	def test_chunked_upload_with_resume(self):
+		total = len(self.content)
+
+		response = self.put(self.content[:4000], f'bytes 0-3999/{total}')
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		self.assertEqual(response.data, { 'received': 4000, 'total': total })
+
+		# Клиент "потерял" ответ и пробует не с того места
+		response = self.put(self.content[5000:], f'bytes 5000-{total - 1}/{total}')
+		self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+		self.assertEqual(response.data['received'], 4000)
+
+		response = self.put(self.content[4000:], f'bytes 4000-{total - 1}/{total}')
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		self.assert_attachment_saved()
+
+	def test_restart_from_zero(self):
+		total = len(self.content)
+		self.put(bytes(4000), f'bytes 0-3999/{total}')
+
+		# Запрос с байта 0 начинает загрузку заново, а не получает 409
+		response = self.put(self.content[:2000], f'bytes 0-1999/{total}')
+		self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+		self.assertEqual(response.data, { 'received': 2000, 'total': total })
+
+		response = self.put(self.content[2000:], f'bytes 2000-{total - 1}/{total}')
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		self.assert_attachment_saved()
+
+	def test_resume_with_other_parameters(self):
+		total = len(self.content)
+		self.put(self.content[:4000], f'bytes 0-3999/{total}')
+
+		response = self.put(self.content[4000:5000], f'bytes 4000-4999/{total + 1}')
+		self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+		response = self.put(self.content[4000:], f'bytes 4000-{total - 1}/{total}', filename = 'other.bin')
+		self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+		response = self.put(self.content[4000:], f'bytes 4000-{total - 1}/{total}')
+		self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+		self.assert_attachment_saved()
+
+	def test_size_limit(self):
+		with override_settings(TASK_ATTACHMENT_MAX_SIZE = 1000):
+			response = self.put(self.content)
+			self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+			response = self.put(self.content[:500], f'bytes 0-499/{len(self.content)}')
+			self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+		self.task.refresh_from_db()
+		self.assertFalse(self.task.attachment)
+
+	def test_invalid_headers(self):
+		response = self.put(self.content[:10], 'bytes 0-99/1000')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+		response = self.put(b'')
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+	def test_other_user_cannot_upload(self):
+		self.client.force_login(self.other)
+
+		response = self.put(self.content)
+		self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,84 @@
+from datetime import timezone as dt_timezone
+
+from hypothesis.extra.django import TestCase
+from hypothesis              import given, settings, strategies as st
+from rest_framework.test     import APIRequestFactory
+from rest_framework.request  import Request
+
+from TaskManager.renderers import FastJSONRenderer
+from tasks.serializers     import TaskSerializer, TaskValuesSerializer
+from users.models          import User
+from tasks.models          import Task
+
+
+# PostgreSQL не хранит NUL в строках, а суррогаты не кодируются в UTF-8
+_text = st.text(alphabet = st.characters(exclude_categories = ('Cs',), exclude_characters = '\x00'))
+
+_tasks = st.lists(
+	st.fixed_dictionaries({
+		'title':        _text.filter(lambda text: len(text) <= 255),
+		'description':  st.none() | _text,
+		'is_completed': st.booleans(),
+		'created_at':   st.datetimes(timezones = st.just(dt_timezone.utc)),
+		'attachment':   st.none() | st.just('') | st.from_regex(r'attachments/[a-f0-9]{2}/[\w .%-]{1,20}', fullmatch = True),
+		'owner':        st.integers(min_value = 0, max_value = 2),
+	}),
+	max_size = 8,
+)
+_owners = st.lists(
+	st.tuples(_text.filter(lambda text: len(text) <= 140), _text.filter(lambda text: len(text) <= 254)),
+	min_size = 3, max_size = 3,
+)
+
+# ?fields= - непустое подмножество полей
+_fields = st.none() | st.sets(st.sampled_from(TaskSerializer.Meta.fields), min_size = 1)
+
+
+class TaskValuesSerializerTest(TestCase):
+	def render_both(self, context: dict) -> tuple[bytes, bytes]:
+		queryset = Task.objects.order_by('created_at', 'id')
+		renderer = FastJSONRenderer()
+
+		expected = renderer.render(TaskSerializer(queryset, many = True, context = context).data)
+		values_serializer = TaskValuesSerializer(context = context)
+		actual = renderer.render(values_serializer.many(queryset.values(*values_serializer.values_fields)))
+		return expected, actual
+
+	@settings(max_examples = 60, deadline = None)
+	@given(owners = _owners, tasks = _tasks, with_request = st.booleans(), fields = _fields)
+	def test_output_matches_task_serializer(self, owners, tasks, with_request, fields):
+		users = [
+			User.objects.create(username = f'{i}{username}', email = email)
+			for i, (username, email) in enumerate(owners)
+		]
+		for item in tasks:
+			task = Task.objects.create(
+				title = item['title'],
+				description = item['description'],
+				is_completed = item['is_completed'],
+				created_by = users[item['owner']],
+				attachment = item['attachment'],
+			)
+			# auto_now_add не даёт задать created_at при создании
+			Task.objects.filter(pk = task.pk).update(created_at = item['created_at'])
+
+		context = {}
+		if with_request or fields:
+			query = { 'fields': ','.join(fields) } if fields else {}
+			context['request'] = Request(APIRequestFactory().get('/api/tasks/', query))
+
+		expected, actual = self.render_both(context)
+		self.assertEqual(actual, expected)
+
+	def test_fields_match_task_serializer(self):
+		# Новое поле в TaskSerializer должно появиться и в быстром пути
+		owner = User.objects.create(username = 'Owner')
+		Task.objects.create(title = 'Task', created_by = owner)
+
+		expected, actual = self.render_both({})
+		self.assertEqual(actual, expected)
+		values_serializer = TaskValuesSerializer()
+		self.assertEqual(
+			list(values_serializer.to_representation(Task.objects.values(*values_serializer.values_fields).get())),
+			list(TaskSerializer.Meta.fields)
+		)
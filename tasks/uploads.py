@@ -0,0 +1,199 @@
+from pathlib import Path
+import hashlib
+import json
+import re
+import os
+
+from django.utils.translation  import gettext_lazy as loc
+from django.core.exceptions    import SuspiciousFileOperation
+from django.utils.text         import get_valid_filename
+from django.utils.http         import parse_header_parameters
+from django.conf               import settings
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework            import status
+
+from tasks.storage import ContentAddressedStorage
+from tasks.models  import Task
+
+
+ATTACHMENTS_DIR = 'attachments'
+# Незавершённые загрузки: по одному файлу на задачу
+PARTIAL_UPLOADS_DIR = f'{ATTACHMENTS_DIR}/.partial'
+
+_CONTENT_RANGE_RE = re.compile(r'^bytes (?P<start>\d+)-(?P<end>\d+)/(?P<total>\d+)$')
+
+
+def get_max_attachment_size() -> int:
+	return getattr(settings, 'TASK_ATTACHMENT_MAX_SIZE', 100 * 1024 * 1024)
+
+def get_chunk_size() -> int:
+	return getattr(settings, 'TASK_ATTACHMENT_CHUNK_SIZE', 64 * 1024)
+
+
+class AttachmentTooLarge(APIException):
+	status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+	default_detail = loc('Attachment is too large.')
+	default_code = 'attachment_too_large'
+
+
+class UploadOffsetMismatch(APIException):
+	"""
+	Чанк начинается не с того места, где остановилась загрузка.
+	В ответе `received` - сколько байт уже есть на сервере, с этого места и нужно продолжать
+	"""
+	status_code = status.HTTP_409_CONFLICT
+	default_code = 'upload_offset_mismatch'
+
+	def __init__(self, received: int):
+		self.received = received
+		super().__init__(loc('Upload must continue from byte {received}.').format(received = received))
+		# Число, а не строка ошибки - клиент сразу продолжает с этого байта
+		self.detail = { 'detail': self.detail, 'received': received }
+
+
+class UploadParametersMismatch(APIException):
+	"""
+	Продолжение загрузки с другим размером или именем файла, чем у начатой.
+	Загрузку нужно начать заново с байта 0
+	"""
+	status_code = status.HTTP_409_CONFLICT
+	default_detail = loc('Upload was started with a different total size or filename. Restart it from byte 0.')
+	default_code = 'upload_parameters_mismatch'
+
+
+class ChunkedAttachmentUpload:
+	"""
+	Потоковая загрузка вложения задачи сразу в `MEDIA_ROOT/attachments/`.<br>
+	Тело запроса читается чанками фиксированного размера, SHA-256 считается
+	по ходу записи, так что память воркера не зависит от размера файла.<br>
+	Большой файл можно отправить несколькими запросами с `Content-Range`
+	и продолжить после обрыва связи. Рядом с незавершённым файлом лежит
+	`<id>.json` с заявленными размером и именем: продолжение с другими отклоняется,
+	а запрос с байта 0 начинает загрузку заново
+	"""
+	def __init__(self, task: Task):
+		self.task = task
+		self.storage: ContentAddressedStorage = task.attachment.storage
+		self.partial_path = Path(self.storage.path(f'{PARTIAL_UPLOADS_DIR}/{task.pk}'))
+		self.meta_path = self.partial_path.with_suffix('.json')
+		self.hasher = None
+
+	@property
+	def received(self) -> int:
+		try:
+			return self.partial_path.stat().st_size
+		except FileNotFoundError:
+			return 0
+
+
+	def get_meta(self) -> dict | None:
+		try:
+			return json.loads(self.meta_path.read_text())
+		except (FileNotFoundError, ValueError):
+			return None
+
+
+	def write(self, stream, start: int, length: int, total: int, filename: str) -> bool:
+		"""
+		Дописывает `length` байт из `stream` с позиции `start`.
+		Возвращает True, если файл получен целиком
+		"""
+		if total > get_max_attachment_size():
+			raise AttachmentTooLarge()
+		if start + length > total:
+			raise ParseError(loc('Invalid Content-Range.'))
+
+		meta = { 'total': total, 'filename': filename }
+		if start == 0:
+			# Начало файла - новая загрузка, незавершённая перезаписывается
+			self.partial_path.parent.mkdir(parents = True, exist_ok = True)
+			self.meta_path.write_text(json.dumps(meta))
+		else:
+			if start != self.received:
+				raise UploadOffsetMismatch(self.received)
+			if self.get_meta() != meta:
+				raise UploadParametersMismatch()
+
+		# Хеш по ходу записи возможен, только если файл пишется с начала
+		self.hasher = hashlib.sha256() if start == 0 else None
+
+		chunk_size, written = get_chunk_size(), 0
+		with open(self.partial_path, 'wb' if start == 0 else 'ab') as file:
+			while written < length:
+				chunk = stream.read(min(chunk_size, length - written)) if stream else b''
+				if not chunk:
+					break
+
+				file.write(chunk)
+				if self.hasher is not None:
+					self.hasher.update(chunk)
+				written += len(chunk)
+
+		if written != length:
+			# Записанное остаётся - загрузку можно продолжить с self.received
+			self.hasher = None
+			raise ParseError(loc('Request body ended before Content-Length bytes were received.'))
+
+		if start + length < total:
+			# Следующий запрос продолжит файл, посчитанный хеш уже не пригодится
+			self.hasher = None
+			return False
+		return True
+
+	def finalize(self, filename: str) -> tuple[str, str]:
+		"""
+		Отдаёт полученный файл в storage вложений. Возвращает имя блоба и SHA-256
+		"""
+		if self.hasher is None:
+			# Файл пришёл несколькими запросами - один потоковый проход по нему
+			self.hasher = _hash_file(self.partial_path, get_chunk_size())
+
+		sha256 = self.hasher.hexdigest()
+		name = self.storage.adopt(self.partial_path, f'{ATTACHMENTS_DIR}/{filename}', sha256)
+		self.meta_path.unlink(missing_ok = True)
+		return name, sha256
+
+
+def parse_upload_headers(meta: dict) -> tuple[str, int, int, int]:
+	"""
+	Возвращает `(filename, start, length, total)` по заголовкам запроса:
+	`Content-Length`, `Content-Range: bytes start-end/total` (необязателен)
+	и `Content-Disposition: attachment; filename="..."`
+	"""
+	try:
+		length = int(meta.get('CONTENT_LENGTH') or 0)
+	except ValueError:
+		raise ParseError(loc('Invalid Content-Length.'))
+
+	content_range = meta.get('HTTP_CONTENT_RANGE')
+	if content_range:
+		match = _CONTENT_RANGE_RE.match(content_range.strip())
+		if not match:
+			raise ParseError(loc('Invalid Content-Range.'))
+
+		start, end, total = (int(match[group]) for group in ('start', 'end', 'total'))
+		if end < start or end - start + 1 != length:
+			raise ParseError(loc('Content-Range does not match Content-Length.'))
+	else:
+		start, total = 0, length
+
+	if total > get_max_attachment_size():
+		raise AttachmentTooLarge()
+	if length == 0:
+		raise ParseError(loc('Empty attachment.'))
+
+	_, params = parse_header_parameters(meta.get('HTTP_CONTENT_DISPOSITION', ''))
+	try:
+		filename = get_valid_filename(os.path.basename(params.get('filename', '')))
+	except SuspiciousFileOperation:
+		filename = 'attachment'
+
+	return filename, start, length, total
+
+
+def _hash_file(path: Path, chunk_size: int):
+	hasher = hashlib.sha256()
+	with open(path, 'rb') as file:
+		while chunk := file.read(chunk_size):
+			hasher.update(chunk)
+	return hasher
@@ -1,12 +1,15 @@
 from django.urls import path, include
-from rest_framework.routers import SimpleRouter, DefaultRouter
+from rest_framework.routers import DefaultRouter
 
 from tasks import views
 
 
 api_router = DefaultRouter()
+# Список задач отдаётся постранично через KeysetCursorPagination (?cursor=&page_size=)
 api_router.register('tasks', views.TaskViewSet, basename = 'task')
+# Импорт задач из CSV/NDJSON с отчётом и продолжением после прерывания
+api_router.register('task-imports', views.TaskImportViewSet, basename = 'task-import')
 
 urlpatterns = [
     path('api/', include(api_router.urls))
-]
\ No newline at end of file
+]
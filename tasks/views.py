@@ -1,15 +1,317 @@
-from rest_framework.viewsets import ModelViewSet
+from django.utils.translation      import gettext_lazy as loc
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.permissions    import SAFE_METHODS, IsAuthenticated
+from rest_framework.exceptions     import NotFound, PermissionDenied, ValidationError
+from rest_framework.mixins         import ListModelMixin, RetrieveModelMixin
+from rest_framework.fields         import IntegerField
+from rest_framework.decorators     import action
+from rest_framework.viewsets       import GenericViewSet, ModelViewSet
+from rest_framework.response       import Response
+from rest_framework.settings       import api_settings
+from rest_framework.request        import Request
+from rest_framework.filters        import OrderingFilter
+from rest_framework                import status
+from django.core.handlers.asgi     import ASGIRequest
+from django.http.request           import HttpRequest
+from django.db                     import transaction
 
-from tasks.permissions import IsAuthenticatedAndIsReadOnlyOrOwnerOrProjectManagerOrStaff
-from tasks.serializers import TaskSerializer
-from tasks.models      import Task
+from TaskManager.async_views import AsyncViewSetMixin
 
+from tasks.optimization import ValuesListMixin, optimize_queryset
+from tasks.permissions  import IsAuthenticatedAndIsReadOnlyOrOwnerOrProjectManagerOrStaff
+from tasks.serializers  import TaskSerializer, TaskValuesSerializer, TaskImportSerializer, BULK_MAX_ITEMS
+from tasks.pagination   import KeysetCursorPagination
+from tasks.downloads    import build_attachment_response
+from tasks.exports      import (
+	EXPORT_FORMATS, EXPORT_QUERY_PARAM,
+	CSVRenderer, NDJSONRenderer, build_export_response
+)
+from tasks.caching      import CachedTaskResponseMixin, deferred_invalidation
+from tasks.uploads      import ChunkedAttachmentUpload, parse_upload_headers
+from tasks.imports      import ImportTooLarge, create_import, detect_format, get_max_import_size, queue_import
+from tasks.filters      import TaskFilterSet
+from tasks.models       import Task, TaskImport
+from users.models       import User
 
-class TaskViewSet(ModelViewSet):
-	queryset = Task.objects.all().order_by('created_at')
+
+# list/retrieve/create под ASGI асинхронные (alist/aretrieve/acreate, см. TaskManager.async_views)
+class TaskViewSet(CachedTaskResponseMixin, ValuesListMixin, AsyncViewSetMixin, ModelViewSet):
+	queryset = Task.objects.all().order_by('created_at', 'id')
 	serializer_class = TaskSerializer
+	# list строится из .values() без ModelSerializer (тот же JSON, что у TaskSerializer)
+	values_serializer_class = TaskValuesSerializer
+	values_list_actions = ('list', 'export')
 	permission_classes = [IsAuthenticatedAndIsReadOnlyOrOwnerOrProjectManagerOrStaff]
+	pagination_class = KeysetCursorPagination
+
+	filter_backends = [DjangoFilterBackend, OrderingFilter]
+	filterset_class = TaskFilterSet
+	# Только колонки с индексом (task_created_idx и первичный ключ)
+	ordering_fields = ('created_at', 'id')
+	ordering = ('created_at',)
+	# Поля сортировки пагинации должны быть загружены, даже если их нет в сериализаторе
+	optimization_extra_fields = KeysetCursorPagination.ordering
+
+	def get_optimization_extra_fields(self) -> tuple[str, ...]:
+		# Хеш вложения нужен для ETag, исходное имя - для Content-Disposition
+		if self.action == 'download_attachment':
+			return self.optimization_extra_fields + ('attachment_sha256', 'attachment_filename')
+		return self.optimization_extra_fields
+
+	def get_queryset(self):
+		user = self.request.user
+		queryset = super().get_queryset().visible_to(user)
+
+		# Право на изменение решает БД, а не сравнение объектов в Python
+		if self.request.method not in SAFE_METHODS:
+			queryset = queryset.annotate_editable(user)
+
+		return queryset
 
 	def perform_create(self, serializer: TaskSerializer):
-		serializer.validated_data['created_by'] = self.request.user
-		serializer.save()
+		user = self.request.user
+		# В stateless режиме JWT request.user - не модель, а пользователь из токена
+		if isinstance(user, User):
+			serializer.save(created_by = user)
+		else:
+			serializer.save(created_by_id = user.pk)
+
+	async def aperform_create(self, serializer: TaskSerializer):
+		# Файл вложения пишется в storage синхронно - как и раньше, в потоке
+		if serializer.validated_data.get('attachment'):
+			return await super().aperform_create(serializer)
+
+		user = self.request.user
+		# Владелец нужен в ответе: в async коде ленивой загрузки связи быть не может
+		owner = user if isinstance(user, User) else await User.objects.aget(pk = user.pk)
+		serializer.instance = await Task.objects.acreate(created_by = owner, **serializer.validated_data)
+
+
+	# MARK: Attachment
+	@action(detail = True, methods = ['put'], url_path = 'attachment', url_name = 'attachment')
+	def upload_attachment(self, request: Request | HttpRequest, pk = None):
+		"""
+		Тело запроса - сырое содержимое файла (не multipart), имя файла -
+		в `Content-Disposition`. Большие файлы можно слать частями с `Content-Range`:
+		на промежуточные части ответ 202 с количеством полученных байт
+		"""
+		task: Task = self.get_object()
+		filename, start, length, total = parse_upload_headers(request.META)
+
+		upload = ChunkedAttachmentUpload(task)
+		if not upload.write(request.stream, start, length, total, filename):
+			return Response({ 'received': upload.received, 'total': total }, status = status.HTTP_202_ACCEPTED)
+
+		task.attachment.name, task.attachment_sha256 = upload.finalize(filename)
+		task.attachment_filename = filename
+		task.save(update_fields = ['attachment', 'attachment_sha256', 'attachment_filename'])
+
+		return Response(self.get_serializer(task).data)
+
+	@upload_attachment.mapping.get
+	def download_attachment(self, request: Request | HttpRequest, pk = None):
+		task: Task = self.get_object()
+		if not task.attachment:
+			raise NotFound(loc('Task has no attachment.'))
+
+		return build_attachment_response(request, task)
+
+
+	# MARK: Export
+	@action(
+		detail = False, methods = ['get'], url_path = 'export', url_name = 'export',
+		renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer, CSVRenderer],
+	)
+	def export(self, request: Request | HttpRequest):
+		"""
+		Все видимые задачи без пагинации, построчно: `?output=ndjson` (по умолчанию)
+		или `?output=csv`. Фильтры, сортировка и `?fields=` - как у списка
+		"""
+		accepted_format = request.accepted_renderer.format
+		output = request.query_params.get(EXPORT_QUERY_PARAM) or (
+			accepted_format if accepted_format in EXPORT_FORMATS else EXPORT_FORMATS[0]
+		)
+		if output not in EXPORT_FORMATS:
+			raise ValidationError({ EXPORT_QUERY_PARAM: [
+				loc('Unknown export format: {output}. Available: {formats}.').format(
+					output = output, formats = ', '.join(EXPORT_FORMATS)
+				)
+			]})
+
+		serializer = self.values_serializer_class(context = self.get_serializer_context())
+		return build_export_response(
+			self.filter_queryset(self.get_queryset()), serializer, output,
+			asynchronous = isinstance(request._request, ASGIRequest),
+		)
+
+
+	# MARK: Bulk
+	# Ответ выровнен по индексам запроса: при ошибке хотя бы в одном элементе
+	# ничего не записывается, и возвращается 400 с `errors[i]` для каждого элемента
+	@action(detail = False, methods = ['post'], url_path = 'bulk', url_name = 'bulk')
+	def bulk_create(self, request: Request | HttpRequest):
+		if (error := _check_bulk_payload(request.data)):
+			return error
+
+		user = self.request.user
+		owner = user if isinstance(user, User) else User.objects.get(pk = user.pk)
+
+		serializer = self.get_serializer(data = request.data, many = True)
+		if not serializer.is_valid():
+			return _bulk_errors_response(_get_list_errors(serializer, len(request.data)))
+
+		tasks = serializer.save(created_by = owner)
+		return Response(self.get_serializer(tasks, many = True).data, status = status.HTTP_201_CREATED)
+
+	@bulk_create.mapping.patch
+	def bulk_update(self, request: Request | HttpRequest):
+		if (error := _check_bulk_payload(request.data)):
+			return error
+
+		ids, errors = _get_bulk_ids(request.data)
+		tasks = {
+			task.pk: task
+			for task in optimize_queryset(Task.objects.editable_by(request.user), TaskSerializer()).filter(pk__in = ids)
+		}
+		errors = _merge_errors(errors, _get_access_errors(ids, tasks.keys()))
+		if any(errors):
+			return _bulk_errors_response(errors)
+
+		serializer = self.get_serializer(tasks, data = request.data, many = True, partial = True)
+		if not serializer.is_valid():
+			return _bulk_errors_response(_get_list_errors(serializer, len(request.data)))
+
+		return Response(self.get_serializer(serializer.save(), many = True).data)
+
+	@bulk_create.mapping.delete
+	def bulk_destroy(self, request: Request | HttpRequest):
+		if (error := _check_bulk_payload(request.data)):
+			return error
+
+		ids, errors = _get_bulk_ids(request.data)
+		editable = set(Task.objects.editable_by(request.user).filter(pk__in = ids).values_list('pk', flat = True))
+		errors = _merge_errors(errors, _get_access_errors(ids, editable))
+		if any(errors):
+			return _bulk_errors_response(errors)
+
+		# post_delete каждой задачи не ходит в кеш - версии сдвигаются один раз
+		with deferred_invalidation(), transaction.atomic():
+			Task.objects.filter(pk__in = ids).delete()
+
+		return Response([{ 'id': pk, 'deleted': True } for pk in ids])
+
+
+class TaskImportViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
+	"""
+	Импорт задач из файла. Тело POST - сам файл (не multipart), формат - по
+	`Content-Type` (`text/csv`, `application/x-ndjson`) или `?input=csv|ndjson`.
+	Ответ 202 - импорт поставлен в очередь, его выполняет `import_tasks --pending`
+	вне запроса. Отчёт с ошибками по номерам строк - в `GET .../<id>/`.<br>
+	Прерванный импорт снова ставится в очередь и продолжается с контрольной
+	точки: `POST .../<id>/resume/`
+	"""
+	serializer_class = TaskImportSerializer
+	permission_classes = [IsAuthenticated]
+	pagination_class = KeysetCursorPagination
+
+	def get_queryset(self):
+		return TaskImport.objects.filter(created_by_id = self.request.user.pk)
+
+	def create(self, request: Request | HttpRequest):
+		format = request.query_params.get('input') or detect_format(content_type = request.content_type)
+		if format not in TaskImport.Format.values:
+			raise ValidationError({ 'input': [
+				loc('Unknown import format. Available: {formats}.').format(formats = ', '.join(TaskImport.Format.values))
+			]})
+
+		try:
+			length = int(request.META.get('CONTENT_LENGTH') or 0)
+		except ValueError:
+			length = 0
+		if length <= 0:
+			raise ValidationError({ api_settings.NON_FIELD_ERRORS_KEY: [loc('The import file is empty.')] })
+		if length > get_max_import_size():
+			raise ImportTooLarge()
+
+		task_import = create_import(request.stream, f'import.{format}', format, request.user)
+		return Response(self.get_serializer(task_import).data, status = status.HTTP_202_ACCEPTED)
+
+	@action(detail = True, methods = ['post'])
+	def resume(self, request: Request | HttpRequest, pk = None):
+		task_import: TaskImport = self.get_object()
+		if task_import.status == TaskImport.Status.DONE:
+			return Response(self.get_serializer(task_import).data)
+
+		queue_import(task_import)
+		return Response(self.get_serializer(task_import).data, status = status.HTTP_202_ACCEPTED)
+
+
+def _check_bulk_payload(data) -> Response | None:
+	if not isinstance(data, list) or not data:
+		message = loc('Expected a non-empty list of items.')
+	elif len(data) > BULK_MAX_ITEMS:
+		message = loc('Ensure this list has no more than {max_length} items.').format(max_length = BULK_MAX_ITEMS)
+	else:
+		return None
+
+	return Response({ api_settings.NON_FIELD_ERRORS_KEY: [message] }, status = status.HTTP_400_BAD_REQUEST)
+
+
+def _get_bulk_ids(items: list) -> tuple[list, list[dict]]:
+	"""
+	Элементы update/delete - объекты с `id` или просто id.<br>
+	Вместо некорректного id (не int) в списке None, ошибка - в errors
+	"""
+	ids, errors, seen = [], [], set()
+
+	for item in items:
+		pk = item.get('id') if isinstance(item, dict) else item
+		error = {}
+
+		if not isinstance(pk, int) or isinstance(pk, bool):
+			# Может быть и нехешируемым (список, объект)
+			error = { 'id': [IntegerField.default_error_messages['invalid']] }
+			pk = None
+		elif pk in seen:
+			error = { 'id': [loc('Duplicate task id in request.')] }
+		else:
+			seen.add(pk)
+
+		ids.append(pk)
+		errors.append(error)
+
+	return ids, errors
+
+
+def _get_access_errors(ids: list, editable_ids) -> list[dict]:
+	missing = { pk for pk in ids if pk is not None } - set(editable_ids)
+	existing = set(Task.objects.filter(pk__in = missing).values_list('pk', flat = True)) if missing else set()
+
+	errors = []
+	for pk in ids:
+		if pk is None:
+			# Ошибка уже в _get_bulk_ids
+			errors.append({})
+		elif pk in existing:
+			errors.append({ 'id': [PermissionDenied.default_detail] })
+		elif pk in missing:
+			errors.append({ 'id': [NotFound.default_detail] })
+		else:
+			errors.append({})
+	return errors
+
+
+def _merge_errors(first: list[dict], second: list[dict]) -> list[dict]:
+	return [a or b for a, b in zip(first, second)]
+
+
+def _get_list_errors(serializer: TaskSerializer, count: int) -> list[dict]:
+	# В зависимости от LIST_SERIALIZER_ERRORS_AS_DICT ошибки DRF - список или {индекс: ошибки}
+	errors = serializer.errors
+	if isinstance(errors, dict):
+		return [errors.get(index, {}) for index in range(count)]
+	return list(errors)
+
+
+def _bulk_errors_response(errors: list[dict]) -> Response:
+	return Response({ 'errors': errors }, status = status.HTTP_400_BAD_REQUEST)
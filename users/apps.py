@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import get_default_password_validators
+        from users.tokens import check_stateless_mode
+        from users import signals # noqa: F401
+
+        check_stateless_mode()
+
+        # Валидаторы паролей (и список частых паролей) создаются при старте, а не в первой регистрации
+        get_default_password_validators()
@@ -1,7 +1,23 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.http.request import HttpRequest
+from rest_framework_simplejwt.exceptions     import AuthenticationFailed
+from rest_framework_simplejwt.settings       import api_settings
+from rest_framework_simplejwt.tokens         import Token
+from rest_framework_simplejwt.utils          import get_md5_hash_password
+from django.utils.translation                import gettext_lazy as loc
+from django.http.request                     import HttpRequest
 
-from users import local_settings
+from users.models import User as _User # для аннотации
+from users.tokens import (
+	TOKEN_VERSION_CLAIM,
+	ClaimsTokenUser,
+	is_stateless_mode,
+	remember_token_version,
+	aremember_token_version,
+	get_published_token_version,
+	aget_published_token_version,
+)
+from users.cache  import user_cache
+from users        import local_settings
 
 class JWTFromCookiesAuthentication(JWTAuthentication):
 	def authenticate(self, request: HttpRequest):
@@ -11,4 +27,110 @@ class JWTFromCookiesAuthentication(JWTAuthentication):
 			return None
 		
 		validated_token = self.get_validated_token(raw_token.encode())
-		return self.get_user(validated_token), validated_token
\ No newline at end of file
+		return self.get_user(validated_token), validated_token
+
+	def get_user(self, validated_token: Token) -> _User | ClaimsTokenUser:
+		user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+		if user_id is None:
+			# super() выбросит InvalidToken
+			return super().get_user(validated_token)
+
+		# Токены, выданные до включения режима, claims не содержат - идут в БД
+		if is_stateless_mode() and TOKEN_VERSION_CLAIM in validated_token:
+			return self.get_token_user(user_id, validated_token)
+
+		user = user_cache.get(user_id)
+		if user is None:
+			user = super().get_user(validated_token)
+			user_cache.set(user_id, user)
+			return user
+
+		self.check_user(user, validated_token)
+		return user
+
+	def check_user(self, user: _User, validated_token: Token) -> None:
+		# Те же проверки, что делает super().get_user() после запроса к БД
+		if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+			raise AuthenticationFailed(loc('User is inactive'), code = 'user_inactive')
+
+		if api_settings.CHECK_REVOKE_TOKEN and \
+			validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+			raise AuthenticationFailed(loc("The user's password has been changed."), code = 'password_changed')
+
+	def get_token_user(self, user_id, validated_token: Token) -> ClaimsTokenUser:
+		"""
+		Stateless режим: пользователь собирается из claims токена, без БД.<br>
+		Если после выдачи токена у пользователя сменилась роль или права
+		(в том числе is_active), его token_version уже опубликована в кеше -
+		такой токен не принимается. Версии нет в кеше (вытеснена, истекла) -
+		она читается из БД вместе с is_active и публикуется снова
+		"""
+		version = get_published_token_version(user_id)
+		if version is None:
+			version = self.check_token_user(self.get_token_user_row(user_id).first())
+			remember_token_version(user_id, version)
+
+		if validated_token[TOKEN_VERSION_CLAIM] < version:
+			raise AuthenticationFailed(loc('Token is outdated, refresh it.'), code = 'token_outdated')
+
+		return ClaimsTokenUser(validated_token)
+
+	def get_token_user_row(self, user_id):
+		return self.user_model.objects.filter(**{ api_settings.USER_ID_FIELD: user_id }).values('token_version', 'is_active')
+
+	def check_token_user(self, row: dict | None) -> int:
+		"""Проверки `check_user()` по строке из БД, возвращает token_version"""
+		if row is None:
+			raise AuthenticationFailed(loc('User not found'), code = 'user_not_found')
+		if api_settings.CHECK_USER_IS_ACTIVE and not row['is_active']:
+			raise AuthenticationFailed(loc('User is inactive'), code = 'user_inactive')
+		return row['token_version']
+
+
+	# MARK: Async
+	# Для асинхронных представлений (см. TaskManager.async_views): проверка
+	# подписи токена - только CPU, кеш и БД опрашиваются через async API
+	async def aauthenticate(self, request: HttpRequest):
+		raw_token = request.COOKIES.get(local_settings.ACCESS_TOKEN_COOKIE_NAME)
+
+		if raw_token is None:
+			return None
+
+		validated_token = self.get_validated_token(raw_token.encode())
+		return await self.aget_user(validated_token), validated_token
+
+	async def aget_user(self, validated_token: Token) -> _User | ClaimsTokenUser:
+		user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+		if user_id is None:
+			# super() выбросит InvalidToken, не обращаясь к БД
+			return super().get_user(validated_token)
+
+		if is_stateless_mode() and TOKEN_VERSION_CLAIM in validated_token:
+			return await self.aget_token_user(user_id, validated_token)
+
+		user = await user_cache.aget(user_id)
+		if user is None:
+			try:
+				user = await self.user_model.objects.aget(**{ api_settings.USER_ID_FIELD: user_id })
+			except self.user_model.DoesNotExist:
+				raise AuthenticationFailed(loc('User not found'), code = 'user_not_found')
+
+			self.check_user(user, validated_token)
+			await user_cache.aset(user_id, user)
+			return user
+
+		self.check_user(user, validated_token)
+		return user
+
+	async def aget_token_user(self, user_id, validated_token: Token) -> ClaimsTokenUser:
+		# < Как get_token_user(), но через async API кеша и БД >
+		version = await aget_published_token_version(user_id)
+		if version is None:
+			version = self.check_token_user(await self.get_token_user_row(user_id).afirst())
+			await aremember_token_version(user_id, version)
+
+		if validated_token[TOKEN_VERSION_CLAIM] < version:
+			raise AuthenticationFailed(loc('Token is outdated, refresh it.'), code = 'token_outdated')
+
+		return ClaimsTokenUser(validated_token)
+		# </>
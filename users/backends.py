@@ -0,0 +1,30 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth          import get_user_model
+
+from users.hashers import acheck_user_password, run_hashing
+from users.models  import User as _User # для аннотации
+
+User: type[_User] = get_user_model()
+
+
+class HashingPoolModelBackend(ModelBackend):
+	"""
+	ModelBackend, у которого асинхронная аутентификация считает хеш пароля
+	в пуле `users.hashers`, а не в event loop (как `user.acheck_password()`)
+	"""
+	async def aauthenticate(self, request, username = None, password = None, **kwargs):
+		# < Как ModelBackend.aauthenticate() >
+		if username is None:
+			username = kwargs.get(User.USERNAME_FIELD)
+		if username is None or password is None:
+			return
+		try:
+			user = await User._default_manager.aget_by_natural_key(username)
+		except User.DoesNotExist:
+			# Хешируем и для несуществующего пользователя, чтобы время ответа не
+			# выдавало, есть ли такой username
+			await run_hashing(User().set_password, password)
+		else:
+			if await acheck_user_password(user, password) and self.user_can_authenticate(user):
+				return user
+		# </>
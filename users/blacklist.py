@@ -0,0 +1,293 @@
+from functools import partial
+from hashlib   import blake2b
+from threading import Lock, Thread
+import secrets
+import math
+import time
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from django.core.cache.backends.locmem               import LocMemCache
+from django.core.cache.backends.dummy                import DummyCache
+from django.core.exceptions                          import ImproperlyConfigured
+from django.db.models                                import QuerySet
+from django.core.cache                               import caches
+from django.utils                                    import timezone
+from django.conf                                     import settings
+from django.db                                       import connections, transaction
+
+__all__ = [
+	'BloomFilter',
+	'TokenBlacklistFilter',
+	'token_blacklist',
+	'blacklist_outstanding',
+]
+
+_DEFAULTS = {
+	# Только с общим для всех процессов кешем (см. TokenBlacklistFilter)
+	'ENABLED':             False,
+	'FALSE_POSITIVE_RATE': 0.001,
+	# Раз в столько секунд фильтр строится заново: уходят истёкшие jti
+	'REBUILD_INTERVAL':    10 * 60,
+	# Больше стольких новых поколений за раз не догружается - фильтр строится заново
+	'MAX_CATCHUP':         1_000,
+}
+
+
+class BloomFilter:
+	"""
+	Множество строк без ложноотрицательных ответов: `in` может ошибиться
+	только в сторону "есть" с вероятностью `false_positive_rate`
+	(пока добавлено не больше `capacity` строк)
+	"""
+	def __init__(self, capacity: int, false_positive_rate: float):
+		self.capacity = max(capacity, 1)
+		self.size = max(8, math.ceil(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+		self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+		self.count = 0
+		self._bits = bytearray((self.size + 7) // 8)
+
+	def _positions(self, value: str):
+		# Двойное хеширование: k позиций из двух 64-битных хешей
+		digest = blake2b(value.encode(), digest_size = 16).digest()
+		first, second = int.from_bytes(digest[:8]), int.from_bytes(digest[8:]) | 1
+		return ((first + i * second) % self.size for i in range(self.hash_count))
+
+	def add(self, value: str) -> None:
+		for position in self._positions(value):
+			self._bits[position >> 3] |= 1 << (position & 7)
+		self.count += 1
+
+	def __contains__(self, value: str) -> bool:
+		return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlacklistFilter:
+	"""
+	Быстрая проверка blacklist refresh токенов: jti, которого нет в bloom
+	фильтре, точно не в blacklist, и запрос к `token_blacklist` не нужен.
+	При попадании в фильтр проверяет БД (возможен ложноположительный ответ).<br>
+	Фильтр свой у каждого процесса. Ответу "нет" можно верить, только пока
+	фильтр знает обо всех записях blacklist: после коммита новых записей
+	(см. `users.signals`) в общем кеше растёт поколение, а их jti кладутся
+	в кеш под номером поколения. Процесс, увидевший новое поколение, догружает
+	jti всех пропущенных поколений. Порядок коммитов тут не важен, в отличие от
+	порядка id в БД. Если какого-то поколения в кеше нет, запросы проверяют БД,
+	а через `gap_timeout` секунд фильтр строится заново.
+	Поэтому `from_settings()` не включает фильтр без общего кеша (LocMemCache
+	у каждого процесса свой).<br>
+	Полная перестройка (раз в `rebuild_interval`) идёт в фоновом потоке, а запросы
+	пока проверяются старым фильтром. До первой перестройки проверяется БД
+	"""
+	generation_key = 'users:token_blacklist:generation'
+	# Поколение уже увеличено, а его jti ещё не записаны - столько ждать до перестройки
+	gap_timeout = 5
+
+	def __init__(
+			self,
+			enabled: bool = True,
+			false_positive_rate: float = 0.001,
+			rebuild_interval: float = 600,
+			max_catchup: int = 1_000
+		):
+		self.enabled = enabled
+		self.false_positive_rate = false_positive_rate
+		self.rebuild_interval = rebuild_interval
+		self.max_catchup = max_catchup
+
+		self._lock = Lock()
+		self.reset()
+
+	@classmethod
+	def from_settings(cls) -> 'TokenBlacklistFilter':
+		options = { **_DEFAULTS, **getattr(settings, 'USERS_TOKEN_BLACKLIST', {}) }
+		if options['ENABLED'] and isinstance(_get_cache(), (LocMemCache, DummyCache)):
+			raise ImproperlyConfigured(
+				'USERS_TOKEN_BLACKLIST requires a cache shared by all processes (Redis, Memcached, database):'
+				' set USERS_AUTH_CACHE["CACHE_ALIAS"] to one or disable the filter.'
+			)
+		return cls(
+			enabled             = options['ENABLED'],
+			false_positive_rate = options['FALSE_POSITIVE_RATE'],
+			rebuild_interval    = options['REBUILD_INTERVAL'],
+			max_catchup         = options['MAX_CATCHUP'],
+		)
+
+
+	def might_contain(self, jti: str) -> bool:
+		"""False - jti точно не в blacklist, True - нужно проверить БД"""
+		if not self.enabled:
+			return True
+
+		if time.monotonic() >= self._rebuild_at or self._filter.count >= self._filter.capacity:
+			self._start_rebuild()
+		if not self._built:
+			return True
+
+		generation = self._get_generation()
+		if generation != self._generation and not self.sync(generation):
+			now = time.monotonic()
+			if self._gap_since is None:
+				self._gap_since = now
+			elif now - self._gap_since >= self.gap_timeout:
+				self._start_rebuild()
+			return True
+
+		return jti in self._filter
+
+	def add(self, jti: str) -> None:
+		"""
+		Сразу после записи в blacklist, ещё до коммита: лишний jti в фильтре
+		даст только проверку БД, пропущенный - принятый отозванный токен
+		"""
+		with self._lock:
+			self._filter.add(jti)
+			# Перестройка до коммита не увидит запись в БД и вернёт jti отсюда
+			self._pending[jti] = time.monotonic()
+
+	def publish(self, *jtis: str) -> None:
+		"""После коммита записей blacklist: другие процессы должны их догрузить"""
+		if not self.enabled:
+			return
+
+		cache = _get_cache()
+		cache.add(self.generation_key, secrets.randbits(32), timeout = None)
+		try:
+			generation = cache.incr(self.generation_key)
+		except ValueError:
+			# Ключ пропал между add и incr: процессы перестроят фильтр по его отсутствию
+			generation = None
+		else:
+			# Процесс, который не застал эти jti до перестройки, всё равно её начнёт
+			cache.set(self._make_jtis_key(generation), list(jtis), timeout = self.rebuild_interval)
+
+		with self._lock:
+			for jti in jtis:
+				self._filter.add(jti)
+				self._pending.pop(jti, None)
+			# Никто другой не менял поколение - фильтр по-прежнему полон
+			if None not in (generation, self._generation) and generation == self._generation + 1:
+				self._generation = generation
+
+	def sync(self, generation: int | None = None) -> bool:
+		"""
+		Догружает jti, опубликованные другими процессами с последней загрузки.
+		False - не все поколения есть в кеше (вытеснены, ещё не записаны,
+		ключ поколения потерян): ответу фильтра "нет" верить нельзя
+		"""
+		cache = _get_cache()
+		with self._lock:
+			if generation is None:
+				generation = self._get_generation()
+			if generation == self._generation:
+				return True
+			if None in (generation, self._generation) or not 0 < generation - self._generation <= self.max_catchup:
+				return False
+
+			keys = [self._make_jtis_key(number) for number in range(self._generation + 1, generation + 1)]
+			published = cache.get_many(keys)
+			if len(published) != len(keys):
+				return False
+
+			for jtis in published.values():
+				for jti in jtis:
+					self._filter.add(jti)
+			self._generation = generation
+			self._gap_since = None
+			return True
+
+	def rebuild(self) -> None:
+		"""
+		Строит фильтр заново: уходят истёкшие jti. Запросы к БД - без блокировки,
+		до замены фильтра проверки идут по старому
+		"""
+		# Поколение - до выборки: записи, закоммиченные позже, его изменят и будут догружены.
+		# Ключ создаётся заранее, иначе первое поколение после потери кеша не с чем сравнить
+		_get_cache().add(self.generation_key, secrets.randbits(32), timeout = None)
+		generation = self._get_generation()
+		# Истёкшие токены не пройдут проверку подписи и без blacklist
+		blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt = timezone.now())
+		jtis = list(blacklisted.values_list('token__jti', flat = True))
+
+		# Запас, чтобы новые записи до следующей перестройки не портили точность
+		bloom = BloomFilter(max(1024, len(jtis) * 2), self.false_positive_rate)
+		for jti in jtis:
+			bloom.add(jti)
+
+		with self._lock:
+			# Незакоммиченные записи дольше интервала перестройки - откаченные транзакции
+			now = time.monotonic()
+			self._pending = { jti: added_at for jti, added_at in self._pending.items() if now - added_at < self.rebuild_interval }
+			for jti in self._pending:
+				bloom.add(jti)
+
+			self._filter = bloom
+			self._generation = generation
+			self._gap_since = None
+			self._rebuild_at = now + self.rebuild_interval
+			self._built = True
+
+	def reset(self) -> None:
+		with self._lock:
+			self._filter = BloomFilter(0, self.false_positive_rate)
+			self._pending: dict[str, float] = {}
+			self._generation = None
+			self._gap_since = None
+			self._rebuild_at = 0.0
+			self._built = False
+			self._rebuilding = False
+
+
+	def _start_rebuild(self) -> None:
+		with self._lock:
+			if self._rebuilding:
+				return
+			self._rebuilding = True
+		Thread(target = self._rebuild_in_background, name = 'token-blacklist-rebuild', daemon = True).start()
+
+	def _rebuild_in_background(self) -> None:
+		try:
+			self.rebuild()
+		finally:
+			with self._lock:
+				self._rebuilding = False
+				# После ошибки - следующая попытка через интервал, проверки идут по старому фильтру или БД
+				self._rebuild_at = max(self._rebuild_at, time.monotonic() + self.rebuild_interval)
+			# Соединения этого потока
+			connections.close_all()
+
+	def _make_jtis_key(self, generation: int) -> str:
+		return f'{self.generation_key}:{generation}'
+
+	def _get_generation(self) -> int | None:
+		return _get_cache().get(self.generation_key)
+
+
+def _get_cache():
+	alias = getattr(settings, 'USERS_AUTH_CACHE', {}).get('CACHE_ALIAS') or 'default'
+	return caches[alias]
+
+
+token_blacklist = TokenBlacklistFilter.from_settings()
+
+
+def blacklist_outstanding(tokens: QuerySet[OutstandingToken]) -> int:
+	"""
+	Заносит выданные токены в blacklist одним INSERT, уже занесённые
+	пропускаются. В отличие от `RefreshToken.blacklist()` не загружает
+	пользователя и не создаёт OutstandingToken.<br>
+	bulk_create не шлёт post_save, поэтому фильтр оповещается здесь
+	"""
+	rows = list(tokens.filter(blacklistedtoken__isnull = True).values_list('id', 'jti'))
+	if not rows:
+		return 0
+
+	BlacklistedToken.objects.bulk_create(
+		[BlacklistedToken(token_id = id) for id, _ in rows],
+		ignore_conflicts = True
+	)
+
+	jtis = [jti for _, jti in rows]
+	for jti in jtis:
+		token_blacklist.add(jti)
+	transaction.on_commit(partial(token_blacklist.publish, *jtis))
+	return len(rows)
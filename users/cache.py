@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from threading   import Lock
+from copy        import copy
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache      import caches
+from django.conf            import settings
+
+from users.models import User as _User # для аннотации
+
+__all__ = [
+	'UserCache',
+	'user_cache',
+]
+
+# Сигналы сбрасывают LRU только в процессе, сохранившем пользователя: в остальных
+# деактивация, смена роли и т.п. видны лишь через TTL, поэтому он ограничен
+MAX_LOCAL_TTL = 5
+
+_DEFAULTS = {
+	'MAX_SIZE':    1024,
+	'TTL':         MAX_LOCAL_TTL,
+	# Имя кеша из CACHES. Если указано - пользователи хранятся там (общий кеш
+	# для всех процессов), иначе - в LRU внутри процесса
+	'CACHE_ALIAS': None,
+}
+
+
+class UserCache:
+	"""
+	Кеш пользователей для аутентификации по JWT: экономит запрос к `users_user`
+	на каждый API-запрос.<br>
+	Записи живут не дольше `ttl` секунд и сбрасываются сигналами при
+	сохранении/удалении пользователя (см. `users.signals`).<br>
+	В общем кеше (`cache_alias`) сброс виден всем процессам, в LRU - только
+	текущему: другие процессы могут отдавать устаревшего пользователя до `ttl`
+	секунд, поэтому без `cache_alias` он не больше `MAX_LOCAL_TTL`
+	"""
+	key_prefix = 'users:auth:'
+
+	def __init__(self, max_size: int = 1024, ttl: float = 30, cache_alias: str | None = None):
+		self.max_size = max_size
+		self.ttl = ttl
+		self.cache_alias = cache_alias
+
+		self._entries: OrderedDict[str, tuple[float, _User]] = OrderedDict()
+		self._lock = Lock()
+
+	@classmethod
+	def from_settings(cls) -> 'UserCache':
+		options = { **_DEFAULTS, **getattr(settings, 'USERS_AUTH_CACHE', {}) }
+		if not options['CACHE_ALIAS'] and options['TTL'] > MAX_LOCAL_TTL:
+			raise ImproperlyConfigured(
+				f'USERS_AUTH_CACHE["TTL"] must not exceed {MAX_LOCAL_TTL} seconds without a shared cache:'
+				' invalidation does not reach other processes. Set USERS_AUTH_CACHE["CACHE_ALIAS"] or lower the TTL.'
+			)
+		return cls(
+			max_size    = options['MAX_SIZE'],
+			ttl         = options['TTL'],
+			cache_alias = options['CACHE_ALIAS'],
+		)
+
+
+	def get(self, user_id) -> _User | None:
+		key = self.make_key(user_id)
+
+		if self.cache_alias:
+			return caches[self.cache_alias].get(key)
+
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None:
+				return None
+
+			expires_at, user = entry
+			if expires_at <= time.monotonic():
+				del self._entries[key]
+				return None
+
+			self._entries.move_to_end(key)
+
+		# Копия, чтобы изменения объекта в одном запросе не попадали в другие
+		return copy(user)
+
+	def set(self, user_id, user: _User) -> None:
+		if self.ttl <= 0:
+			return
+
+		key = self.make_key(user_id)
+
+		if self.cache_alias:
+			caches[self.cache_alias].set(key, user, timeout = self.ttl)
+			return
+
+		with self._lock:
+			self._entries[key] = (time.monotonic() + self.ttl, copy(user))
+			self._entries.move_to_end(key)
+
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last = False)
+
+	# Для асинхронной аутентификации: LRU в памяти процесса не блокирует,
+	# а общий кеш опрашивается через его async API
+	async def aget(self, user_id) -> _User | None:
+		if self.cache_alias:
+			return await caches[self.cache_alias].aget(self.make_key(user_id))
+		return self.get(user_id)
+
+	async def aset(self, user_id, user: _User) -> None:
+		if self.cache_alias and self.ttl > 0:
+			await caches[self.cache_alias].aset(self.make_key(user_id), user, timeout = self.ttl)
+			return
+		self.set(user_id, user)
+
+	def invalidate(self, user_id) -> None:
+		key = self.make_key(user_id)
+
+		if self.cache_alias:
+			caches[self.cache_alias].delete(key)
+			return
+
+		with self._lock:
+			self._entries.pop(key, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+
+	def make_key(self, user_id) -> str:
+		# id в токене строка, в модели - число: приводим к одному виду
+		return f'{self.key_prefix}{user_id}'
+
+
+user_cache = UserCache.from_settings()
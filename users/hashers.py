@@ -0,0 +1,119 @@
+"""
+Политика хеширования паролей (см. settings.PASSWORD_HASHING).<br>
+Хешеры - стандартные хешеры Django с параметрами стоимости из настроек.
+Имена алгоритмов те же, поэтому старые хеши проверяются как раньше, а при
+входе с хешем другого алгоритма или с другими параметрами Django сам
+перехеширует пароль (`must_update`).<br>
+Для асинхронных view хеширование идёт в ограниченном пуле потоков: под
+нагрузкой больше потоков, чем ядер, не ускоряет, а только растит задержку
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools          import partial
+from threading          import Lock
+import asyncio
+import os
+
+from django.contrib.auth.hashers import (
+	Argon2PasswordHasher,
+	PBKDF2PasswordHasher,
+	ScryptPasswordHasher,
+	make_password,
+	verify_password,
+)
+from django.conf import settings
+
+from users.models import User as _User # для аннотации
+
+__all__ = [
+	'TunedPBKDF2PasswordHasher',
+	'TunedArgon2PasswordHasher',
+	'TunedScryptPasswordHasher',
+	'run_hashing',
+	'acheck_user_password',
+]
+
+_DEFAULTS = {
+	'PBKDF2_ITERATIONS': PBKDF2PasswordHasher.iterations,
+	'ARGON2': { 'TIME_COST': 2, 'MEMORY_COST': 19 * 1024, 'PARALLELISM': 1 },
+	'SCRYPT': { 'WORK_FACTOR': 2 ** 14, 'BLOCK_SIZE': 8, 'PARALLELISM': 1 },
+	# 0 - по числу ядер
+	'THREADS': 0,
+}
+
+
+def _get_options() -> dict:
+	return { **_DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {}) }
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+	@property
+	def iterations(self) -> int:
+		return _get_options()['PBKDF2_ITERATIONS']
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+	"""Argon2id, нужен argon2-cffi"""
+	@property
+	def time_cost(self) -> int:
+		return _get_options()['ARGON2']['TIME_COST']
+
+	@property
+	def memory_cost(self) -> int:
+		return _get_options()['ARGON2']['MEMORY_COST']
+
+	@property
+	def parallelism(self) -> int:
+		return _get_options()['ARGON2']['PARALLELISM']
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+	@property
+	def work_factor(self) -> int:
+		return _get_options()['SCRYPT']['WORK_FACTOR']
+
+	@property
+	def block_size(self) -> int:
+		return _get_options()['SCRYPT']['BLOCK_SIZE']
+
+	@property
+	def parallelism(self) -> int:
+		return _get_options()['SCRYPT']['PARALLELISM']
+
+	@property
+	def maxmem(self) -> int:
+		# Как в hashlib.scrypt: 128 * N * r * p байт и запас
+		return 128 * self.work_factor * self.block_size * (self.parallelism + 2)
+
+
+# MARK: Pool
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+	global _executor
+	with _executor_lock:
+		if _executor is None:
+			threads = _get_options()['THREADS'] or os.cpu_count() or 1
+			_executor = ThreadPoolExecutor(max_workers = threads, thread_name_prefix = 'password-hashing')
+		return _executor
+
+
+async def run_hashing(func, *args, **kwargs):
+	"""
+	Выполняет `func` в пуле хеширования. Только для работы без БД:
+	соединения Django в потоках пула никто не закрывает
+	"""
+	return await asyncio.get_running_loop().run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+
+async def acheck_user_password(user: _User, raw_password: str) -> bool:
+	"""
+	Как `user.acheck_password()`, но хеширование - в пуле, а не в event
+	loop. Устаревший хеш перезаписывается по текущей политике
+	"""
+	is_correct, must_update = await run_hashing(verify_password, raw_password, user.password)
+
+	if is_correct and must_update:
+		user.password = await run_hashing(make_password, raw_password)
+		await user.asave(update_fields = ['password'])
+	return is_correct
@@ -0,0 +1,59 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth         import get_user_model
+from django.test.utils           import override_settings
+from django.urls                 import reverse
+from django.db                   import transaction
+from rest_framework.test         import APIClient
+
+from users.models import User as _User # для аннотации
+from users.tokens import ClaimsRefreshToken
+from users.cache  import user_cache
+from users        import local_settings
+from tasks.models import Task
+
+User: type[_User] = get_user_model()
+
+
+class Command(BaseCommand):
+	help = (
+		'Measures requests/sec of GET /api/tasks/ for each way of resolving request.user:'
+		' DB lookup on every request, the user cache and stateless JWT claims.'
+		' Runs in-process inside a rolled back transaction.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--requests', type = int, default = 2_000, help = 'Requests per mode')
+
+	def handle(self, *args, **options):
+		with transaction.atomic():
+			user = User.objects.create_user(username = 'bench_auth_user', password = None)
+			Task.objects.create(title = 'Bench task', created_by = user)
+
+			for mode in ('db', 'cache', 'stateless'):
+				rps = self.measure(user, mode, options['requests'])
+				self.stdout.write(f'{mode:<10} {rps:>10.1f} req/s')
+
+			transaction.set_rollback(True)
+
+	def measure(self, user: _User, mode: str, requests: int) -> float:
+		ttl = user_cache.ttl
+		user_cache.clear()
+		# ttl = 0 - кеш ничего не хранит, каждый запрос идёт в БД
+		user_cache.ttl = ttl if mode == 'cache' else 0
+
+		try:
+			with override_settings(USERS_STATELESS_JWT = mode == 'stateless'):
+				# REMOTE_ADDR не из INTERNAL_IPS - иначе в замер попадёт debug toolbar
+				client = APIClient(SERVER_NAME = 'localhost', REMOTE_ADDR = '10.0.0.1')
+				client.cookies[local_settings.ACCESS_TOKEN_COOKIE_NAME] = str(ClaimsRefreshToken.for_user(user).access_token)
+				url = reverse('task-list') + '?page_size=1'
+
+				client.get(url)
+				started = perf_counter()
+				for _ in range(requests):
+					client.get(url)
+				return requests / (perf_counter() - started)
+		finally:
+			user_cache.ttl = ttl
@@ -0,0 +1,86 @@
+from importlib.util import find_spec
+from time           import perf_counter
+import asyncio
+import os
+
+from django.contrib.auth.hashers import make_password, verify_password
+from django.core.management.base import BaseCommand
+from django.contrib.auth         import get_user_model
+from django.test.utils           import override_settings
+from django.conf                 import settings
+from django.urls                 import reverse
+from django.db                   import transaction
+from rest_framework.test         import APIClient
+
+from users.models  import User as _User # для аннотации
+from users.hashers import run_hashing
+
+User: type[_User] = get_user_model()
+
+POLICIES = {
+	'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+	'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+	'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD = 'bench-password-Fazbear'
+
+
+class Command(BaseCommand):
+	help = (
+		'Measures each password hashing policy with the cost parameters from PASSWORD_HASHING:'
+		' hash and verify time, verifies/sec per core through the async hashing pool'
+		' and logins/sec per core of POST /api/token/. Runs in-process inside a rolled back transaction.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('policies', nargs = '*', choices = list(POLICIES), help = 'Default: all available')
+		parser.add_argument('--rounds', type = int, default = 20, help = 'Hashes, verifies and logins per policy')
+
+	def handle(self, *args, **options):
+		policies = options['policies'] or [policy for policy in POLICIES if policy != 'argon2' or find_spec('argon2')]
+		cores = os.cpu_count() or 1
+
+		self.stdout.write(f'{cores} cores, current policy: {settings.PASSWORD_HASHER_POLICY}')
+		self.stdout.write(f'{"policy":<8} {"hash ms":>9} {"verify ms":>10} {"verify/s/core":>14} {"login/s/core":>13}')
+		for policy in policies:
+			with override_settings(PASSWORD_HASHERS = [POLICIES[policy], *settings.PASSWORD_HASHERS]):
+				hash_ms, verify_ms = self.measure_hashing(options['rounds'])
+				verifies = asyncio.run(self.measure_pool(options['rounds'] * cores)) / cores
+				logins = self.measure_logins(options['rounds'])
+
+			self.stdout.write(f'{policy:<8} {hash_ms:>9.1f} {verify_ms:>10.1f} {verifies:>14.1f} {logins:>13.1f}')
+
+	def measure_hashing(self, rounds: int) -> tuple[float, float]:
+		encoded = make_password(PASSWORD)
+
+		started = perf_counter()
+		for _ in range(rounds):
+			make_password(PASSWORD)
+		hashed = perf_counter()
+		for _ in range(rounds):
+			verify_password(PASSWORD, encoded)
+		verified = perf_counter()
+
+		return (hashed - started) / rounds * 1000, (verified - hashed) / rounds * 1000
+
+	async def measure_pool(self, rounds: int) -> float:
+		encoded = make_password(PASSWORD)
+		started = perf_counter()
+		await asyncio.gather(*(run_hashing(verify_password, PASSWORD, encoded) for _ in range(rounds)))
+		return rounds / (perf_counter() - started)
+
+	def measure_logins(self, rounds: int) -> float:
+		with transaction.atomic():
+			user = User.objects.create_user(username = 'bench_password_user', password = PASSWORD)
+			# REMOTE_ADDR не из INTERNAL_IPS - иначе в замер попадёт debug toolbar
+			client = APIClient(SERVER_NAME = 'localhost', REMOTE_ADDR = '10.0.0.1')
+			data = { 'username': user.username, 'password': PASSWORD }
+
+			started = perf_counter()
+			for _ in range(rounds):
+				response = client.post(reverse('token-obtain_pair'), data, format = 'json')
+				assert response.status_code == 200, response.content
+			elapsed = perf_counter() - started
+
+			transaction.set_rollback(True)
+		return rounds / elapsed
@@ -0,0 +1,51 @@
+from time import sleep
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from django.core.management.base                     import BaseCommand
+from django.utils                                    import timezone
+from django.db                                       import transaction
+
+
+class Command(BaseCommand):
+	help = (
+		'Deletes expired outstanding tokens and their blacklist entries in small batches, each in its own'
+		' short transaction, so refreshes and logins are not blocked. Meant to be run by cron/systemd timer.'
+		' Unlike flushexpiredtokens it never deletes the whole table in one statement.'
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument('--batch-size', type = int,   default = 1_000, help = 'Tokens per transaction')
+		parser.add_argument('--sleep',      type = float, default = 0,     help = 'Seconds to pause between batches')
+		parser.add_argument('--dry-run', action = 'store_true', help = 'Only count expired tokens')
+
+	def handle(self, *args, **options):
+		# Токены, истёкшие во время чистки, подождут следующего запуска
+		expired = OutstandingToken.objects.filter(expires_at__lte = timezone.now())
+
+		if options['dry_run']:
+			self.stdout.write(
+				f'{expired.count()} expired outstanding tokens,'
+				f' {BlacklistedToken.objects.filter(token__in = expired).count()} of them blacklisted.'
+			)
+			return
+
+		outstanding_deleted = blacklisted_deleted = 0
+		while True:
+			with transaction.atomic():
+				# Пачка по первичному ключу: короткие блокировки только этих строк
+				ids = list(expired.order_by('id').values_list('id', flat = True)[:options['batch_size']])
+				if not ids:
+					break
+
+				# Blacklist удаляется каскадом одним DELETE по token_id. only('id'):
+				# каскад выбирает удаляемые токены, а их текст ему не нужен
+				_, deleted = OutstandingToken.objects.filter(id__in = ids).only('id').delete()
+				outstanding_deleted += deleted.get(OutstandingToken._meta.label, 0)
+				blacklisted_deleted += deleted.get(BlacklistedToken._meta.label, 0)
+
+			if options['sleep']:
+				sleep(options['sleep'])
+
+		self.stdout.write(self.style.SUCCESS(
+			f'Deleted {outstanding_deleted} expired outstanding tokens and {blacklisted_deleted} blacklist entries.'
+		))
@@ -19,6 +19,27 @@ class User(AbstractUser):
 
 	email = models.EmailField(blank = True, verbose_name = loc('Почта'))
 
+	# Растёт при изменении полей, которые попадают в claims JWT (см. users.tokens)
+	token_version = models.PositiveIntegerField(default = 0, editable = False)
+
+	TOKEN_VERSIONED_FIELDS = ('username', 'role', 'is_staff', 'is_superuser', 'is_active')
+
+
+	def save(self, *args, **kwargs):
+		update_fields = kwargs.get('update_fields')
+
+		if not self._state.adding and self.pk is not None and (
+			update_fields is None or set(update_fields) & set(self.TOKEN_VERSIONED_FIELDS)
+		):
+			old = type(self).objects.filter(pk = self.pk).values(*self.TOKEN_VERSIONED_FIELDS, 'token_version').first()
+
+			if old and any(old[field] != getattr(self, field) for field in self.TOKEN_VERSIONED_FIELDS):
+				self.token_version = old['token_version'] + 1
+				if update_fields is not None:
+					kwargs['update_fields'] = { *update_fields, 'token_version' }
+
+		super().save(*args, **kwargs)
+
 
 	def __str__(self) -> str: # спецметод типа get_<value_name>_display() для получения verbose_name
 		return f'{self.username} ({self.get_role_display()})'
@@ -1,14 +1,22 @@
 from django.contrib.auth.password_validation import validate_password
-from django.contrib.auth                     import get_user_model
-from rest_framework_simplejwt.serializers    import TokenRefreshSerializer
-from rest_framework                          import serializers
+from django.contrib.auth.models              import update_last_login
+from django.contrib.auth                     import aauthenticate, get_user_model
+from django.core.exceptions                  import ValidationError as DjangoValidationError
+from rest_framework_simplejwt.serializers    import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions     import AuthenticationFailed
+from rest_framework_simplejwt.settings       import api_settings
+from rest_framework.fields                   import get_error_detail
+from rest_framework                          import exceptions, serializers
+from asgiref.sync                            import sync_to_async
 
 from users.serializers.fields import CookieSourceCharField
 from users.models             import User as _User # для аннотации
+from users.tokens             import ClaimsRefreshToken, add_user_claims, is_stateless_mode
 from users                    import local_settings
 
 __all__ = [
 	'UserRegisterSerializer',
+	'ClaimsTokenObtainPairSerializer',
 	'CookieTokenRefreshSerializer'
 ]
 
@@ -17,7 +25,6 @@ User: type[_User] = get_user_model()
 class UserRegisterSerializer(serializers.ModelSerializer):
 	password = serializers.CharField(
 		write_only = True,
-		validators = [validate_password],
 		style = {'input_type': 'password'} # для браузеров, чтобы инпуты были стиля пароля по умолчанию
 	)
 
@@ -33,12 +40,85 @@ class UserRegisterSerializer(serializers.ModelSerializer):
 			'role': { 'read_only': True }
 		}
 
+	def validate(self, attrs):
+		# Пароль проверяется с будущим пользователем: без него
+		# UserAttributeSimilarityValidator не с чем сравнивать
+		user = self.Meta.model(**{ key: value for key, value in attrs.items() if key != 'password' })
+		try:
+			validate_password(attrs['password'], user)
+		except DjangoValidationError as e:
+			raise serializers.ValidationError({ 'password': get_error_detail(e) })
+
+		return attrs
+
 	def create(self, validated_data):
 		serializers.raise_errors_on_nested_writes('create', self, validated_data)
 
 		return self.Meta.model.objects.create_user(**validated_data)
 
 
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+	token_class = ClaimsRefreshToken
+
+	async def ais_valid(self, *, raise_exception = False) -> bool:
+		"""
+		`is_valid()` для асинхронных view: пароль проверяется через
+		`aauthenticate()`, хеширование идёт в пуле `users.hashers`
+		"""
+		# < Как Serializer.is_valid() и run_validation(), но с avalidate() >
+		if not hasattr(self, '_validated_data'):
+			try:
+				attrs = self.to_internal_value(self.initial_data)
+				try:
+					self._validated_data = await self.avalidate(attrs)
+				except exceptions.ValidationError as exc:
+					raise exceptions.ValidationError(detail = serializers.as_serializer_error(exc))
+			except exceptions.ValidationError as exc:
+				self._validated_data = {}
+				self._errors = exc.detail
+			else:
+				self._errors = {}
+
+		if self._errors and raise_exception:
+			raise exceptions.ValidationError(self.errors)
+
+		return not bool(self._errors)
+		# </>
+
+	async def avalidate(self, attrs):
+		# < Как TokenObtainPairSerializer.validate() >
+		authenticate_kwargs = {
+			self.username_field: attrs[self.username_field],
+			'password': attrs['password'],
+		}
+		if 'request' in self.context:
+			authenticate_kwargs['request'] = self.context['request']
+
+		self.user = await aauthenticate(**authenticate_kwargs)
+
+		if not api_settings.USER_AUTHENTICATION_RULE(self.user):
+			raise exceptions.AuthenticationFailed(
+				self.error_messages['no_active_account'],
+				'no_active_account',
+			)
+
+		# Токены simplejwt пишут OutstandingToken синхронно
+		return await sync_to_async(self._get_tokens)()
+
+	def _get_tokens(self) -> dict[str, str]:
+		refresh = self.get_token(self.user)
+		data = {
+			'refresh': str(refresh),
+			'access':  str(refresh.access_token),
+		}
+
+		if api_settings.UPDATE_LAST_LOGIN:
+			update_last_login(None, self.user)
+
+		return data
+		# </>
+
+
 class CookieTokenRefreshSerializer(TokenRefreshSerializer):
 	refresh = CookieSourceCharField(
 		target_key = local_settings.REFRESH_TOKEN_COOKIE_NAME,
@@ -46,3 +126,38 @@ class CookieTokenRefreshSerializer(TokenRefreshSerializer):
 	)
 
 	access = None
+
+	token_class = ClaimsRefreshToken
+
+	def validate(self, attrs):
+		if not is_stateless_mode():
+			return super().validate(attrs)
+
+		# < Скопировано из super().validate(), но claims пользователя
+		# перечитываются из БД, чтобы новая роль попала в новые токены >
+		refresh = self.token_class(attrs['refresh'])
+
+		user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+		user = User.objects.filter(**{ api_settings.USER_ID_FIELD: user_id }).first() if user_id else None
+		if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+			raise AuthenticationFailed(
+				self.error_messages['no_active_account'],
+				'no_active_account',
+			)
+
+		add_user_claims(refresh, user)
+		data = { 'access': str(refresh.access_token) }
+
+		if api_settings.ROTATE_REFRESH_TOKENS:
+			if api_settings.BLACKLIST_AFTER_ROTATION:
+				refresh.blacklist()
+
+			refresh.set_jti()
+			refresh.set_exp()
+			refresh.set_iat()
+			refresh.outstand()
+
+			data['refresh'] = str(refresh)
+		# </>
+
+		return data
@@ -0,0 +1,37 @@
+from functools import partial
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from django.db.models.signals                        import post_save, post_delete
+from django.contrib.auth                             import get_user_model
+from django.dispatch                                 import receiver
+from django.db                                       import transaction
+
+from users.blacklist import token_blacklist
+from users.models    import User as _User # для аннотации
+from users.tokens    import publish_token_version
+from users.cache     import user_cache
+
+User: type[_User] = get_user_model()
+
+
+@receiver((post_save, post_delete), sender = User, dispatch_uid = 'users.invalidate_auth_cache')
+def invalidate_auth_cache(sender, instance: _User, **kwargs):
+	# В том числе при смене роли, is_staff, is_active и пароля
+	user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender = User, dispatch_uid = 'users.publish_token_version')
+def publish_user_token_version(sender, instance: _User, created: bool, **kwargs):
+	if not created:
+		publish_token_version(instance.pk, instance.token_version)
+
+
+@receiver(post_save, sender = BlacklistedToken, dispatch_uid = 'users.publish_blacklisted_token')
+def publish_blacklisted_token(sender, instance: BlacklistedToken, created: bool, **kwargs):
+	if not created:
+		return
+
+	jti = instance.token.jti
+	token_blacklist.add(jti)
+	# Другие процессы смогут догрузить запись только после коммита
+	transaction.on_commit(partial(token_blacklist.publish, jti))
@@ -4,13 +4,17 @@ import json
 from django.utils.translation import gettext_lazy as loc
 from django.contrib.auth      import get_user_model
 from django.http.response     import HttpResponse
+from django.core.cache        import cache
 from django.urls              import reverse
 from rest_framework.response  import Response
 from rest_framework.test      import APITestCase
 from rest_framework           import status
 
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
 from users.tests.debug_client import CookieJWTDebugClient
 from users.models             import User as _User # для аннотации
+from users.tokens             import ClaimsRefreshToken
 from users                    import local_settings as _settings
 
 User: type[_User] = get_user_model()
@@ -26,6 +30,8 @@ class UserAPITest(APITestCase):
 	client_class = CookieJWTDebugClient
 
 	def setUp(self):
+		# Счётчики лимитов (users.throttling) из других тестов
+		cache.clear()
 		self.user_password = 'HoleraFredyFazbear'
 		self.user = User.objects.create_user(
 			username = 'FredyFasbear',
@@ -331,3 +337,39 @@ class UserAPITest(APITestCase):
 		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 		self.assertFalse(self.client.cookies[_settings.ACCESS_TOKEN_COOKIE_NAME].value)
 		self.assertFalse(self.client.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME].value)
+
+	def test_logout_blacklists_refresh_cookie(self):
+		self.client.force_login(self.user)
+		refresh_token = self.client.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME].value
+		outstanding_count = OutstandingToken.objects.count()
+
+		with self.captureOnCommitCallbacks(execute = True):
+			response = self.client.post(self.logout_url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		# Отозван токен из куки, новых OutstandingToken не появилось
+		self.assertEqual(OutstandingToken.objects.count(), outstanding_count)
+		self.assertTrue(BlacklistedToken.objects.filter(token__token = refresh_token).exists())
+
+		self.client.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME] = refresh_token
+		response = self.client.post(self.token_refresh_url)
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_logout_all(self):
+		other_session = ClaimsRefreshToken.for_user(self.user)
+		ClaimsRefreshToken.for_user(self.user2)
+		self.client.force_login(self.user)
+
+		with self.captureOnCommitCallbacks(execute = True):
+			response = self.client.post(f'{self.logout_url}?all=true')
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		self.assertEqual(
+			BlacklistedToken.objects.filter(token__user = self.user).count(),
+			OutstandingToken.objects.filter(user = self.user).count()
+		)
+		self.assertFalse(BlacklistedToken.objects.filter(token__user = self.user2).exists())
+
+		self.client.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME] = str(other_session)
+		response = self.client.post(self.token_refresh_url)
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,73 @@
+from inspect import iscoroutinefunction
+
+from django.contrib.auth import get_user_model
+from django.core.cache   import cache
+from django.test         import override_settings
+from django.urls         import path, include, resolve, reverse
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.models import User as _User # для аннотации
+from users        import local_settings as _settings, views
+
+User: type[_User] = get_user_model()
+
+
+# Токен-view с асинхронным dispatch (как под ASGI)
+urlpatterns = [
+	path('api/', include([
+		path('token/',         views.CookieTokenObtainPairView.as_view(async_dispatch = True), name = 'token-obtain_pair'),
+		path('token/refresh/', views.CookieTokenRefreshView.as_view(async_dispatch = True),    name = 'token-refresh'),
+	]))
+]
+
+
+@override_settings(ROOT_URLCONF = __name__)
+class AsyncTokenViewsTest(APITestCase):
+	def setUp(self):
+		cache.clear()
+		self.user_password = 'HoleraFredyFazbear'
+		self.user = User.objects.create_user(username = 'FredyFasbear', password = self.user_password)
+
+		self.token_pair_url    = reverse('token-obtain_pair')
+		self.token_refresh_url = reverse('token-refresh')
+
+	def login(self, password: str):
+		return self.async_client.post(
+			self.token_pair_url,
+			{ 'username': self.user.username, 'password': password },
+			content_type = 'application/json'
+		)
+
+
+	def test_routes(self):
+		self.assertTrue(iscoroutinefunction(resolve(self.token_pair_url).func))
+		self.assertTrue(iscoroutinefunction(resolve(self.token_refresh_url).func))
+
+	async def test_login(self):
+		response = await self.login('WRONG')
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+		self.assertEqual(response.json(), { 'detail': 'Не найдено активной учетной записи с указанными данными' })
+		self.assertNotIn(_settings.ACCESS_TOKEN_COOKIE_NAME, response.cookies)
+
+		response = await self.login(self.user_password)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertEqual(response.content, b'')
+		self.assertIn(_settings.ACCESS_TOKEN_COOKIE_NAME, response.cookies)
+		self.assertIn(_settings.REFRESH_TOKEN_COOKIE_NAME, response.cookies)
+
+	async def test_refresh_token(self):
+		response = await self.async_client.post(self.token_refresh_url)
+		self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+		await self.login(self.user_password)
+		old_refresh = self.async_client.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME].value
+
+		response = await self.async_client.post(self.token_refresh_url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertNotEqual(response.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME].value, old_refresh)
+
+		# Старый refresh ушёл в blacklist
+		self.async_client.cookies[_settings.REFRESH_TOKEN_COOKIE_NAME] = old_refresh
+		response = await self.async_client.post(self.token_refresh_url)
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
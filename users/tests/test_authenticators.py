@@ -0,0 +1,179 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test.utils      import CaptureQueriesContext
+from django.contrib.auth    import get_user_model
+from django.db.models       import F
+from django.core.cache      import cache
+from django.test            import override_settings
+from django.urls            import reverse
+from django.db              import connection
+from rest_framework.test    import APITestCase
+from rest_framework         import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.models             import User as _User # для аннотации
+from users.cache              import UserCache, user_cache
+from users.tokens             import ClaimsTokenUser, check_stateless_mode
+from tasks.models             import Task
+
+User: type[_User] = get_user_model()
+
+
+class UserCacheTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		user_cache.clear()
+
+		self.user = User.objects.create_user(username = 'CachedUser', password = 'HelloWorld12345$')
+		self.url = reverse('task-list')
+		self.client.force_login(self.user)
+
+	def user_queries(self) -> int:
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(self.url)
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		table = User._meta.db_table
+		return sum(f'FROM "{table}"' in query['sql'] for query in context.captured_queries)
+
+
+	def test_second_request_uses_cache(self):
+		self.assertEqual(self.user_queries(), 1)
+		self.assertEqual(self.user_queries(), 0)
+
+	def test_save_invalidates_cache(self):
+		self.user_queries()
+
+		self.user.role = User.Role.PROJECT_MANAGER
+		self.user.save()
+
+		self.assertEqual(self.user_queries(), 1)
+
+	def test_inactive_user_is_not_cached(self):
+		self.user_queries()
+
+		self.user.is_active = False
+		self.user.save()
+
+		response = self.client.get(self.url)
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_lru_and_ttl(self):
+		cache = UserCache(max_size = 2, ttl = 60)
+		cache.set(1, self.user)
+		cache.set(2, self.user)
+		cache.get(1)
+		cache.set(3, self.user)
+
+		self.assertIsNotNone(cache.get(1))
+		self.assertIsNone(cache.get(2))
+		self.assertIsNot(cache.get(3), cache.get(3))
+
+		cache = UserCache(ttl = 0)
+		cache.set(1, self.user)
+		self.assertIsNone(cache.get(1))
+
+	def test_local_ttl_is_bounded(self):
+		# Сброс LRU не доходит до других процессов - долгий TTL только с общим кешем
+		with override_settings(USERS_AUTH_CACHE = { 'TTL': 60 }):
+			self.assertRaises(ImproperlyConfigured, UserCache.from_settings)
+
+		with override_settings(USERS_AUTH_CACHE = { 'TTL': 60, 'CACHE_ALIAS': 'default' }):
+			self.assertEqual(UserCache.from_settings().ttl, 60)
+
+
+@override_settings(USERS_STATELESS_JWT = True)
+class StatelessJWTTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		user_cache.clear()
+		cache.clear()
+
+		self.password = 'HelloWorld12345$'
+		self.user = User.objects.create_user(username = 'StatelessUser', password = self.password)
+		self.other_task = Task.objects.create(
+			title = 'Other task',
+			created_by = User.objects.create(username = 'Other', password = '12345')
+		)
+
+		self.client.post(
+			reverse('token-obtain_pair'),
+			{ 'username': self.user.username, 'password': self.password },
+			content_type = 'application/json'
+		)
+
+	def patch_other_task(self):
+		return self.client.patch(
+			reverse('task-detail', args = [self.other_task.pk]),
+			{ 'title': 'Changed' },
+			content_type = 'application/json'
+		)
+
+
+	def test_requests_do_not_load_user(self):
+		table = User._meta.db_table
+
+		with CaptureQueriesContext(connection) as context:
+			response = self.client.get(reverse('task-list'))
+
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		self.assertIsInstance(response.wsgi_request.user, ClaimsTokenUser)
+		# Владельцы задач подтягиваются JOIN'ом, отдельного запроса пользователя нет
+		self.assertFalse(any(
+			f'FROM "{table}"' in query['sql'] and 'JOIN' not in query['sql']
+			for query in context.captured_queries
+		))
+
+		response = self.client.post(reverse('task-list'), { 'title': 'Mine' }, content_type = 'application/json')
+		self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+		self.assertEqual(Task.objects.get(title = 'Mine').created_by, self.user)
+
+	def test_role_change_invalidates_access_token(self):
+		self.assertEqual(self.patch_other_task().status_code, status.HTTP_403_FORBIDDEN)
+
+		self.user.role = User.Role.PROJECT_MANAGER
+		self.user.save()
+
+		response = self.client.get(reverse('task-list'))
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+		response = self.client.post(reverse('token-refresh'))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+		self.assertEqual(self.patch_other_task().status_code, status.HTTP_200_OK)
+
+	def test_unrelated_save_keeps_tokens_valid(self):
+		self.user.email = 'stateless@mail.com'
+		self.user.save()
+
+		response = self.client.get(reverse('task-list'))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+	def test_missing_version_is_read_from_db(self):
+		# Изменение без сигнала и потеря ключа в кеше: claims токена не проверить по кешу
+		User.objects.filter(pk = self.user.pk).update(role = User.Role.PROJECT_MANAGER, token_version = F('token_version') + 1)
+		cache.clear()
+
+		response = self.client.get(reverse('task-list'))
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+		# Версия из БД снова в кеше
+		response = self.client.post(reverse('token-refresh'))
+		self.assertEqual(response.status_code, status.HTTP_200_OK)
+		with self.assertNumQueries(1):
+			self.assertEqual(self.client.get(reverse('task-list')).status_code, status.HTTP_200_OK)
+
+	def test_inactive_user_is_rejected(self):
+		User.objects.filter(pk = self.user.pk).update(is_active = False)
+		cache.clear()
+
+		response = self.client.get(reverse('task-list'))
+		self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+	def test_requires_shared_cache(self):
+		with self.assertRaises(ImproperlyConfigured):
+			check_stateless_mode()
+
+		with override_settings(USERS_STATELESS_JWT = False):
+			check_stateless_mode()
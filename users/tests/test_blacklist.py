@@ -0,0 +1,178 @@
+from tempfile import TemporaryDirectory
+from datetime import timedelta
+from unittest import mock
+import os
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.exceptions             import TokenError
+from django.core.management                          import call_command
+from django.core.exceptions                          import ImproperlyConfigured
+from django.test.utils                               import CaptureQueriesContext
+from django.contrib.auth                             import get_user_model
+from django.core.cache                               import cache
+from django.test                                     import TestCase, override_settings
+from django.utils                                    import timezone
+from django.db                                       import connection
+
+from users.blacklist import BloomFilter, TokenBlacklistFilter, token_blacklist
+from users.models    import User as _User # для аннотации
+from users.tokens    import ClaimsRefreshToken
+
+User: type[_User] = get_user_model()
+
+
+class BloomFilterTest(TestCase):
+	def test_no_false_negatives(self):
+		bloom = BloomFilter(capacity = 5_000, false_positive_rate = 0.01)
+		for i in range(5_000):
+			bloom.add(f'added-{i}')
+
+		self.assertTrue(all(f'added-{i}' in bloom for i in range(5_000)))
+		false_positives = sum(f'other-{i}' in bloom for i in range(10_000))
+		self.assertLess(false_positives, 10_000 * 0.02)
+
+
+class TokenBlacklistFilterTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		# Выключен по умолчанию: с LocMemCache процессы не видят поколений друг друга
+		patcher = mock.patch.object(token_blacklist, 'enabled', True)
+		patcher.start()
+		self.addCleanup(patcher.stop)
+		token_blacklist.reset()
+		# Фоновый поток не видит данных теста (другое соединение) - строим здесь
+		token_blacklist.rebuild()
+		self.user = User.objects.create_user(username = 'BlacklistUser', password = None)
+
+	def blacklisted_queries(self, token: str) -> int:
+		with CaptureQueriesContext(connection) as context:
+			try:
+				ClaimsRefreshToken(token)
+			except TokenError:
+				pass
+		table = BlacklistedToken._meta.db_table
+		return sum(f'FROM "{table}"' in query['sql'] for query in context.captured_queries)
+
+	def blacklist(self, token: str):
+		with self.captureOnCommitCallbacks(execute = True):
+			ClaimsRefreshToken(token).blacklist()
+
+
+	def test_valid_token_skips_blacklist_query(self):
+		token = str(ClaimsRefreshToken.for_user(self.user))
+		self.assertEqual(self.blacklisted_queries(token), 0)
+
+	def test_blacklisted_token_is_rejected(self):
+		token = str(ClaimsRefreshToken.for_user(self.user))
+		self.blacklisted_queries(token)
+		self.blacklist(token)
+
+		with self.assertRaises(TokenError):
+			ClaimsRefreshToken(token)
+		# Фильтр догружен, следующие проверки снова без запросов
+		other = str(ClaimsRefreshToken.for_user(self.user))
+		self.assertEqual(self.blacklisted_queries(other), 0)
+
+	def test_other_process_sees_new_entries(self):
+		other_process = TokenBlacklistFilter()
+		other_process.rebuild()
+		token = str(ClaimsRefreshToken.for_user(self.user))
+		jti = ClaimsRefreshToken(token)['jti']
+		self.assertFalse(other_process.might_contain(jti))
+
+		self.blacklist(token)
+		self.assertTrue(other_process.might_contain(jti))
+
+		# Кеш с поколением потерян - фильтр догружается, а не верит себе
+		BlacklistedToken.objects.all().delete()
+		other = ClaimsRefreshToken.for_user(self.user)
+		self.blacklist(str(other))
+		cache.clear()
+		self.assertTrue(other_process.might_contain(other['jti']))
+
+	def test_missing_generation_falls_back_to_db(self):
+		blacklist = TokenBlacklistFilter()
+		blacklist.rebuild()
+		token = ClaimsRefreshToken.for_user(self.user)
+
+		# Запись закоммичена и поколение выросло, но её jti в кеше нет
+		# (вытеснен или долгая транзакция ещё не дописала его)
+		BlacklistedToken.objects.create(token = OutstandingToken.objects.get(jti = token['jti']))
+		cache.incr(TokenBlacklistFilter.generation_key)
+
+		with mock.patch('users.blacklist.Thread') as thread:
+			self.assertTrue(blacklist.might_contain(token['jti']))
+			self.assertTrue(blacklist.might_contain('other'))
+			thread.assert_not_called()
+
+			blacklist._gap_since -= blacklist.gap_timeout
+			self.assertTrue(blacklist.might_contain('other'))
+			thread.assert_called_once()
+
+		blacklist.rebuild()
+		self.assertTrue(blacklist.might_contain(token['jti']))
+		self.assertFalse(blacklist.might_contain('other'))
+
+	def test_expired_entries_are_dropped_on_rebuild(self):
+		token = ClaimsRefreshToken.for_user(self.user)
+		self.blacklist(str(token))
+		OutstandingToken.objects.update(expires_at = timezone.now() - timedelta(seconds = 1))
+
+		blacklist = TokenBlacklistFilter()
+		blacklist.rebuild()
+		self.assertFalse(blacklist.might_contain(token['jti']))
+
+	def test_rebuild_is_off_the_request_path(self):
+		token = ClaimsRefreshToken.for_user(self.user)
+		self.blacklist(str(token))
+		blacklist = TokenBlacklistFilter()
+
+		with mock.patch('users.blacklist.Thread') as thread, self.assertNumQueries(0):
+			# До первой перестройки - проверка БД
+			self.assertTrue(blacklist.might_contain('other'))
+			self.assertTrue(blacklist.might_contain('other'))
+		thread.assert_called_once()
+
+		blacklist.rebuild()
+		blacklist._rebuilding = False
+		blacklist._rebuild_at = 0
+
+		# Пока идёт перестройка, проверки - по старому фильтру
+		with mock.patch('users.blacklist.Thread') as thread, self.assertNumQueries(0):
+			self.assertFalse(blacklist.might_contain('other'))
+			self.assertTrue(blacklist.might_contain(token['jti']))
+		thread.assert_called_once()
+
+	def test_requires_shared_cache(self):
+		with override_settings(USERS_TOKEN_BLACKLIST = {}):
+			self.assertFalse(TokenBlacklistFilter.from_settings().enabled)
+
+		with override_settings(USERS_TOKEN_BLACKLIST = { 'ENABLED': True }), self.assertRaises(ImproperlyConfigured):
+			TokenBlacklistFilter.from_settings()
+
+		with TemporaryDirectory() as location, override_settings(
+			CACHES = {
+				'default': { 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache' },
+				'shared':  { 'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location },
+			},
+			USERS_AUTH_CACHE = { 'CACHE_ALIAS': 'shared' },
+			USERS_TOKEN_BLACKLIST = { 'ENABLED': True },
+		):
+			self.assertTrue(TokenBlacklistFilter.from_settings().enabled)
+
+
+class PruneTokensTest(TestCase):
+	def test_prune(self):
+		user = User.objects.create_user(username = 'PruneUser', password = None)
+		tokens = [ClaimsRefreshToken.for_user(user) for _ in range(5)]
+		for token in tokens[:3]:
+			token.blacklist()
+		tokens[4].blacklist()
+
+		expired = [token['jti'] for token in tokens[:4]]
+		OutstandingToken.objects.filter(jti__in = expired).update(expires_at = timezone.now() - timedelta(days = 1))
+
+		call_command('prune_tokens', '--batch-size', '3', stdout = open(os.devnull, 'w'))
+
+		self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat = True)), [tokens[4]['jti']])
+		self.assertEqual(BlacklistedToken.objects.get().token.jti, tokens[4]['jti'])
@@ -0,0 +1,71 @@
+from importlib.util import find_spec
+from unittest       import skipUnless
+
+from django.contrib.auth.hashers import make_password, identify_hasher
+from django.contrib.auth         import aauthenticate, authenticate, get_user_model
+from django.test                 import TestCase, override_settings
+
+from users.models import User as _User # для аннотации
+
+User: type[_User] = get_user_model()
+
+PBKDF2_FIRST = [
+	'users.hashers.TunedPBKDF2PasswordHasher',
+	'users.hashers.TunedArgon2PasswordHasher',
+	'users.hashers.TunedScryptPasswordHasher',
+]
+SCRYPT_FIRST = [
+	'users.hashers.TunedScryptPasswordHasher',
+	'users.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+class PasswordHashingPolicyTest(TestCase):
+	password = 'HoleraFredyFazbear'
+
+	def create_user(self, password_hash: str) -> _User:
+		user = User.objects.create_user(username = 'HashUser', password = None)
+		User.objects.filter(pk = user.pk).update(password = password_hash)
+		return user
+
+	def stored_hash(self, user: _User) -> str:
+		return User.objects.values_list('password', flat = True).get(pk = user.pk)
+
+
+	@override_settings(PASSWORD_HASHERS = PBKDF2_FIRST, PASSWORD_HASHING = { 'PBKDF2_ITERATIONS': 1_000 })
+	def test_parameters_from_settings(self):
+		self.assertTrue(make_password(self.password).startswith('pbkdf2_sha256$1000$'))
+
+	@override_settings(PASSWORD_HASHERS = SCRYPT_FIRST, PASSWORD_HASHING = { 'PBKDF2_ITERATIONS': 1_000 })
+	def test_rehash_on_login(self):
+		with override_settings(PASSWORD_HASHERS = PBKDF2_FIRST):
+			user = self.create_user(make_password(self.password))
+
+		self.assertIsNone(authenticate(username = user.username, password = 'WRONG'))
+		self.assertEqual(identify_hasher(self.stored_hash(user)).algorithm, 'pbkdf2_sha256')
+
+		self.assertEqual(authenticate(username = user.username, password = self.password), user)
+		self.assertEqual(identify_hasher(self.stored_hash(user)).algorithm, 'scrypt')
+
+	@override_settings(PASSWORD_HASHERS = PBKDF2_FIRST, PASSWORD_HASHING = { 'PBKDF2_ITERATIONS': 2_000 })
+	async def test_async_rehash_on_new_cost(self):
+		with override_settings(PASSWORD_HASHING = { 'PBKDF2_ITERATIONS': 1_000 }):
+			user = await User.objects.acreate_user(username = 'HashUser', password = self.password)
+
+		self.assertIsNone(await aauthenticate(username = user.username, password = 'WRONG'))
+		self.assertEqual(await aauthenticate(username = user.username, password = self.password), user)
+		self.assertTrue((await User.objects.aget(pk = user.pk)).password.startswith('pbkdf2_sha256$2000$'))
+
+		self.assertIsNone(await aauthenticate(username = 'Nobody', password = self.password))
+
+	@skipUnless(find_spec('argon2'), 'argon2-cffi is not installed')
+	@override_settings(PASSWORD_HASHERS = ['users.hashers.TunedArgon2PasswordHasher', *PBKDF2_FIRST])
+	def test_argon2_parameters(self):
+		options = { 'TIME_COST': 1, 'MEMORY_COST': 1024, 'PARALLELISM': 1 }
+		with override_settings(PASSWORD_HASHING = { 'ARGON2': options }):
+			user = self.create_user(make_password(self.password))
+			self.assertIn('$m=1024,t=1,p=1$', self.stored_hash(user))
+
+		# Параметры изменились - хеш перезаписывается при входе
+		self.assertEqual(authenticate(username = user.username, password = self.password), user)
+		self.assertIn('$m=19456,t=2,p=1$', self.stored_hash(user))
@@ -47,3 +47,8 @@ class UserSerializersTest(TestCase):
 
 		user: _User = serializer.save()
 		self.assertEqual(user.role, User.Role.REGULAR_USER)
+
+	def test_register_serializer_password_similar_to_username(self):
+		serializer = UserRegisterSerializer(data = { 'username': 'FredyFazbear1987', 'password': 'fredyfazbear1987!' })
+		self.assertFalse(serializer.is_valid())
+		self.assertEqual([error.code for error in serializer.errors['password']], ['password_too_similar'])
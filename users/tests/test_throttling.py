@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache   import cache
+from django.test         import SimpleTestCase, override_settings
+from django.urls         import path, include, reverse
+from rest_framework.test import APITestCase
+from rest_framework      import status
+
+from users.tests.debug_client import CookieJWTDebugClient
+from users.throttling         import AuthRateThrottle, parse_rate
+from users.models             import User as _User # для аннотации
+from users                    import views
+
+User: type[_User] = get_user_model()
+
+RATES = {
+	'register': { 'ip': ['2/min'] },
+	'login':    { 'ip': ['10/min'], 'username_ip': ['2/min'] },
+	'refresh':  { 'ip': ['1/min'] },
+}
+
+# Вход с асинхронным dispatch (как под ASGI)
+urlpatterns = [
+	path('api/', include([
+		path('token/', views.CookieTokenObtainPairView.as_view(async_dispatch = True), name = 'token-obtain_pair'),
+	]))
+]
+
+
+class ParseRateTest(SimpleTestCase):
+	def test_parse_rate(self):
+		self.assertEqual(parse_rate('5/min'), (5, 60))
+		self.assertEqual(parse_rate('3/10s'), (3, 10))
+		self.assertEqual(parse_rate('100/h'), (100, 60 * 60))
+		with self.assertRaises(ValueError):
+			parse_rate('5 per minute')
+
+
+@override_settings(USERS_THROTTLING = { 'RATES': RATES })
+class AuthThrottlingTest(APITestCase):
+	client_class = CookieJWTDebugClient
+
+	def setUp(self):
+		cache.clear()
+		self.password = 'HoleraFredyFazbear'
+		self.user = User.objects.create_user(username = 'FredyFasbear', password = self.password)
+
+	def login(self, username: str = 'FredyFasbear', password: str = 'WRONG', **extra):
+		return self.client.post(reverse('token-obtain_pair'), { 'username': username, 'password': password }, format = 'json', **extra)
+
+
+	def test_login_limited_by_username_and_ip(self):
+		self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+		self.assertEqual(self.login(password = self.password).status_code, status.HTTP_200_OK)
+
+		# Отклоняется до проверки пароля и без запросов к БД
+		with mock.patch('django.contrib.auth.hashers.verify_password') as verify_password, self.assertNumQueries(0):
+			response = self.login(password = self.password)
+		verify_password.assert_not_called()
+		self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+		self.assertIn('Retry-After', response.headers)
+
+		# Лимит по имени, а не только по адресу
+		self.assertEqual(self.login(username = 'Other').status_code, status.HTTP_401_UNAUTHORIZED)
+		# Чужие попытки не блокируют вход владельцу аккаунта с его адреса
+		self.assertEqual(self.login(password = self.password, REMOTE_ADDR = '10.0.0.2').status_code, status.HTTP_200_OK)
+
+	def test_register_limited_before_authentication(self):
+		url = reverse('register')
+		for i in range(2):
+			# Регистрация ставит куки аутентификации, а регистрироваться могут только анонимы
+			self.client.cookies.clear()
+			response = self.client.post(url, { 'username': f'Signup{i}', 'password': 'Signup-password-1987' }, format = 'json')
+			self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+		# С кукой аутентификации, но пользователь не загружается
+		self.client.force_login(self.user)
+		with self.assertNumQueries(0):
+			response = self.client.post(url, { 'username': 'Signup2', 'password': 'Signup-password-1987' }, format = 'json')
+		self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+	def test_refresh_limited(self):
+		self.client.force_login(self.user)
+		self.assertEqual(self.client.post(reverse('token-refresh')).status_code, status.HTTP_200_OK)
+		self.assertEqual(self.client.post(reverse('token-refresh')).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+	@override_settings(USERS_THROTTLING = { 'RATES': RATES, 'ENABLED': False })
+	def test_disabled(self):
+		for _ in range(3):
+			self.assertEqual(self.login().status_code, status.HTTP_401_UNAUTHORIZED)
+
+	@override_settings(ROOT_URLCONF = __name__)
+	async def test_async_login(self):
+		data = { 'username': self.user.username, 'password': 'WRONG' }
+		for expected in (status.HTTP_401_UNAUTHORIZED, status.HTTP_401_UNAUTHORIZED, status.HTTP_429_TOO_MANY_REQUESTS):
+			response = await self.async_client.post(reverse('token-obtain_pair'), data, content_type = 'application/json')
+			self.assertEqual(response.status_code, expected)
+
+
+@override_settings(USERS_THROTTLING = { 'RATES': { 'login': { 'ip': ['10/min'] } } })
+class SlidingWindowTest(SimpleTestCase):
+	def setUp(self):
+		cache.clear()
+		self.request = mock.Mock(META = { 'REMOTE_ADDR': '10.0.0.1' }, headers = {})
+		self.view = mock.Mock(throttle_scope = 'login')
+
+	def allow(self, now: float) -> AuthRateThrottle:
+		throttle = AuthRateThrottle()
+		throttle.timer = lambda: now
+		throttle.allowed = throttle.allow_request(self.request, self.view)
+		return throttle
+
+	def test_previous_window_counts_partially(self):
+		for _ in range(10):
+			self.assertTrue(self.allow(60 * 100 + 30).allowed)
+		self.assertFalse(self.allow(60 * 100 + 59).allowed)
+
+		# Через 15 секунд в окне ещё 3/4 предыдущего: 7.5 из 10 запросов.
+		# Ещё один пройдёт, когда останется 0.7 - через 3 секунды
+		for _ in range(2):
+			self.assertTrue(self.allow(60 * 101 + 15).allowed)
+		throttle = self.allow(60 * 101 + 15)
+		self.assertFalse(throttle.allowed)
+		self.assertAlmostEqual(throttle.wait(), 3)
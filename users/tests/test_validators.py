@@ -0,0 +1,33 @@
+from django.contrib.auth.password_validation import UserAttributeSimilarityValidator
+from django.core.exceptions                  import ValidationError
+from django.test                             import SimpleTestCase
+
+from users.validators import BoundedUserAttributeSimilarityValidator, PreloadedCommonPasswordValidator
+from users.models     import User
+
+
+class PasswordValidatorsTest(SimpleTestCase):
+	def test_common_passwords_loaded_once(self):
+		first, second = PreloadedCommonPasswordValidator(), PreloadedCommonPasswordValidator()
+		self.assertIs(first.passwords, second.passwords)
+		self.assertIsInstance(first.passwords, frozenset)
+
+		with self.assertRaises(ValidationError):
+			first.validate('Password')
+
+	def test_similarity_same_as_django(self):
+		user = User(username = 'FredyFazbear', email = 'fredy.fazbear@pizzeria.com')
+		passwords = ['fredyfazbear', 'FredyFazbear!!', 'fazbear', 'pizzeria.com1', 'f', 'HoleraFredyFazbear', 'x' * 200]
+
+		for password in passwords:
+			with self.subTest(password):
+				expected = self.is_valid(UserAttributeSimilarityValidator(), password, user)
+				self.assertEqual(self.is_valid(BoundedUserAttributeSimilarityValidator(), password, user), expected)
+
+
+	def is_valid(self, validator, password: str, user: User) -> bool:
+		try:
+			validator.validate(password, user)
+		except ValidationError:
+			return False
+		return True
@@ -0,0 +1,227 @@
+"""
+Ограничение частоты запросов к входу, регистрации и обновлению токенов
+(см. settings.USERS_THROTTLING).<br>
+Лимиты - скользящие окна: счётчик текущего окна плюс доля счётчика
+предыдущего. Счётчики живут в кеше Django и меняются только атомарными
+`add()`/`incr()` (LocMemCache, Redis, Memcached), поэтому лимит общий для
+всех потоков, а с общим кешем - и для всех процессов.<br>
+Лимиты проверяются до аутентификации и валидации (см. `ThrottleFirstMixin`):
+отклонённый запрос не хеширует пароль и не ходит в БД
+"""
+from hashlib import blake2b
+import time
+import re
+
+from django.contrib.auth    import get_user_model
+from django.core.cache      import caches
+from django.conf            import settings
+from rest_framework.request import Request
+from rest_framework         import throttling
+
+from users.models import User as _User # для аннотации
+
+__all__ = [
+	'parse_rate',
+	'AuthRateThrottle',
+	'ThrottleFirstMixin',
+]
+
+User: type[_User] = get_user_model()
+
+_DEFAULTS = {
+	'ENABLED':     True,
+	# Имя кеша из CACHES со счётчиками, None - default
+	'CACHE_ALIAS': None,
+	# throttle_scope view -> { чем различать клиентов: [лимиты] }
+	'RATES':       {},
+}
+
+_PERIODS = { 's': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60 }
+_RATE_RE = re.compile(r'(\d+)/(\d*)([smhd])\w*')
+
+
+def _get_options() -> dict:
+	return { **_DEFAULTS, **getattr(settings, 'USERS_THROTTLING', {}) }
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+	"""
+	`'5/min'` -> (5, 60), `'3/10s'` -> (3, 10): число запросов и окно в секундах.<br>
+	Как `SimpleRateThrottle.parse_rate()`, но окно может быть кратным единице
+	"""
+	match = _RATE_RE.fullmatch(rate)
+	if match is None:
+		raise ValueError(f'Invalid rate: {rate!r}')
+	num, multiplier, unit = match.groups()
+	return int(num), int(multiplier or 1) * _PERIODS[unit]
+
+
+class AuthRateThrottle(throttling.BaseThrottle):
+	"""
+	Лимиты для `throttle_scope` view из `USERS_THROTTLING['RATES']`. Клиенты
+	различаются по:<br>
+	- `ip` - адрес клиента (с учётом `NUM_PROXIES` в REST_FRAMEWORK)<br>
+	- `username_ip` - имя пользователя из тела запроса вместе с адресом (перебор
+	паролей одного аккаунта). Только по имени лимит позволил бы любому
+	заблокировать вход жертве, поэтому чужой адрес счётчик не трогает<br>
+	- `user` - id аутентифицированного пользователя. Этот ключ запускает
+	аутентификацию до проверки лимита
+	"""
+	key_prefix = 'users:throttle:'
+	timer = time.time
+
+	def __init__(self):
+		options = _get_options()
+		self.enabled = options['ENABLED']
+		self.rates = options['RATES']
+		self.cache = caches[options['CACHE_ALIAS'] or 'default']
+		self.wait_time = None
+
+
+	def allow_request(self, request: Request, view) -> bool:
+		now = self.timer()
+		counted = []
+
+		for key, num, period in self.get_limits(request, view):
+			current, previous = self._window_keys(key, period, now)
+			self.cache.add(current, 0, timeout = period * 2)
+			try:
+				count = self.cache.incr(current)
+			except ValueError:
+				# Счётчик вытеснен между add и incr
+				count = 1
+				self.cache.set(current, count, timeout = period * 2)
+			counted.append(current)
+
+			if not self._check(count, self.cache.get(previous, 0), num, period, now):
+				# Отклонённые запросы не расходуют лимиты, как в SimpleRateThrottle
+				for counted_key in counted:
+					try:
+						self.cache.decr(counted_key)
+					except ValueError:
+						pass
+				return False
+
+		return True
+
+	# Для асинхронных view (см. TaskManager.async_views)
+	async def aallow_request(self, request: Request, view) -> bool:
+		# < Как allow_request(), но через async API кеша >
+		now = self.timer()
+		counted = []
+
+		for key, num, period in self.get_limits(request, view):
+			current, previous = self._window_keys(key, period, now)
+			await self.cache.aadd(current, 0, timeout = period * 2)
+			try:
+				count = await self.cache.aincr(current)
+			except ValueError:
+				count = 1
+				await self.cache.aset(current, count, timeout = period * 2)
+			counted.append(current)
+
+			if not self._check(count, await self.cache.aget(previous, 0), num, period, now):
+				for counted_key in counted:
+					try:
+						await self.cache.adecr(counted_key)
+					except ValueError:
+						pass
+				return False
+
+		return True
+		# </>
+
+	def wait(self) -> float | None:
+		return self.wait_time
+
+
+	def get_limits(self, request: Request, view) -> list[tuple[str, int, int]]:
+		"""(ключ счётчика без номера окна, число запросов, окно в секундах)"""
+		scope = getattr(view, 'throttle_scope', None)
+		if not self.enabled or scope not in self.rates:
+			return []
+
+		limits = []
+		for ident_name, rates in self.rates[scope].items():
+			ident = self.get_ident_by(ident_name, request)
+			if not ident:
+				continue
+			# В ключах memcached нельзя пробелы и длинные строки
+			digest = blake2b(str(ident).encode(), digest_size = 16).hexdigest()
+			for rate in rates:
+				num, period = parse_rate(rate)
+				limits.append((f'{self.key_prefix}{scope}:{ident_name}:{digest}:{period}', num, period))
+		return limits
+
+	def get_ident_by(self, ident_name: str, request: Request):
+		match ident_name:
+			case 'ip':
+				return self.get_ident(request)
+			case 'username_ip':
+				username = request.data.get(User.USERNAME_FIELD) if hasattr(request.data, 'get') else None
+				return f'{username}\n{self.get_ident(request)}' if isinstance(username, str) else None
+			case 'user':
+				return request.user.pk if request.user.is_authenticated else None
+		raise ValueError(f'Unknown throttle ident: {ident_name!r}')
+
+
+	def _window_keys(self, key: str, period: int, now: float) -> tuple[str, str]:
+		window = int(now // period)
+		return f'{key}:{window}', f'{key}:{window - 1}'
+
+	def _check(self, count: int, previous: int, num: int, period: int, now: float) -> bool:
+		# Предыдущее окно учитывается долей, которая ещё не вышла из скользящего окна
+		elapsed = now % period / period
+		if previous * (1 - elapsed) + count <= num:
+			return True
+
+		# Сколько ждать, пока следующий запрос не уложится в лимит
+		# (этот запрос из счётчика вычитается)
+		count -= 1
+		if count < num:
+			# Хватит уменьшения доли предыдущего окна
+			needed = 1 - (num - count - 1) / previous
+			self.wait_time = (needed - elapsed) * period
+		else:
+			# В следующем окне текущий счётчик станет предыдущим
+			needed = min(1, 1 - (num - 1) / count) if count else 0
+			self.wait_time = (1 - elapsed + max(needed, 0)) * period
+		return False
+
+
+class ThrottleFirstMixin:
+	"""
+	Проверяет лимиты до аутентификации и прав, а не после, как APIView:
+	аутентификация по куке может загрузить пользователя из БД
+	"""
+	throttle_classes = [AuthRateThrottle]
+
+	def initial(self, request: Request, *args, **kwargs) -> None:
+		# < Как APIView.initial(), но check_throttles() первым >
+		self.format_kwarg = self.get_format_suffix(**kwargs)
+
+		neg = self.perform_content_negotiation(request)
+		request.accepted_renderer, request.accepted_media_type = neg
+
+		version, scheme = self.determine_version(request, *args, **kwargs)
+		request.version, request.versioning_scheme = version, scheme
+
+		self.check_throttles(request)
+		self.perform_authentication(request)
+		self.check_permissions(request)
+		# </>
+
+	async def ainitial(self, request: Request, *args, **kwargs) -> None:
+		# < Как AsyncAPIViewMixin.ainitial(), но acheck_throttles() первым >
+		self.format_kwarg = self.get_format_suffix(**kwargs)
+
+		neg = self.perform_content_negotiation(request)
+		request.accepted_renderer, request.accepted_media_type = neg
+
+		version, scheme = self.determine_version(request, *args, **kwargs)
+		request.version, request.versioning_scheme = version, scheme
+
+		await self.acheck_throttles(request)
+		await self.aperform_authentication(request)
+		self.check_permissions(request)
+		# </>
@@ -0,0 +1,137 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.models   import TokenUser
+from rest_framework_simplejwt.tokens   import RefreshToken, Token
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.dummy  import DummyCache
+from django.core.exceptions            import ImproperlyConfigured
+from django.contrib.auth               import get_user_model
+from django.core.cache                 import caches
+from django.conf                       import settings
+
+from users.blacklist import token_blacklist
+from users.models    import User as _User # для аннотации
+
+__all__ = [
+	'USER_CLAIM_FIELDS',
+	'TOKEN_VERSION_CLAIM',
+	'is_stateless_mode',
+	'check_stateless_mode',
+	'add_user_claims',
+	'ClaimsRefreshToken',
+	'ClaimsTokenUser',
+	'publish_token_version',
+	'remember_token_version',
+	'get_published_token_version',
+	'aget_published_token_version',
+	'aremember_token_version',
+]
+
+User: type[_User] = get_user_model()
+
+# Поля пользователя, которые кладутся в токен в stateless режиме
+USER_CLAIM_FIELDS = ('username', 'role', 'is_staff')
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+def is_stateless_mode() -> bool:
+	return getattr(settings, 'USERS_STATELESS_JWT', False)
+
+
+def check_stateless_mode() -> None:
+	"""
+	Версии токенов должны быть видны всем процессам: с LocMemCache смену роли
+	в одном воркере другие не увидят и будут принимать токены со старыми claims
+	"""
+	if is_stateless_mode() and isinstance(_get_versions_cache(), (LocMemCache, DummyCache)):
+		raise ImproperlyConfigured(
+			'USERS_STATELESS_JWT requires a cache shared by all processes (Redis, Memcached, database):'
+			' set USERS_AUTH_CACHE["CACHE_ALIAS"] to one or disable stateless mode.'
+		)
+
+
+def add_user_claims(token: Token, user: _User) -> None:
+	for field in USER_CLAIM_FIELDS:
+		token[field] = getattr(user, field)
+	token[TOKEN_VERSION_CLAIM] = user.token_version
+	# Пользователь только что прочитан из БД: пока версия в кеше, запросам с этим токеном БД не нужна
+	remember_token_version(user.pk, user.token_version)
+
+
+class ClaimsRefreshToken(RefreshToken):
+	"""
+	RefreshToken, который в stateless режиме несёт подписанные claims
+	пользователя. Access токен копирует их из refresh токена
+	"""
+	@classmethod
+	def for_user(cls, user: _User) -> 'ClaimsRefreshToken':
+		token = super().for_user(user)
+		if is_stateless_mode():
+			add_user_claims(token, user)
+		return token
+
+	def check_blacklist(self) -> None:
+		# Большинство проверяемых токенов не отозваны: bloom фильтр отвечает
+		# на это без запроса к token_blacklist (см. users.blacklist)
+		if token_blacklist.might_contain(self.payload[api_settings.JTI_CLAIM]):
+			super().check_blacklist()
+
+
+class ClaimsTokenUser(TokenUser):
+	"""
+	Пользователь, собранный из claims access токена без запроса к БД.<br>
+	Хватает для проверок прав задач: `pk`, `role`, `is_staff`, `username`
+	"""
+	@property
+	def id(self):
+		# В токене id хранится строкой
+		return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+	@property
+	def pk(self):
+		return self.id
+
+	@property
+	def role(self) -> str:
+		return self.token.get('role', User.Role.REGULAR_USER)
+
+
+# MARK: Token version
+# При смене роли/прав у пользователя растёт token_version. Актуальная версия
+# публикуется в кеш на время жизни access токена: токены со старой версией
+# отклоняются, и клиент получает новые claims через refresh. Если версии
+# в кеше нет, её читают из БД (см. users.authenticators), а не верят токену.
+def _get_versions_cache():
+	alias = getattr(settings, 'USERS_AUTH_CACHE', {}).get('CACHE_ALIAS') or 'default'
+	return caches[alias]
+
+def _make_version_key(user_id) -> str:
+	return f'users:token_version:{user_id}'
+
+
+def publish_token_version(user_id, version: int) -> None:
+	_get_versions_cache().set(
+		_make_version_key(user_id),
+		version,
+		timeout = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+	)
+
+def remember_token_version(user_id, version: int) -> None:
+	"""Как `publish_token_version()`, но не перезаписывает уже опубликованную (возможно, новее)"""
+	_get_versions_cache().add(
+		_make_version_key(user_id),
+		version,
+		timeout = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+	)
+
+async def aremember_token_version(user_id, version: int) -> None:
+	await _get_versions_cache().aadd(
+		_make_version_key(user_id),
+		version,
+		timeout = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+	)
+
+def get_published_token_version(user_id) -> int | None:
+	return _get_versions_cache().get(_make_version_key(user_id))
+
+async def aget_published_token_version(user_id) -> int | None:
+	return await _get_versions_cache().aget(_make_version_key(user_id))
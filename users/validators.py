@@ -1,5 +1,76 @@
-# from django.utils.translation import gettext_lazy as loc
-# from django.core.exceptions   import ValidationError
+from difflib   import SequenceMatcher
+from threading import Lock
+import re
+
+from django.contrib.auth.password_validation import CommonPasswordValidator, UserAttributeSimilarityValidator
+from django.core.exceptions                  import FieldDoesNotExist, ValidationError
+# from django.utils.translation                import gettext_lazy as loc
+
+__all__ = [
+	'PreloadedCommonPasswordValidator',
+	'BoundedUserAttributeSimilarityValidator',
+]
+
+
+class PreloadedCommonPasswordValidator(CommonPasswordValidator):
+	"""
+	CommonPasswordValidator, который читает и распаковывает список паролей
+	один раз на процесс (для каждого файла) в общий frozenset.<br>
+	Валидаторы загружаются при старте (см. `users.apps`), и первая
+	регистрация в воркере не ждёт чтения 20 тысяч паролей
+	"""
+	_password_lists: dict[str, frozenset[str]] = {}
+	_lock = Lock()
+
+	def __init__(self, password_list_path = CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH):
+		if password_list_path is CommonPasswordValidator.DEFAULT_PASSWORD_LIST_PATH:
+			password_list_path = self.DEFAULT_PASSWORD_LIST_PATH
+
+		key = str(password_list_path)
+		with self._lock:
+			if key not in self._password_lists:
+				super().__init__(password_list_path)
+				self._password_lists[key] = frozenset(self.passwords)
+			self.passwords = self._password_lists[key]
+
+
+class BoundedUserAttributeSimilarityValidator(UserAttributeSimilarityValidator):
+	"""
+	UserAttributeSimilarityValidator, который не запускает SequenceMatcher,
+	когда похожесть не может достичь `max_similarity` уже по длинам строк:
+	`quick_ratio()` не больше `2 * min(a, b) / (a + b)`
+	"""
+	def validate(self, password, user = None):
+		if not user:
+			return
+
+		# < Как UserAttributeSimilarityValidator.validate() >
+		password = password.lower()
+		for attribute_name in self.user_attributes:
+			value = getattr(user, attribute_name, None)
+			if not value or not isinstance(value, str):
+				continue
+			value_lower = value.lower()
+			value_parts = re.split(r'\W+', value_lower) + [value_lower]
+			for value_part in value_parts:
+				if not self._may_be_similar(password, value_part):
+					continue
+				if SequenceMatcher(a = password, b = value_part).quick_ratio() >= self.max_similarity:
+					try:
+						verbose_name = str(user._meta.get_field(attribute_name).verbose_name)
+					except FieldDoesNotExist:
+						verbose_name = attribute_name
+					raise ValidationError(
+						self.get_error_message(),
+						code = 'password_too_similar',
+						params = { 'verbose_name': verbose_name },
+					)
+		# </>
+
+	def _may_be_similar(self, password: str, value: str) -> bool:
+		# Как SequenceMatcher.real_quick_ratio()
+		length = len(password) + len(value)
+		return bool(length) and 2 * min(len(password), len(value)) / length >= self.max_similarity
 
 
 # class NoInvisibleCharsAroundTheEdgesValidator:
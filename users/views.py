@@ -1,18 +1,27 @@
-from django.utils.translation            import gettext_lazy as loc
-from django.contrib.auth                 import authenticate, get_user_model
-from django.conf                         import settings
-from django.http.request                 import HttpRequest
-from rest_framework.permissions          import IsAuthenticatedOrReadOnly
-from rest_framework.response             import Response
-from rest_framework.request              import Request
-from rest_framework                      import generics, status, views
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens     import RefreshToken, AccessToken
-from rest_framework_simplejwt.views      import TokenObtainPairView, TokenRefreshView
-
-from users.serializers import UserRegisterSerializer, CookieTokenRefreshSerializer
+from django.utils.translation                        import gettext_lazy as loc
+from django.contrib.auth                             import authenticate, get_user_model
+from django.conf                                     import settings
+from django.http.request                             import HttpRequest
+from rest_framework.permissions                      import IsAuthenticatedOrReadOnly
+from rest_framework.response                         import Response
+from rest_framework.request                          import Request
+from rest_framework                                  import generics, status, views
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.exceptions             import InvalidToken, TokenError
+from rest_framework_simplejwt.settings               import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens                 import RefreshToken, AccessToken
+from rest_framework_simplejwt.views                  import TokenObtainPairView, TokenRefreshView
+from django.utils                                    import timezone
+from asgiref.sync                                    import sync_to_async
+
+from TaskManager.async_views import AsyncAPIViewMixin
+
+from users.serializers import UserRegisterSerializer, ClaimsTokenObtainPairSerializer, CookieTokenRefreshSerializer
 from users.permissinos import IsAnonymousOrReadOnly
+from users.throttling  import ThrottleFirstMixin
+from users.blacklist   import blacklist_outstanding
 from users.models      import User as _User # Для аннотации
+from users.tokens      import ClaimsRefreshToken
 from users             import local_settings
 
 User: type[_User] = get_user_model()
@@ -55,10 +64,11 @@ def _add_tokens_to_response_cookies(response: Response, refresh: RefreshToken) -
 	)
 
 
-class RegisterView(generics.CreateAPIView):
+class RegisterView(ThrottleFirstMixin, generics.CreateAPIView):
 	queryset = User.objects.all()
 	serializer_class = UserRegisterSerializer
 	permission_classes = [IsAnonymousOrReadOnly]
+	throttle_scope = 'register'
 
 
 	# Для работы аннотации в глупой IDE          ∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨∨
@@ -71,7 +81,7 @@ class RegisterView(generics.CreateAPIView):
 
 		user: _User = serializer.save()
 
-		refresh = RefreshToken.for_user(user)
+		refresh = ClaimsRefreshToken.for_user(user)
 
 		headers = self.get_success_headers(serializer.data)
 
@@ -96,11 +106,15 @@ class LogoutView(views.APIView):
 	permission_classes = [IsAuthenticatedOrReadOnly]
 
 	def post(self, request: Request | HttpRequest):
-		user: _User = request.user
-
-		refresh = RefreshToken.for_user(user)
-
-		refresh.blacklist()
+		# ?all=true - выход на всех устройствах: в blacklist уходят все
+		# действующие refresh токены пользователя, а не только из куки
+		if request.query_params.get('all', '').lower() in ('1', 'true', 'yes'):
+			blacklist_outstanding(OutstandingToken.objects.filter(
+				user_id = request.user.pk,
+				expires_at__gt = timezone.now(),
+			))
+		else:
+			self.blacklist_cookie_token(request)
 
 		response = Response()
 		response.delete_cookie(key = local_settings.ACCESS_TOKEN_COOKIE_NAME)
@@ -108,9 +122,35 @@ class LogoutView(views.APIView):
 
 		return response
 
+	def blacklist_cookie_token(self, request: Request | HttpRequest) -> None:
+		raw_refresh_token = request.COOKIES.get(local_settings.REFRESH_TOKEN_COOKIE_NAME)
+		if not raw_refresh_token:
+			return
+
+		try:
+			refresh = ClaimsRefreshToken(raw_refresh_token)
+		except TokenError:
+			# Истёк или уже в blacklist - отзывать нечего
+			return
+
+		# Чужой refresh в куке не отзываем
+		if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+			return
+
+		if not blacklist_outstanding(OutstandingToken.objects.filter(jti = refresh[jwt_settings.JTI_CLAIM])):
+			# Токен выдан до подключения blacklist и не попал в OutstandingToken
+			refresh.blacklist()
+
 
 # MARK: JWT-Token Views
-class CookieTokenObtainPairView(TokenObtainPairView):
+# Лимиты запросов проверяются первыми (users.throttling), до пароля и БД.
+# Под ASGI обе view асинхронные (apost, см. TaskManager.async_views). Пароль
+# хешируется в ограниченном пуле users.hashers, а не в event loop. Остальная
+# валидация остаётся в потоке: simplejwt проверяет blacklist и пишет
+# OutstandingToken синхронно прямо в конструкторах токенов
+class CookieTokenObtainPairView(ThrottleFirstMixin, AsyncAPIViewMixin, TokenObtainPairView):
+	throttle_scope = 'login'
+
 	def post(self, request: Request | HttpRequest):
 
 		# При ошибке вызывает исключение
@@ -128,8 +168,28 @@ class CookieTokenObtainPairView(TokenObtainPairView):
 		response.data = None
 		return response
 
+	async def apost(self, request: Request | HttpRequest):
+		serializer: ClaimsTokenObtainPairSerializer = self.get_serializer(data = request.data)
+
+		try:
+			await serializer.ais_valid(raise_exception = True)
+		except TokenError as e:
+			raise InvalidToken(e.args[0])
+
+		response = Response(status = status.HTTP_200_OK)
+
+		_add_tokens_to_response_cookies_from_raw_tokens(
+			response = response,
+			access_token  = serializer.validated_data['access'],
+			refresh_token = serializer.validated_data['refresh'],
+		)
+
+		return response
+
+
+class CookieTokenRefreshView(ThrottleFirstMixin, AsyncAPIViewMixin, TokenRefreshView):
+	throttle_scope = 'refresh'
 
-class CookieTokenRefreshView(TokenRefreshView):
 	description = \
 		f"Waits for `refresh` in the `{local_settings.REFRESH_TOKEN_COOKIE_NAME}` cookie and," \
 		f" on success, sets a new `{local_settings.ACCESS_TOKEN_COOKIE_NAME}`" \
@@ -165,3 +225,21 @@ class CookieTokenRefreshView(TokenRefreshView):
 		assert response.data is None, str(response.data)
 
 		return response
+
+	async def apost(self, request: Request | HttpRequest):
+		serializer = self.get_serializer()
+
+		try:
+			await sync_to_async(serializer.is_valid)(raise_exception = True)
+		except TokenError as e:
+			raise InvalidToken(e.args[0])
+
+		response = Response(status = status.HTTP_200_OK)
+
+		_add_tokens_to_response_cookies_from_raw_tokens(
+			response = response,
+			access_token = serializer.validated_data['access'],
+			refresh_token = serializer.validated_data['refresh'],
+		)
+
+		return response